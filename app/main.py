@@ -1,33 +1,75 @@
-import os
-from fastapi.staticfiles import StaticFiles
-
-STORAGE_DIR = os.getenv("STORAGE_DIR", "files")
-os.makedirs(STORAGE_DIR, exist_ok=True)  # <-- must be before mount
-app.mount("/files", StaticFiles(directory=STORAGE_DIR), name="files")
-
-
-import os, io, time
-from fastapi import FastAPI, UploadFile, File, Form
+import asyncio, os, io, time
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi import HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import iterate_in_threadpool
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 from .models import Resume, JobDescription, JobPackage, Settings, Alignment, Report
-from .services.parser import parse_resume, parse_jd
-from .services.alignment import compute_alignment, coverage_scores
+from .schemas import (AlignRequest, AlignResponse, AtsRequest, AtsResponse, BatchAlignRequest, CoverLetterRequest, ExportRequest,
+                      OptimizeRequest, OptimizeResponse, PairRequest, ProfileSaveRequest, ReportRequest)
+from .services.parser import parse_resume_file, parse_jd, parse_jd_file, jd_from_text
+from .services.fetcher import fetcher
+from .services.cache import parse_cache
+from .services.artifacts import get_artifacts, ARTIFACT_SWEEP_INTERVAL
+from .services.uploads import UploadRoute, spool_upload, discard, pdf_page_estimate, UploadTooLarge
+from .utils.text import normalize_text
+from .utils.timing import collect_timings, stage
+from .utils.admission import AdmissionMiddleware, admission, estimate_cost
+from .utils.instrumentation import InstrumentationMiddleware
+from .utils.metrics import PARSED_BYTES
+from .utils.fastjson import FastJSONResponse, body_schema, changed_fields, install_openapi, parse_body
+from .services.corpus import flush_corpus
+from .services.packages import get_packages
+from .services.jobs import get_jobs
+from .services.dedup import JD_DEDUP_ENABLED, align_memo, flush_jd_index, get_jd_index
+from .routers import corpus, files, jobs as job_routes, metrics, packages as package_routes
+from .routers.packages import load_package
+from .services.alignment import coverage_scores, align_batch
 from .services.ats import ats_check
 from .services.optimizer import rewrite_bullets, build_tailored_resume
-from .services.exporter import export_resume_files
+from .services.exporter import export_cache, export_key, iter_chunks, render_report_pdf, FORMATS, RENDERERS
+from .services.rendering import report_context, stream as render_stream
+from .services.backends import readiness, warmup, WARMUP
+from .services.executor import pool, PoolBusy, TaskTimeout, ClientDisconnected
 
 APP_NAME = os.getenv("APP_NAME","resume-optimizer-api")
-STORAGE_DIR = os.getenv("STORAGE_DIR","files")
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))  # responses at least this large are gzipped for clients that accept it
+
+async def sweep_artifacts():
+    # Background TTL/byte-budget eviction; the SQLite index is shared, so any worker may do it
+    while True:
+        await asyncio.sleep(ARTIFACT_SWEEP_INTERVAL)
+        await asyncio.to_thread(get_artifacts().sweep)
 
-app = FastAPI(title=APP_NAME, version="0.1.0-MVP")
-app.mount("/files", StaticFiles(directory=STORAGE_DIR), name="files")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy backends (pdfminer, python-docx, reportlab, httpx, templates) load in the background; /readyz reports progress
+    warm = asyncio.create_task(asyncio.to_thread(warmup)) if WARMUP else None
+    sweeper = asyncio.create_task(sweep_artifacts())
+    jobs = asyncio.create_task(get_jobs().run())  # resumes jobs queued or interrupted before a restart
+    yield
+    sweeper.cancel()
+    jobs.cancel()
+    await asyncio.gather(jobs, return_exceptions=True)
+    get_jobs().pool.shutdown()
+    if warm is not None:
+        warm.cancel()
+    pool.shutdown()
+    await fetcher.aclose()
+    flush_corpus()
+    flush_jd_index()
 
+app = FastAPI(title=APP_NAME, version="0.1.0-MVP", lifespan=lifespan)
+app.router.route_class = UploadRoute  # size-checked, single-copy multipart parsing for the routes below
+
+
+app.add_middleware(AdmissionMiddleware)  # innermost, so 429s still get CORS headers and are instrumented
 
 # Permissive CORS for testing (tighten in production)
 app.add_middleware(
@@ -38,100 +80,267 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+app.add_middleware(InstrumentationMiddleware)  # added last, so it wraps CORS and sees the whole request
+
+app.include_router(files.router)
+app.include_router(metrics.router)
+app.include_router(corpus.router)
+app.include_router(package_routes.router)
+app.include_router(job_routes.router)
+install_openapi(app)
+packages = get_packages()
+
 
 
 class JDInput(BaseModel):
     text: Optional[str] = None
     url: Optional[str] = None
 
+def require_pair(req: PairRequest) -> Tuple[Resume, JobDescription]:
+    if req.resume is None or req.job_description is None:
+        raise HTTPException(status_code=400, detail="Invalid payload: resume and job_description (or package_id) are required")
+    return req.resume, req.job_description
+
+async def offload(request: Request, fn, *args):
+    # CPU-bound stages run in the worker pool so light endpoints stay responsive
+    try:
+        return await pool.run(fn, *args, request=request)
+    except PoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+    except TaskTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Processing timed out: {e}")
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail="Worker crashed, retry shortly", headers={"Retry-After": "1"})
+    except ClientDisconnected:
+        # Nobody reads this response; 400 is what the framework answers when a client drops mid-body too
+        raise HTTPException(status_code=400, detail="Client closed request")
+
+async def spool(request: Request, file: UploadFile, kind: str):
+    try:
+        with stage("spool"):
+            path, digest = await spool_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    size = os.path.getsize(path)
+    PARSED_BYTES.inc(size, kind)
+    ticket = getattr(request.state, "admission", None)
+    if ticket is not None:
+        # Admission only saw Content-Length; charge the real size and page count before parsing
+        pages = await asyncio.to_thread(pdf_page_estimate, path) if path.lower().endswith(".pdf") else 0
+        ticket.charge(estimate_cost(size, pages) - ticket.cost)
+    return path, digest
+
 @app.get("/healthz")
 def health():
     return {"ok": True, "service": APP_NAME}
 
+@app.get("/readyz")
+def ready():
+    # 503 until the warmup has preloaded every backend, so the platform routes traffic only to a warm instance
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+@app.get("/stats/cache")
+def cache_stats():
+    return {"parse": parse_cache.summary(), "fetch": fetcher.stats, "export": export_cache.summary(), "artifacts": get_artifacts().summary(),
+            "alignment": align_memo.summary()}
+
+@app.get("/stats/admission")
+def admission_stats():
+    # Per cost class: limit, units in use, queue depth, admitted/queued/rejected counters
+    return admission.summary()
+
+@app.get("/stats/dedup")
+def dedup_stats():
+    # Near-duplicate JD index: canonical listings, duplicates linked, entities reused, memory used
+    return {**get_jd_index().summary(), "enabled": JD_DEDUP_ENABLED, "alignment_memo": align_memo.summary()}
+
 @app.post("/parse/resume")
-async def parse_resume_api(file: UploadFile = File(...)):
-    content = await file.read()
-    resume = parse_resume(file.filename, content)
+async def parse_resume_api(request: Request, file: UploadFile = File(...)):
+    path, digest = await spool(request, file, "resume")
+    try:
+        key, resume = await asyncio.to_thread(parse_cache.lookup_digest, Resume, "resume", file.filename, digest)
+        if resume is None:
+            resume = await offload(request, parse_resume_file, file.filename, path)
+            await asyncio.to_thread(parse_cache.store, key, resume)
+    finally:
+        discard(path)
+    resume.source_meta["filename"] = file.filename
     return {"resume": resume.model_dump()}
 
+async def parse_jd_text(request: Request, raw: str, source: str) -> JobDescription:
+    # `raw` is normalized text; exact repeats hit the parse cache, near-duplicate listings are linked to their canonical one
+    # SQLite reads and writes of the shared disk tier run off the event loop
+    key, jd = await asyncio.to_thread(parse_cache.lookup, JobDescription, "jd", "", raw.encode("utf-8"))
+    if jd is not None:
+        return await link_jd(jd, key)
+    if JD_DEDUP_ENABLED:
+        # The index lives in this process, so hashing and matching run in a thread rather than the worker pool
+        jd = await asyncio.to_thread(get_jd_index().reuse, raw, source)
+    else:
+        jd = await offload(request, jd_from_text, raw, source)
+    await asyncio.to_thread(parse_cache.store, key, jd)
+    return jd
+
+async def link_jd(jd: JobDescription, cached_key: Optional[str] = None) -> JobDescription:
+    # JDs are cached already linked; matching one against the index again would find the listing itself.
+    # A cached JD from before linking is linked once and stored back.
+    if not JD_DEDUP_ENABLED or "canonical_id" in jd.source_meta:
+        return jd
+    jd = await asyncio.to_thread(get_jd_index().link, jd)
+    if cached_key:
+        await asyncio.to_thread(parse_cache.store, cached_key, jd)
+    return jd
+
 @app.post("/parse/jd")
-async def parse_jd_api(file: Optional[UploadFile] = File(None), text: Optional[str] = Form(None), url: Optional[str] = Form(None)):
-    content = await file.read() if file is not None else b""
-    jd = parse_jd(filename=(file.filename if file else "jd.txt"), content=content, text_input=text or "", url=url or "")
+async def parse_jd_api(request: Request, file: Optional[UploadFile] = File(None), text: Optional[str] = Form(None), url: Optional[str] = Form(None)):
+    if url and file is None:
+        # Network I/O stays on the event loop; the fetcher caches normalized text per URL
+        with stage("fetch"):
+            raw = await fetcher.fetch(url)
+        jd = await parse_jd_text(request, raw, url)
+        jd.source_meta["filename"] = url
+        return {"job_description": jd.model_dump()}
+    if file is None:
+        filename = "jd.txt"
+        jd = await parse_jd_text(request, await offload(request, normalize_text, text or ""), filename)
+    else:
+        filename = file.filename
+        path, digest = await spool(request, file, "jd")
+        try:
+            key, jd = await asyncio.to_thread(parse_cache.lookup_digest, JobDescription, "jd", filename, digest)
+            if jd is None:
+                jd = await link_jd(await offload(request, parse_jd_file, filename, path))
+                await asyncio.to_thread(parse_cache.store, key, jd)
+            else:
+                jd = await link_jd(jd, key)
+        finally:
+            discard(path)
+    jd.source_meta["filename"] = filename
     return {"job_description": jd.model_dump()}
 
-@app.post("/align")
-async def align_api(payload: Dict[str, Any]):
-    try:
-        resume = Resume(**payload.get("resume"))
-        jd = JobDescription(**payload.get("job_description"))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
-    alignment = compute_alignment(resume, jd)
-    coverage = coverage_scores(alignment, jd)
-    return {"alignment": alignment.model_dump(), "coverage": coverage}
-
-@app.post("/ats/check")
-async def ats_check_api(payload: Dict[str, Any]):
-    resume = Resume(**payload.get("resume"))
-    checklist = ats_check(resume)
-    return {"ats_checklist": checklist}
-
-@app.post("/optimize")
-async def optimize_api(payload: Dict[str, Any]):
-    resume = Resume(**payload.get("resume"))
-    jd = JobDescription(**payload.get("job_description"))
-    alignment = compute_alignment(resume, jd)
-    edits = rewrite_bullets(resume, jd, alignment)
-    tailored = build_tailored_resume(resume, jd, alignment)
-    return {"edits": [e.model_dump() for e in edits], "tailored_resume": tailored.model_dump()}
-
-@app.post("/export/resume")
-async def export_resume_api(payload: Dict[str, Any]):
-    resume = Resume(**payload.get("resume"))
-    os.makedirs(STORAGE_DIR, exist_ok=True)
-    docx_path, pdf_path = export_resume_files(resume, STORAGE_DIR)
-    return {"docx_url": f"/files/{os.path.basename(docx_path)}", "pdf_url": f"/files/{os.path.basename(pdf_path)}"}
-
-@app.post("/report")
-async def report_api(payload: Dict[str, Any]):
-    # Minimal HTML report
-    from datetime import datetime
-    resume = Resume(**payload.get("resume"))
-    jd = JobDescription(**payload.get("job_description"))
-    alignment = compute_alignment(resume, jd)
-    coverage = coverage_scores(alignment, jd)
-    os.makedirs(STORAGE_DIR, exist_ok=True)
-    ts = int(time.time())
-    html_path = os.path.join(STORAGE_DIR, f"report_{ts}.html")
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(f"<html><head><meta charset='utf-8'><title>Alignment Report</title></head><body>")
-        f.write("<h1>Alignment Report</h1>")
-        f.write(f"<p>Generated: {datetime.utcnow().isoformat()}Z</p>")
-        f.write(f"<h2>Coverage</h2><pre>{coverage}</pre>")
-        f.write("<h2>Gaps</h2><ul>")
-        for g in alignment.gaps:
-            f.write(f"<li>{g['term']} – {g['reason']}</li>")
-        f.write("</ul></body></html>")
-    return {"html_url": f"/files/{os.path.basename(html_path)}"}
-
-@app.post("/cover-letter")
-async def cover_letter_api(payload: Dict[str, Any]):
-    resume = Resume(**payload.get("resume"))
-    jd = JobDescription(**payload.get("job_description"))
-    # Minimal letter text
-    letter = f"""Dear Hiring Manager,\n\nI am excited to apply for the {jd.title or 'target'} role. My background aligns with your needs, including: {', '.join(jd.entities.required_skills[:3])}.\n\nBest regards,\n{resume.pii.get('name','')}\n"""
-    os.makedirs(STORAGE_DIR, exist_ok=True)
-    path = os.path.join(STORAGE_DIR, "cover_letter.txt")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(letter)
-    return {"txt_url": f"/files/{os.path.basename(path)}"}
-
-@app.post("/profile/save")
-async def profile_save_api(payload: Dict[str, Any]):
-    os.makedirs(STORAGE_DIR, exist_ok=True)
-    path = os.path.join(STORAGE_DIR, "profile.json")
-    with open(path, "w", encoding="utf-8") as f:
-        import json
-        json.dump(payload, f, indent=2)
-    return {"profile_url": f"/files/{os.path.basename(path)}"}
+@app.post("/align", response_model=AlignResponse, openapi_extra=body_schema(AlignRequest))
+async def align_api(request: Request):
+    with collect_timings() as timings:
+        req = await parse_body(request, AlignRequest)
+        if req.package_id:
+            rec = load_package(req.package_id)
+            alignment, coverage = packages.alignment(rec), packages.coverage(rec)
+        else:
+            resume, jd = require_pair(req)
+            alignment = align_memo.align(resume, jd)
+            coverage = coverage_scores(alignment, jd)
+    return FastJSONResponse(AlignResponse(alignment=alignment, coverage=coverage, timings_ms=timings))
+
+@app.post("/align/batch", openapi_extra=body_schema(BatchAlignRequest))
+async def align_batch_api(request: Request):
+    req = await parse_body(request, BatchAlignRequest)
+    return FastJSONResponse(await offload(request, align_batch, req.resume, req.job_descriptions, req.top_k))
+
+@app.post("/ats/check", response_model=AtsResponse, openapi_extra=body_schema(AtsRequest))
+async def ats_check_api(request: Request):
+    with collect_timings() as timings:
+        req = await parse_body(request, AtsRequest)
+        if req.package_id:
+            checklist = packages.ats(load_package(req.package_id))
+        elif req.resume is not None:
+            checklist = ats_check(req.resume)
+        else:
+            raise HTTPException(status_code=400, detail="Invalid payload: resume or package_id is required")
+    return FastJSONResponse(AtsResponse(ats_checklist=checklist, timings_ms=timings))
+
+@app.post("/optimize", response_model=OptimizeResponse, openapi_extra=body_schema(OptimizeRequest))
+async def optimize_api(request: Request):
+    with collect_timings() as timings:
+        req = await parse_body(request, OptimizeRequest)
+        if req.package_id:
+            rec = load_package(req.package_id)
+            resume = rec.package.resume
+            edits, tailored = packages.optimize(rec)
+        else:
+            resume, jd = require_pair(req)
+            alignment = align_memo.align(resume, jd)
+            edits = rewrite_bullets(resume, jd, alignment)
+            # build_tailored_resume mutates its argument; keep the request's resume to diff against
+            tailored = build_tailored_resume(resume.model_copy(deep=True) if req.changed_only else resume, jd, alignment)
+    if req.changed_only:
+        # Clients that already hold the resume skip re-downloading it; typically only summary/experience change
+        return FastJSONResponse(OptimizeResponse(edits=edits, tailored_changes=changed_fields(resume, tailored), timings_ms=timings))
+    return FastJSONResponse(OptimizeResponse(edits=edits, tailored_resume=tailored, timings_ms=timings))
+
+async def render_exports(request: Request, resume: Resume, formats=tuple(RENDERERS)) -> Tuple[str, Dict[str, bytes]]:
+    # Served from the export cache when the rendered content is unchanged; misses render each format in parallel in the pool
+    key = export_key(resume)
+    out = {fmt: export_cache.get(key, fmt) for fmt in formats}
+    missing = [fmt for fmt, data in out.items() if data is None]
+    if missing:
+        rendered = await asyncio.gather(*(offload(request, RENDERERS[fmt], resume) for fmt in missing))
+        for fmt, data in zip(missing, rendered):
+            export_cache.put(key, fmt, data)
+            out[fmt] = data
+    return key, out
+
+@app.post("/export/resume", openapi_extra=body_schema(ExportRequest))
+async def export_resume_api(request: Request):
+    resume = (await parse_body(request, ExportRequest)).resume
+    key, out = await render_exports(request, resume)
+    store = get_artifacts()
+    # Artifact writes touch the disk and the shared SQLite index, so they run in threads
+    arts = await asyncio.gather(*(asyncio.to_thread(store.put, data, fmt, f"export:{key}", FORMATS[fmt]) for fmt, data in out.items()))
+    urls = {f"{fmt}_url": art.url for fmt, art in zip(out, arts)}
+    return {**urls, "export_id": key}
+
+@app.post("/export/resume/{fmt}", openapi_extra=body_schema(ExportRequest))
+async def export_resume_download(request: Request, fmt: str):
+    # Streams the rendered bytes straight from memory; nothing goes into the artifact store
+    if fmt not in RENDERERS:
+        raise HTTPException(status_code=404, detail=f"Unknown export format: {fmt}")
+    resume = (await parse_body(request, ExportRequest)).resume
+    key, out = await render_exports(request, resume, (fmt,))
+    headers = {"Content-Disposition": f'attachment; filename="resume_{key[:12]}.{fmt}"', "ETag": f'"{key}"',
+               "Content-Length": str(len(out[fmt]))}
+    return StreamingResponse(iter_chunks(out[fmt]), media_type=FORMATS[fmt], headers=headers)
+
+def report_inputs(req: ReportRequest):
+    if req.package_id:
+        rec = load_package(req.package_id)
+        return packages.alignment(rec), packages.coverage(rec)
+    resume, jd = require_pair(req)
+    alignment = align_memo.align(resume, jd)
+    return alignment, coverage_scores(alignment, jd)
+
+@app.post("/report", openapi_extra=body_schema(ReportRequest))
+async def report_api(request: Request):
+    # HTML is streamed from the precompiled template into the artifact file; the PDF renders in the pool meanwhile
+    ctx = report_context(*report_inputs(await parse_body(request, ReportRequest)))
+    store = get_artifacts()
+    html, pdf = await asyncio.gather(
+        asyncio.to_thread(store.put_stream, render_stream("report.html.j2", **ctx), "html", None, "text/html; charset=utf-8"),
+        offload(request, render_report_pdf, ctx),
+    )
+    return {"html_url": html.url, "pdf_url": (await asyncio.to_thread(store.put, pdf, "pdf")).url}
+
+@app.post("/report/html", openapi_extra=body_schema(ReportRequest))
+async def report_html_api(request: Request):
+    ctx = report_context(*report_inputs(await parse_body(request, ReportRequest)))
+    return StreamingResponse(iterate_in_threadpool(render_stream("report.html.j2", **ctx)), media_type="text/html; charset=utf-8")
+
+@app.post("/cover-letter", openapi_extra=body_schema(CoverLetterRequest))
+async def cover_letter_api(request: Request):
+    req = await parse_body(request, CoverLetterRequest)
+    if req.package_id:
+        pkg = load_package(req.package_id).package
+        resume, jd = pkg.resume, pkg.job_description
+    else:
+        resume, jd = require_pair(req)
+    art = await asyncio.to_thread(get_artifacts().put_stream, render_stream("cover_letter.txt.j2", resume=resume, jd=jd), "txt",
+                                  None, "text/plain; charset=utf-8")
+    return {"txt_url": art.url}
+
+@app.post("/profile/save", openapi_extra=body_schema(ProfileSaveRequest))
+async def profile_save_api(request: Request):
+    req = await parse_body(request, ProfileSaveRequest)
+    data = req.model_dump_json(indent=2, exclude_unset=True).encode("utf-8")
+    art = await asyncio.to_thread(get_artifacts().put, data, "json")
+    return {"profile_url": art.url}
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Dict
+from fastapi import APIRouter, HTTPException
+
+from ..models import Resume, JobDescription
+from ..services.corpus import get_corpus
+
+router = APIRouter()
+
+@router.post("/corpus/resumes")
+async def corpus_add_api(payload: Dict[str, Any]):
+    try:
+        resume = Resume(**payload.get("resume"))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+    # Indexing, log appends, snapshots and compaction touch disk and can wait on other workers' file lock
+    doc_id = await asyncio.to_thread(lambda: get_corpus().add(resume, payload.get("id")))
+    return {"id": doc_id}
+
+@router.delete("/corpus/resumes/{doc_id}")
+async def corpus_remove_api(doc_id: str):
+    if not await asyncio.to_thread(lambda: get_corpus().remove(doc_id)):
+        raise HTTPException(status_code=404, detail="Unknown resume id")
+    return {"removed": doc_id}
+
+@router.get("/corpus/stats")
+def corpus_stats_api():
+    return get_corpus().summary()
+
+@router.post("/search/resumes")
+async def search_resumes_api(payload: Dict[str, Any]):
+    try:
+        jd = JobDescription(**payload.get("job_description"))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+    corpus = await asyncio.to_thread(get_corpus)
+    results = await asyncio.to_thread(corpus.search, jd, int(payload.get("top_k") or 10))
+    return {"results": results, "query_ms": corpus.stats["last_query_ms"]}
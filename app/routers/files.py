@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from ..services.artifacts import get_artifacts
+
+router = APIRouter()
+
+IMMUTABLE = "public, max-age=31536000, immutable"  # artifact names are never reused for different content
+
+@router.get("/files/{name:path}")
+@router.head("/files/{name:path}", include_in_schema=False)
+def files_api(name: str, request: Request):
+    art = get_artifacts().get(name)
+    if art is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    headers = {"ETag": art.etag, "Cache-Control": IMMUTABLE}
+    if request.headers.get("if-none-match") == art.etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(art.path, media_type=art.content_type, headers=headers)
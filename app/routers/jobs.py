@@ -0,0 +1,76 @@
+import asyncio
+from typing import List
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..models import JobDescription
+from ..services import jobs as job_service
+from ..services.jobs import JobError, get_jobs, submit
+from ..services.parser import parse_jd
+from ..services.uploads import FORM_OVERHEAD, UploadRoute, spool_upload, discard, UploadTooLarge
+
+class JobUploadRoute(UploadRoute):
+    # A job takes many files at once; each is still held to MAX_UPLOAD_BYTES while it is spooled
+    def body_limit(self) -> int:
+        return job_service.JOB_MAX_BYTES + FORM_OVERHEAD
+
+router = APIRouter(route_class=JobUploadRoute)
+
+def _job_description(jd_text: str, job_description: str) -> JobDescription:
+    try:
+        if job_description:
+            return JobDescription.model_validate_json(job_description)
+        if jd_text:
+            return parse_jd(text_input=jd_text)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+    raise HTTPException(status_code=400, detail="Invalid payload: jd_text or job_description is required")
+
+@router.post("/jobs", status_code=202)
+async def job_submit_api(files: List[UploadFile] = File(...), jd_text: str = Form(""), job_description: str = Form("")):
+    # Zip archives and/or individual PDF/DOCX/TXT resumes, aligned against one JD and exported in the background
+    jd = _job_description(jd_text, job_description)
+    runner = get_jobs()
+    spooled = []
+    try:
+        for f in files:
+            try:
+                path, _ = await spool_upload(f)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            spooled.append((f.filename or "", path))
+        job_id = await asyncio.to_thread(submit, runner.store, jd, spooled)
+    except JobError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+    finally:
+        for _, path in spooled:
+            discard(path)
+    runner.wake()
+    return await _status(job_id)
+
+async def _status(job_id: str, items: bool = False):
+    out = await asyncio.to_thread(get_jobs().store.status, job_id, items)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job_id")
+    return out
+
+@router.get("/jobs/{job_id}")
+async def job_status_api(job_id: str, items: bool = True):
+    return await _status(job_id, items)
+
+@router.get("/jobs/{job_id}/events")
+async def job_events_api(job_id: str):
+    await _status(job_id)
+    # An explicit Content-Encoding makes GZipMiddleware pass the stream through; gzip would hold every
+    # progress line in its buffer until the job finished
+    return StreamingResponse(get_jobs().events(job_id), media_type="application/x-ndjson",
+                             headers={"Content-Encoding": "identity", "Cache-Control": "no-cache"})
+
+@router.delete("/jobs/{job_id}")
+async def job_cancel_api(job_id: str):
+    await _status(job_id)
+    runner = get_jobs()
+    if not await asyncio.to_thread(runner.store.cancel, job_id):
+        return JSONResponse(await _status(job_id), status_code=409)
+    await runner.finalize(job_id)
+    return await _status(job_id)
@@ -0,0 +1,50 @@
+from typing import Dict
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..services.cache import parse_cache
+from ..services.dedup import align_memo
+from ..services.executor import pool
+from ..services.exporter import export_cache
+from ..services.fetcher import fetcher
+from ..services.packages import get_packages
+from ..utils import profiler
+from ..utils.metrics import CACHE_EVENTS, CACHE_HIT_RATIO, REGISTRY
+
+router = APIRouter()
+
+POOL_PENDING = REGISTRY.gauge("worker_pool_pending", "Parse/export tasks queued or running in this app worker")
+
+def _cache(name: str, stats: Dict[str, int], hit_keys, miss_keys):
+    hits = sum(stats.get(k, 0) for k in hit_keys)
+    total = hits + sum(stats.get(k, 0) for k in miss_keys)
+    CACHE_HIT_RATIO.set(round(hits / total, 4) if total else 0.0, name)
+    for event, n in stats.items():
+        CACHE_EVENTS.set(n, name, event)
+
+def collect_caches():
+    _cache("parse", parse_cache.stats, ("memory_hits", "disk_hits"), ("misses",))
+    _cache("fetch", fetcher.stats, ("hits", "revalidated"), ("misses",))
+    _cache("export", export_cache.stats, ("hits",), ("misses",))
+    _cache("package_memo", get_packages().stats, ("memo_hits",), ("memo_misses",))
+    _cache("alignment_memo", align_memo.stats, ("hits",), ("misses",))
+    POOL_PENDING.set(pool.pending)
+
+REGISTRY.collectors.append(collect_caches)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_api():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/debug/profiles")
+def profiles_api():
+    if not profiler.PROFILE_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILE_ENABLED=0)")
+    return {"profiles": profiler.profile_ids()}
+
+@router.get("/debug/profiles/{pid}", response_class=PlainTextResponse)
+def profile_api(pid: str):
+    folded = profiler.get_profile(pid) if profiler.PROFILE_ENABLED else None
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Unknown profile id")
+    return PlainTextResponse(folded)
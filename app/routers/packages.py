@@ -0,0 +1,60 @@
+from typing import Any, Dict
+from fastapi import APIRouter, HTTPException
+
+from ..models import Resume, JobDescription, Settings
+from ..services.incremental import EditError
+from ..services.packages import PackageRecord, VersionConflict, get_packages
+
+router = APIRouter()
+
+def load_package(pid: str, sync: bool = True) -> PackageRecord:
+    rec = get_packages().get(pid, sync)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired package_id")
+    return rec
+
+def _parts(payload: Dict[str, Any]):
+    try:
+        resume = Resume(**payload["resume"]) if payload.get("resume") is not None else None
+        jd = JobDescription(**payload["job_description"]) if payload.get("job_description") is not None else None
+        settings = Settings(**payload["settings"]) if payload.get("settings") is not None else None
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+    return resume, jd, settings
+
+@router.post("/packages")
+async def package_create_api(payload: Dict[str, Any]):
+    resume, jd, settings = _parts(payload)
+    if resume is None or jd is None:
+        raise HTTPException(status_code=400, detail="Invalid payload: resume and job_description are required")
+    rec = get_packages().create(resume, jd, settings)
+    return {"package_id": rec.id, "fingerprint": rec.fingerprint, "version": rec.version}
+
+@router.get("/packages/{pid}")
+async def package_get_api(pid: str):
+    rec = load_package(pid)
+    return {"package_id": rec.id, "fingerprint": rec.fingerprint, "version": rec.version, "package": rec.package.model_dump()}
+
+@router.patch("/packages/{pid}")
+async def package_update_api(pid: str, payload: Dict[str, Any]):
+    rec = load_package(pid)
+    resume, jd, settings = _parts(payload)
+    rec = get_packages().update(rec, resume, jd, settings)
+    return {"package_id": rec.id, "fingerprint": rec.fingerprint, "version": rec.version}
+
+@router.patch("/packages/{pid}/resume")
+async def package_edit_resume_api(pid: str, payload: Dict[str, Any]):
+    # Incremental re-alignment: {"base_version": n, "edits": [...]} -> only the changed items/gaps/coverage
+    rec = load_package(pid, sync=False)  # edits splice the pending text; copying it into the package is deferred
+    try:
+        return get_packages().edit_resume(rec, int(payload.get("base_version", -1)), payload.get("edits") or [])
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "version": e.current})
+    except (EditError, KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid edits: {e}")
+
+@router.delete("/packages/{pid}")
+async def package_delete_api(pid: str):
+    if not get_packages().delete(pid):
+        raise HTTPException(status_code=404, detail="Unknown or expired package_id")
+    return {"deleted": pid}
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from .models import Resume, JobDescription, Alignment, EditItem
+
+# Request/response bodies of the hot endpoints; validated straight from the raw JSON bytes (see utils.fastjson)
+
+class PairRequest(BaseModel):
+    resume: Optional[Resume] = None
+    job_description: Optional[JobDescription] = None
+    package_id: Optional[str] = None
+
+class AlignRequest(PairRequest):
+    pass
+
+class OptimizeRequest(PairRequest):
+    changed_only: bool = False  # return tailored_changes (only the resume fields that differ) instead of tailored_resume
+
+class AtsRequest(BaseModel):
+    resume: Optional[Resume] = None
+    package_id: Optional[str] = None
+
+class BatchAlignRequest(BaseModel):
+    resume: Resume
+    job_descriptions: List[JobDescription] = []
+    top_k: Optional[int] = Field(None, ge=1)
+
+class ExportRequest(BaseModel):
+    resume: Resume
+
+class ReportRequest(PairRequest):
+    pass
+
+class CoverLetterRequest(PairRequest):
+    pass
+
+class ProfileSaveRequest(BaseModel):
+    # Free-form settings are stored as sent; a resume, when present, must be a valid one
+    model_config = ConfigDict(extra="allow")
+    resume: Optional[Resume] = None
+
+class AlignResponse(BaseModel):
+    alignment: Alignment
+    coverage: Dict[str, float]
+    timings_ms: Dict[str, float] = {}
+
+class AtsResponse(BaseModel):
+    ats_checklist: List[Dict[str, Any]]
+    timings_ms: Dict[str, float] = {}
+
+class OptimizeResponse(BaseModel):
+    edits: List[EditItem]
+    tailored_resume: Optional[Resume] = None
+    tailored_changes: Optional[Dict[str, Any]] = None
+    timings_ms: Dict[str, float] = {}
@@ -1,51 +1,66 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 from ..models import Resume, JobDescription, Alignment, AlignmentItem, ResponsibilityCoverage
-from ..utils.text import tokenize
+from ..utils.index import TokenIndex
+from ..utils.timing import stage, timed
+from .analysis import analyze
+from .responsibility import match_responsibilities
 
 BANDS = [(0.75,"strong"),(0.55,"medium"),(0.35,"weak")]
+EVIDENCE_LIMIT = 5  # char-offset spans reported per term
 
 def _band(score: float) -> str:
     for thr, name in BANDS:
         if score >= thr: return name
     return "missing"
 
-def _score_term_in_text(term: str, text: str) -> float:
+def _score_hits(hits: int, n_tokens: int) -> float:
     # Simple lexical frequency-based score
-    if not term: return 0.0
-    tkns = tokenize(text)
-    term_l = term.lower()
-    hits = sum(1 for t in tkns if term_l in t)
-    if not tkns: return 0.0
-    return min(1.0, hits / max(3, len(tkns)/50))  # cap at 1.0
+    if not n_tokens: return 0.0
+    return min(1.0, hits / max(3, n_tokens/50))  # cap at 1.0
+
+def _score_term(term: str, index: TokenIndex) -> Tuple[float, List[str]]:
+    if not term: return 0.0, []
+    s = _score_hits(index.hits(term), index.n_tokens)
+    evidence = [f"{a}:{b}" for a, b in index.spans(term, EVIDENCE_LIMIT)] if s else []
+    return s, evidence
+
+def _score_term_in_text(term: str, text: str) -> float:
+    return _score_term(term, TokenIndex(text))[0]
 
 def compute_alignment(resume: Resume, jd: JobDescription) -> Alignment:
-    text = resume.raw_text or ""
+    with stage("analyze"):
+        index = analyze(resume.raw_text or "").index
     req = jd.entities.required_skills or []
     pref = jd.entities.preferred_skills or []
     tools = jd.entities.tools or []
 
-    skills_items: List[AlignmentItem] = []
-    tools_items: List[AlignmentItem] = []
+    with stage("alignment"):
+        scores: Dict[str, Tuple[float, List[str]]] = {}
+        def score(term: str) -> Tuple[float, List[str]]:
+            if term not in scores:
+                scores[term] = _score_term(term, index)
+            return scores[term]
+
+        skills_items: List[AlignmentItem] = []
+        tools_items: List[AlignmentItem] = []
 
-    all_terms = list(dict.fromkeys([*req, *pref]))
-    for term in all_terms:
-        s = _score_term_in_text(term, text)
-        skills_items.append(AlignmentItem(term=term, evidence=[], strength=_band(s), confidence=float(f"{s:.2f}")))
+        all_terms = list(dict.fromkeys([*req, *pref]))
+        for term in all_terms:
+            s, ev = score(term)
+            skills_items.append(AlignmentItem(term=term, evidence=ev, strength=_band(s), confidence=float(f"{s:.2f}")))
 
-    for t in dict.fromkeys(tools):
-        s = _score_term_in_text(t, text)
-        tools_items.append(AlignmentItem(term=t, evidence=[], strength=_band(s), confidence=float(f"{s:.2f}")))
+        for t in dict.fromkeys(tools):
+            s, ev = score(t)
+            tools_items.append(AlignmentItem(term=t, evidence=ev, strength=_band(s), confidence=float(f"{s:.2f}")))
 
-    responsibilities: List[ResponsibilityCoverage] = []
-    # MVP: match top 10 frequent words from JD responsibilities (if any were supplied)
-    for r in (jd.entities.responsibilities or [])[:10]:
-        s = _score_term_in_text(r, text)
-        responsibilities.append(ResponsibilityCoverage(jd_item=r, evidence_ids=[], coverage=float(f"{s:.2f}")))
+        # BM25 over resume sentences/bullets; evidence_ids point at the best-matching ones
+        responsibilities: List[ResponsibilityCoverage] = match_responsibilities(resume, jd.entities.responsibilities or [])
 
-    gaps = []
-    for term in all_terms:
-        if _score_term_in_text(term, text) < 0.35:
-            gaps.append({"term": term, "reason": "not found", "suggestion": "ApprovalRequired"})
+        gaps = []
+        for term in all_terms:
+            if scores[term][0] < 0.35:
+                gaps.append({"term": term, "reason": "not found", "suggestion": "ApprovalRequired"})
 
     return Alignment(skills=skills_items, tools=tools_items, responsibilities=responsibilities, gaps=gaps)
 
@@ -62,3 +77,46 @@ def coverage_scores(alignment: Alignment, jd: JobDescription) -> Dict[str, float
                     break
         return round(found / len(terms), 2)
     return {"required": cov(required), "preferred": cov(preferred)}
+
+@timed("align_batch")
+def align_batch(resume: Resume, jds: List[JobDescription], top_k: Optional[int] = None) -> Dict[str, Any]:
+    # One resume vs N JDs: score each distinct term once, then derive every JD's coverage and gaps
+    # with matrix products over a shared vocabulary (same results as compute_alignment + coverage_scores).
+    # Term scoring stays a per-term substring lookup in the resume index (once per distinct term across all JDs);
+    # the JD x term matrices, coverage and ranking are array operations. `top_k` keeps only the best-ranked JDs,
+    # and gaps are listed only for those.
+    index = analyze(resume.raw_text or "").index
+    vocab: Dict[str, int] = {}
+    req_cells = [[vocab.setdefault(t.lower(), len(vocab)) for t in (jd.entities.required_skills or [])] for jd in jds]
+    pref_cells = [[vocab.setdefault(t.lower(), len(vocab)) for t in (jd.entities.preferred_skills or [])] for jd in jds]
+
+    terms = list(vocab)
+    hits = np.fromiter((index.hits(t) if t else 0 for t in terms), dtype=np.float64, count=len(terms))
+    scores = np.minimum(1.0, hits / max(3, index.n_tokens/50)) if index.n_tokens else np.zeros(len(terms))
+    found = scores >= BANDS[1][0]  # strong or medium
+    missing = scores < 0.35
+
+    def counts(cells: List[List[int]]) -> np.ndarray:
+        rows = np.repeat(np.arange(len(cells)), [len(cs) for cs in cells])
+        cols = np.fromiter((c for cs in cells for c in cs), dtype=np.int64, count=len(rows))
+        m = np.zeros((len(cells), len(terms)), dtype=np.int64)
+        np.add.at(m, (rows, cols), 1)
+        return m
+    req_m, pref_m = counts(req_cells), counts(pref_cells)
+    req_len, pref_len = req_m.sum(axis=1), pref_m.sum(axis=1)
+    def ratio(hit: np.ndarray, n: np.ndarray) -> np.ndarray:
+        # Python's round, as coverage_scores: np.round differs on exact halves such as 1/40
+        return np.array([round(h / k, 2) if k else 1.0 for h, k in zip(hit.tolist(), n.tolist())])
+    req_cov, pref_cov = ratio(req_m @ found, req_len), ratio(pref_m @ found, pref_len)
+    ranking = [int(i) for i in np.lexsort((np.arange(len(jds)), -pref_cov, -req_cov))]
+    if top_k:
+        ranking = ranking[:top_k]
+
+    results = []
+    for j in sorted(ranking):
+        jd = jds[j]
+        all_terms = dict.fromkeys([*(jd.entities.required_skills or []), *(jd.entities.preferred_skills or [])])
+        gaps = [{"term": t, "reason": "not found", "suggestion": "ApprovalRequired"} for t in all_terms if missing[vocab[t.lower()]]]
+        results.append({"index": j, "title": jd.title, "company": jd.company,
+                        "coverage": {"required": float(req_cov[j]), "preferred": float(pref_cov[j])}, "gaps": gaps})
+    return {"results": results, "ranking": ranking}
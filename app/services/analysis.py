@@ -0,0 +1,106 @@
+import os, re
+from array import array
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from ..utils.index import TokenIndex
+from ..utils.text import SAFE_BULLET, TOKEN_RE
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "128"))  # analyzed resumes kept per process
+
+# One alternation scanned left to right; email/phone come first so they win over the plain token rule.
+# '#' is accepted in the email local part so an address glued to a token ("c#dev@x.com") is still seen.
+MASTER_RE = re.compile(
+    r"(?P<email>[a-z0-9._%+#-]+@[a-z0-9.-]+\.[a-z]{2,})"
+    r"|(?P<phone>\+?\d[\d\s().-]{7,}\d)"
+    r"|(?P<token>[a-z0-9+.#-]+)"
+    r"|(?P<table>(?<= )\|(?= ))"
+    r"|(?P<bullet>\s*" + SAFE_BULLET + r"\s*)"
+    r"|(?P<sentence>(?<=[.!?;])\s+)"
+)
+TOKEN_TAIL_RE = re.compile(r"[a-z0-9+.#-]*")
+DATE_RE = re.compile(r"(20\d{2}|19\d{2})")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?;])\s+")
+
+class AnalyzedDocument:
+    # Everything the ATS, optimizer and alignment stages need from raw_text, gathered in one scan.
+    # Offsets index into `text` (the original string; the lowercased copy is scanned).
+    __slots__ = ("text", "tokens", "starts", "ends", "sentences", "dates", "emails", "phones",
+                 "bullets", "tables", "_index")
+
+    def __init__(self, text: str):
+        self.text = text
+        low = text.lower()
+        if len(low) != len(text):  # rare case-mapping that changes length; keep offsets consistent
+            self.text = text = low
+        self.tokens: List[str] = []
+        self.starts = array("I")
+        self.ends = array("I")
+        self.sentences: List[Tuple[int, int]] = []
+        self.dates: List[str] = []
+        self.emails: List[Tuple[int, int]] = []
+        self.phones: List[Tuple[int, int]] = []
+        self.bullets: List[int] = []
+        self.tables: List[int] = []
+        self._index: Optional[TokenIndex] = None
+
+        sent_start, pos, n = 0, 0, len(low)
+        while True:
+            m = MASTER_RE.search(low, pos)
+            if m is None:
+                break
+            kind, start, end = m.lastgroup, m.start(), m.end()
+            if kind == "token":
+                self._token(low, start, end)
+                if not low[start:end].isalpha():
+                    # a number glued to letters ("q1-2020-2021") starts mid-token, where the alternation cannot
+                    p = PHONE_RE.search(low, start)
+                    if p is not None and p.start() < end:
+                        self.phones.append(p.span())
+            elif kind in ("email", "phone"):
+                (self.emails if kind == "email" else self.phones).append((start, end))
+                # finish the token run the match may have cut, then re-tokenize the slice
+                end = TOKEN_TAIL_RE.match(low, end).end()
+                for t in TOKEN_RE.finditer(low, start, end):
+                    self._token(low, t.start(), t.end())
+                for b in SENTENCE_BREAK_RE.finditer(low, start, end):  # phone-like spans such as "2019. 2020"
+                    self._sentence(sent_start, b.start())
+                    sent_start = b.end()
+            else:
+                if kind == "table":
+                    self.tables.append(start)
+                elif kind == "bullet":
+                    self.bullets.append(start + m.group().index(SAFE_BULLET))
+                if kind in ("bullet", "sentence"):
+                    self._sentence(sent_start, start)
+                    sent_start = end
+            pos = end if end > start else start + 1
+        self._sentence(sent_start, n)
+
+    def _token(self, low: str, start: int, end: int):
+        tok = low[start:end]
+        self.tokens.append(tok)
+        self.starts.append(start)
+        self.ends.append(end)
+        if not tok.isalpha():
+            self.dates.extend(DATE_RE.findall(tok))
+
+    def _sentence(self, start: int, end: int):
+        while start < end and self.text[start].isspace(): start += 1
+        while end > start and self.text[end-1].isspace(): end -= 1
+        if end > start:
+            self.sentences.append((start, end))
+
+    def sentence_texts(self) -> List[str]:
+        return [self.text[a:b] for a, b in self.sentences]
+
+    @property
+    def index(self) -> TokenIndex:
+        if self._index is None:
+            self._index = TokenIndex(spans=zip(self.tokens, self.starts, self.ends))
+        return self._index
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def analyze(text: str) -> AnalyzedDocument:
+    return AnalyzedDocument(text or "")
@@ -0,0 +1,195 @@
+import hashlib, mimetypes, os, secrets, sqlite3, threading, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import CACHE_DIR
+
+STORAGE_DIR = os.getenv("STORAGE_DIR", "files")
+ARTIFACT_TTL = float(os.getenv("ARTIFACT_TTL", str(7 * 24 * 3600)))                 # seconds since last access
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(1024 * 1024 * 1024)))
+ARTIFACT_SWEEP_INTERVAL = float(os.getenv("ARTIFACT_SWEEP_INTERVAL", "300"))
+
+class Artifact:
+    __slots__ = ("name", "path", "size", "content_type", "created", "accessed")
+
+    def __init__(self, name: str, path: str, size: int, content_type: str, created: float, accessed: float):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.content_type = content_type
+        self.created = created
+        self.accessed = accessed
+
+    @property
+    def url(self) -> str:
+        return f"/files/{self.name}"
+
+    @property
+    def etag(self) -> str:
+        return f'"{os.path.basename(self.name).split(".")[0]}"'
+
+class ArtifactStore:
+    # Files under STORAGE_DIR named <id>.<ext> in two shard levels (ab/cd/abcd....ext), never rewritten in place.
+    # A SQLite index (shared by app workers) tracks size and last access; sweep() drops expired entries,
+    # then least recently used ones until the total fits the byte budget.
+    def __init__(self, root: str = STORAGE_DIR, index_path: Optional[str] = None, ttl: float = ARTIFACT_TTL,
+                 max_bytes: int = ARTIFACT_MAX_BYTES):
+        self.root = root
+        self.index_path = index_path or os.path.join(CACHE_DIR, "artifacts.sqlite3")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, int] = {"writes": 0, "reused": 0, "evicted": 0, "evicted_bytes": 0}
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        os.makedirs(self.root, exist_ok=True)
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.index_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS artifacts (name TEXT PRIMARY KEY, size INTEGER, content_type TEXT, created REAL, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed)")
+        # Running total of `size`, kept in step with the rows by every insert and delete so writes never scan the table
+        self._db.execute("CREATE TABLE IF NOT EXISTS artifacts_total (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER)")
+        self._db.execute("INSERT OR IGNORE INTO artifacts_total SELECT 0, COALESCE(SUM(size), 0) FROM artifacts "
+                         "WHERE NOT EXISTS (SELECT 1 FROM artifacts_total)")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split("/"))
+
+    def _row(self, row) -> Artifact:
+        return Artifact(row[0], self._path(row[0]), row[1], row[2], row[3], row[4])
+
+    def put(self, data: bytes, ext: str, key: Optional[str] = None, content_type: Optional[str] = None) -> Artifact:
+        return self.put_stream((data,), ext, key, content_type)
+
+    def put_stream(self, chunks: Iterable[bytes], ext: str, key: Optional[str] = None, content_type: Optional[str] = None) -> Artifact:
+        # `key` makes the id content-addressed (same key -> same file, written once); otherwise it is random.
+        # Chunks go straight to the temp file, so large artifacts are never held in memory whole.
+        aid = hashlib.sha256(key.encode()).hexdigest()[:32] if key else secrets.token_hex(16)
+        name = f"{aid[:2]}/{aid[2:4]}/{aid}.{ext}"
+        path = self._path(name)
+        ctype = content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT name, size, content_type, created, accessed FROM artifacts WHERE name = ?", (name,)).fetchone()
+            if row is not None and os.path.exists(path):
+                self._db.execute("UPDATE artifacts SET accessed = ? WHERE name = ?", (now, name))
+                self.stats["reused"] += 1
+                return self._row(row)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{secrets.token_hex(4)}.tmp"
+        size = 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            self._remove(tmp)
+            raise
+        with self._lock:
+            # The rename happens inside the write transaction, which sweeps in any worker also hold while
+            # unlinking, so an eviction can never remove a file whose row was just written again
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                os.replace(tmp, path)  # readers see the old file or the complete new one, never a partial write
+                row = self._db.execute("SELECT size FROM artifacts WHERE name = ?", (name,)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)", (name, size, ctype, now, now))
+                total = self._db.execute("UPDATE artifacts_total SET bytes = bytes + ? RETURNING bytes",
+                                         (size - (row[0] if row else 0),)).fetchone()[0]
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._remove(tmp)
+                raise
+            self.stats["writes"] += 1
+            sweeper = None
+            if total > self.max_bytes and self._sweeper is None:
+                # the writer does not wait for eviction; one sweep at a time per store
+                sweeper = self._sweeper = threading.Thread(target=self._background_sweep, name="artifact-sweep", daemon=True)
+        if sweeper is not None:
+            sweeper.start()
+        return Artifact(name, path, size, ctype, now, now)
+
+    def _background_sweep(self):
+        try:
+            self.sweep()
+        finally:
+            with self._lock:
+                self._sweeper = None
+
+    def get(self, name: str, touch: bool = True) -> Optional[Artifact]:
+        # Only indexed names resolve, so arbitrary paths under STORAGE_DIR are never served
+        with self._lock:
+            row = self._db.execute("SELECT name, size, content_type, created, accessed FROM artifacts WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            if touch:
+                self._db.execute("UPDATE artifacts SET accessed = ? WHERE name = ?", (time.time(), name))
+        art = self._row(row)
+        return art if os.path.exists(art.path) else None
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            return bool(self._evict([name]))
+
+    def _evict(self, names: List[str]) -> List[Tuple[str, int]]:
+        # Drops rows and their files in one write transaction (caller holds self._lock); see put_stream
+        removed: List[Tuple[str, int]] = []
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for name in names:
+                row = self._db.execute("DELETE FROM artifacts WHERE name = ? RETURNING size", (name,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE artifacts_total SET bytes = bytes - ?", (row[0],))
+                    removed.append((name, row[0]))
+            for name, _ in removed:
+                self._unlink(name)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return removed
+
+    def _unlink(self, name: str):
+        self._remove(self._path(name))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def sweep(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [name for name, in self._db.execute("SELECT name FROM artifacts WHERE accessed < ?", (now - self.ttl,))]
+            victims = self._evict(expired)
+            total = self._db.execute("SELECT bytes FROM artifacts_total").fetchone()[0]
+            if total > self.max_bytes:
+                # least recently used first, down to 90% of the budget
+                excess = total - int(self.max_bytes * 0.9)
+                lru: List[str] = []
+                cur = self._db.execute("SELECT name, size FROM artifacts ORDER BY accessed")
+                for name, size in cur:
+                    if excess <= 0: break
+                    lru.append(name)
+                    excess -= size
+                cur.close()
+                victims += self._evict(lru)
+            self.stats["evicted"] += len(victims)
+            self.stats["evicted_bytes"] += sum(size for _, size in victims)
+        return [name for name, _ in victims]
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+            total = self._db.execute("SELECT bytes FROM artifacts_total").fetchone()[0]
+        return {**self.stats, "artifacts": count, "bytes": total, "max_bytes": self.max_bytes, "ttl": self.ttl}
+
+_store: Optional[ArtifactStore] = None
+
+def get_artifacts() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
@@ -0,0 +1,88 @@
+import importlib, os, threading, time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Heavy third-party libraries are imported on first use of the format that needs them, not at app import.
+# The registry records which modules each backend needs so /readyz can report them and warmup() can
+# preload everything in the background after startup.
+
+WARMUP = os.getenv("WARMUP", "1") == "1"  # preload every backend in the background at startup
+
+class Backend:
+    __slots__ = ("kind", "fmt", "modules", "warm", "loaded", "load_ms", "error", "_lock")
+
+    def __init__(self, kind: str, fmt: str, modules: Tuple[str, ...], warm: Optional[str] = None):
+        self.kind = kind
+        self.fmt = fmt
+        self.modules = modules
+        self.warm = warm  # "module:function" run after the imports (builds per-process caches)
+        self.loaded = False
+        self.load_ms = 0.0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> "Backend":
+        if self.loaded:
+            return self
+        with self._lock:
+            if self.loaded:
+                return self
+            t0 = time.perf_counter()
+            try:
+                for name in self.modules:
+                    importlib.import_module(name)
+                if self.warm:
+                    mod, fn = self.warm.split(":")
+                    getattr(importlib.import_module(mod), fn)()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                raise
+            self.load_ms = round((time.perf_counter() - t0) * 1000, 1)
+            self.loaded, self.error = True, None
+        return self
+
+    def status(self) -> Dict[str, Any]:
+        return {"loaded": self.loaded, "load_ms": self.load_ms, "error": self.error}
+
+BACKENDS: Dict[Tuple[str, str], Backend] = {}
+
+def register(kind: str, fmt: str, modules: Tuple[str, ...], warm: Optional[str] = None) -> Backend:
+    BACKENDS[(kind, fmt)] = backend = Backend(kind, fmt, modules, warm)
+    return backend
+
+def require(kind: str, fmt: str) -> Backend:
+    backend = BACKENDS.get((kind, fmt))
+    if backend is None:
+        raise KeyError(f"No {kind} backend for {fmt!r}")
+    return backend.load()
+
+register("parser", "pdf", ("pdfminer.converter", "pdfminer.layout", "pdfminer.pdfinterp", "pdfminer.pdfpage"))
+register("parser", "docx", ("docx",))
+register("exporter", "docx", ("docx", "docx.shared"), warm="app.services.exporter:_docx_base")
+register("exporter", "pdf", ("reportlab.lib.pagesizes", "reportlab.pdfbase.pdfmetrics", "reportlab.pdfgen.canvas"), warm="app.services.exporter:_pdf_font")
+register("fetch", "url", ("httpx",))
+register("index", "taxonomy", (), warm="app.services.taxonomy:get_taxonomy")
+register("render", "templates", ("jinja2",), warm="app.services.rendering:warm_templates")
+
+_warm_state: Dict[str, Any] = {"started": False, "done": False, "ms": 0.0}
+
+def warmup(kinds: Optional[List[str]] = None) -> Dict[str, Any]:
+    # Best effort: a backend that fails to load is reported by /readyz instead of failing startup
+    _warm_state["started"] = True
+    t0 = time.perf_counter()
+    for backend in list(BACKENDS.values()):
+        if kinds and backend.kind not in kinds:
+            continue
+        try:
+            backend.load()
+        except Exception:
+            pass
+    _warm_state.update(done=True, ms=round((time.perf_counter() - t0) * 1000, 1))
+    return readiness()
+
+def readiness() -> Dict[str, Any]:
+    # Without WARMUP, backends load lazily on first use and the app is ready as soon as it serves requests
+    backends = {f"{b.kind}:{b.fmt}": b.status() for b in BACKENDS.values()}
+    ready = not any(b["error"] for b in backends.values())
+    if WARMUP:
+        ready = ready and _warm_state["done"] and all(b["loaded"] for b in backends.values())
+    return {"ready": ready, "warmup": dict(_warm_state), "backends": backends}
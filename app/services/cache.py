@@ -0,0 +1,161 @@
+import hashlib, os, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel
+
+from .extract import DEFAULT_LIMITS
+from .taxonomy import TAXONOMY_PATH
+
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")  # kept out of STORAGE_DIR, which is served publicly at /files
+PARSE_CACHE_MEMORY_BYTES = int(os.getenv("PARSE_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+PARSE_CACHE_DISK_BYTES = int(os.getenv("PARSE_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "1") == "1"
+
+# Any change to these files (or the taxonomy data) changes the version and orphans old entries
+_APP_DIR = os.path.join(os.path.dirname(__file__), "..")
+_VERSIONED_SOURCES = [os.path.join(_APP_DIR, rel) for rel in ("models.py", "services/parser.py", "services/extract.py", "services/taxonomy.py", "utils/text.py")] + [TAXONOMY_PATH]
+
+M = TypeVar("M", bound=BaseModel)
+
+def parser_version() -> str:
+    h = hashlib.sha256()
+    for path in _VERSIONED_SOURCES:
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(path.encode())
+    h.update(repr(DEFAULT_LIMITS).encode())  # truncation limits change the parsed text too
+    return h.hexdigest()[:16]
+
+class ParseCache:
+    # Two tiers keyed by sha256(kind, parser version, file extension, sha256(content)):
+    # an in-process LRU of serialized models under a byte budget, and a SQLite file shared by all app workers.
+    def __init__(self, path: Optional[str] = None, memory_bytes: int = PARSE_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = PARSE_CACHE_DISK_BYTES, version: Optional[str] = None):
+        self.path = path if path is not None else os.path.join(CACHE_DIR, "parse_cache.sqlite3")
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.version = version or parser_version()
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_used = 0
+        self.stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid = os.getpid()
+        self._inherited: list = []
+
+    def _check_fork(self):
+        # Forked worker (job pool): SQLite connections must not cross fork(), and the lock may have been copied while
+        # held. The parent's handle is kept referenced but never used or closed here, since closing it could
+        # checkpoint the WAL under the parent.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            if self._db is not None:
+                self._inherited.append(self._db)
+                self._db = None
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        # Rows from other parser versions are left alone: during a rolling deploy old and new workers share the file,
+        # and once no worker reads them they are the least recently used and go first under the byte budget
+        if self._db is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, version TEXT, data BLOB, size INTEGER, accessed REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS parse_cache_accessed ON parse_cache (accessed)")
+            # Running total of `size`, kept in step with the rows by put() so stores never scan the table
+            db.execute("CREATE TABLE IF NOT EXISTS parse_cache_total (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER)")
+            db.execute("INSERT OR IGNORE INTO parse_cache_total SELECT 0, COALESCE(SUM(size), 0) FROM parse_cache "
+                       "WHERE NOT EXISTS (SELECT 1 FROM parse_cache_total)")
+            self._db = db
+        return self._db
+
+    def key(self, kind: str, filename: str, content: bytes) -> str:
+        return self.key_for_digest(kind, filename, hashlib.sha256(content).hexdigest())
+
+    def key_for_digest(self, kind: str, filename: str, digest: str) -> str:
+        # `digest` is the sha256 hex of the content, so spooled uploads are keyed without reading them back
+        ext = os.path.splitext((filename or "").lower())[1]
+        return hashlib.sha256(f"{kind}\0{self.version}\0{ext}\0{digest}".encode()).hexdigest()
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_used -= len(old)
+        self.memory[key] = data
+        self.memory_used += len(data)
+        while self.memory_used > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_used -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        self._check_fork()
+        with self._lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return data
+            db = self._conn()
+            row = db.execute("SELECT data FROM parse_cache WHERE key = ?", (key,)).fetchone() if db else None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            db.execute("UPDATE parse_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._remember(key, row[0])
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, key: str, data: bytes):
+        self._check_fork()
+        with self._lock:
+            self._remember(key, data)
+            self.stats["stores"] += 1
+            db = self._conn()
+            if db is None:
+                return
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT size FROM parse_cache WHERE key = ?", (key,)).fetchone()
+                db.execute("INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?)", (key, self.version, data, len(data), time.time()))
+                total = db.execute("UPDATE parse_cache_total SET bytes = bytes + ? RETURNING bytes",
+                                   (len(data) - (row[0] if row else 0),)).fetchone()[0]
+                if total > self.disk_bytes:
+                    # least recently used first, down to 90% of the budget
+                    excess = total - int(self.disk_bytes * 0.9)
+                    while excess > 0:
+                        batch = db.execute("SELECT key, size FROM parse_cache ORDER BY accessed LIMIT 64").fetchall()
+                        if not batch: break
+                        for k, size in batch:
+                            if excess <= 0: break
+                            db.execute("DELETE FROM parse_cache WHERE key = ?", (k,))
+                            db.execute("UPDATE parse_cache_total SET bytes = bytes - ?", (size,))
+                            excess -= size
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def lookup(self, model: Type[M], kind: str, filename: str, content: bytes) -> Tuple[str, Optional[M]]:
+        return self.lookup_digest(model, kind, filename, hashlib.sha256(content).hexdigest())
+
+    def lookup_digest(self, model: Type[M], kind: str, filename: str, digest: str) -> Tuple[str, Optional[M]]:
+        key = self.key_for_digest(kind, filename, digest)
+        data = self.get(key) if PARSE_CACHE_ENABLED else None
+        return key, (model.model_validate_json(data) if data is not None else None)
+
+    def store(self, key: str, obj: BaseModel):
+        if PARSE_CACHE_ENABLED:
+            self.put(key, obj.model_dump_json().encode("utf-8"))
+
+    def summary(self) -> Dict[str, object]:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {**self.stats, "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self.memory), "memory_bytes": self.memory_used, "version": self.version}
+
+parse_cache = ParseCache()
@@ -0,0 +1,410 @@
+import hashlib, json, os, threading, time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+try:  # POSIX; without it the corpus directory must have a single writer process
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from ..models import Resume, JobDescription
+from ..utils.text import tokenize
+from ..utils.timing import timed
+from .alignment import BANDS, _band
+from .cache import CACHE_DIR
+
+CORPUS_DIR = os.getenv("CORPUS_DIR", os.path.join(CACHE_DIR, "corpus"))
+CORPUS_SNAPSHOT_EVERY = int(os.getenv("CORPUS_SNAPSHOT_EVERY", "1000"))  # log ops before the next snapshot
+CORPUS_COMPACT_RATIO = 0.25  # rebuild postings once this share of documents is deleted
+GRAM = 3
+TF_MAX = 65535  # term frequencies are stored as uint16
+
+class ResumeCorpus:
+    # Inverted index over tokenize(raw_text): interned integer token ids, postings as array('I') doc numbers
+    # plus array('H') term frequencies, and a trigram index over the vocabulary for substring terms.
+    # Persisted as one snapshot file (generation G) plus append-only logs log.<G>.jsonl, log.<G+1>.jsonl, ...
+    # App workers share the directory: appends, snapshots and log rotation happen under an exclusive file lock,
+    # and each worker replays the other workers' log records before it writes or searches.
+    def __init__(self, path: Optional[str] = CORPUS_DIR):
+        self.path = path
+        self.stats: Dict[str, float] = {"build_seconds": 0.0, "load_seconds": 0.0, "queries": 0,
+                                        "last_query_ms": 0.0, "avg_query_ms": 0.0}
+        self._lock = threading.RLock()
+        self._reset()
+        if path:
+            self.load()
+
+    def _reset(self):
+        self.vocab: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.post_docs: List[array] = []
+        self.post_tfs: List[array] = []
+        self.grams: Dict[str, array] = {}
+        self.doc_ids: List[str] = []
+        self.doc_meta: List[Dict[str, Any]] = []
+        self.n_tokens = array("I")
+        self.alive = bytearray()
+        self.by_id: Dict[str, int] = {}
+        self._gen = 0         # log generation being read/appended
+        self._log_offset = 0  # bytes of log.<gen>.jsonl already applied
+        self._log_ops = 0     # records since the snapshot, from every worker
+
+    # ---- index maintenance ----
+    def _term_id(self, tok: str) -> int:
+        tid = self.vocab.get(tok)
+        if tid is None:
+            tid = self.vocab[tok] = len(self.terms)
+            self.terms.append(tok)
+            self.post_docs.append(array("I"))
+            self.post_tfs.append(array("H"))
+            seen = set()
+            for k in range(1, min(GRAM, len(tok)) + 1):
+                for j in range(len(tok) - k + 1):
+                    g = tok[j:j+k]
+                    if g not in seen:
+                        seen.add(g)
+                        self.grams.setdefault(g, array("I")).append(tid)
+        return tid
+
+    def _index(self, doc_id: str, tf: Dict[str, int], n_tokens: int, meta: Dict[str, Any]):
+        if doc_id in self.by_id:
+            self._unindex(doc_id)
+        doc = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_meta.append(meta)
+        self.n_tokens.append(n_tokens)
+        self.alive.append(1)
+        self.by_id[doc_id] = doc
+        for tok, c in tf.items():
+            tid = self._term_id(tok)
+            self.post_docs[tid].append(doc)
+            self.post_tfs[tid].append(min(c, TF_MAX))
+
+    def _unindex(self, doc_id: str) -> bool:
+        doc = self.by_id.pop(doc_id, None)
+        if doc is None:
+            return False
+        self.alive[doc] = 0
+        return True
+
+    def _log_path(self, gen: int) -> str:
+        return os.path.join(self.path, f"log.{gen}.jsonl")
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "corpus.lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _apply(self, rec: Dict[str, Any]):
+        if rec["op"] == "add":
+            self._index(rec["id"], rec["tf"], rec["n"], rec["meta"])
+        else:
+            self._unindex(rec["id"])
+        self._log_ops += 1
+
+    def _catch_up(self, locked: bool = False):
+        # Apply log records written since this worker last read, following log rotation by other workers.
+        # With `locked` (file lock held, so no append is in flight) a tail without a newline is a torn write
+        # from a crashed writer: it is terminated and skipped so the next append starts on a fresh line.
+        while True:
+            path = self._log_path(self._gen)
+            if not os.path.exists(path) and self._snapshot_gen() > self._gen:
+                # fell behind a rotation whose log is already gone: start over from the snapshot
+                self._reset()
+                self._load_snapshot()
+                continue
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    f.seek(self._log_offset)
+                    data = f.read()
+                end = data.rfind(b"\n") + 1
+                for line in data[:end].splitlines():
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn line terminated by an earlier writer
+                    self._apply(rec)
+                self._log_offset += end
+                if locked and end < len(data):
+                    with open(path, "ab") as f:
+                        f.write(b"\n")
+                    self._log_offset += len(data) - end + 1
+            if os.path.exists(self._log_path(self._gen + 1)):
+                self._gen, self._log_offset, self._log_ops = self._gen + 1, 0, 0  # log.<gen> was complete before the next one existed
+                continue
+            return
+
+    def _stale(self) -> bool:
+        try:
+            size = os.path.getsize(self._log_path(self._gen))
+        except OSError:
+            size = 0
+        return size != self._log_offset or os.path.exists(self._log_path(self._gen + 1))
+
+    def refresh(self):
+        # Pick up other workers' changes (cheap stat when nothing changed)
+        if not self.path:
+            return
+        with self._lock:
+            if self._stale():
+                with self._file_lock():
+                    self._catch_up(locked=True)
+
+    def _append_log(self, record: Dict[str, Any]):
+        # Caller holds self._lock and the file lock, after _catch_up
+        if not self.path:
+            return
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with open(self._log_path(self._gen), "ab") as f:
+            f.write(line)
+        self._log_offset += len(line)
+        self._log_ops += 1
+
+    def _write(self, apply, record: Dict[str, Any]) -> bool:
+        # Apply a change and log it unless apply() returns False; other workers' records are replayed first,
+        # so the log order is the apply order
+        if not self.path:
+            return apply() is not False
+        with self._file_lock():
+            self._catch_up(locked=True)
+            if apply() is False:
+                return False
+            self._append_log(record)
+            if self._log_ops >= CORPUS_SNAPSHOT_EVERY:
+                self._save_locked()
+            return True
+
+    def add(self, resume: Resume, doc_id: Optional[str] = None) -> str:
+        t0 = time.perf_counter()
+        text = resume.raw_text or ""
+        doc_id = doc_id or hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        tokens = tokenize(text)
+        tf = dict(Counter(tokens))
+        meta = {"summary": (resume.summary or "")[:160], "filename": resume.source_meta.get("filename", "")}
+        with self._lock:
+            self._write(lambda: self._index(doc_id, tf, len(tokens), meta),
+                        {"op": "add", "id": doc_id, "n": len(tokens), "meta": meta, "tf": tf})
+            self.stats["build_seconds"] += time.perf_counter() - t0
+        return doc_id
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            if not self._write(lambda: self._unindex(doc_id), {"op": "remove", "id": doc_id}):
+                return False
+            if self.deleted > CORPUS_COMPACT_RATIO * len(self.doc_ids):
+                self.compact()
+            return True
+
+    @property
+    def deleted(self) -> int:
+        return len(self.doc_ids) - len(self.by_id)
+
+    def compact(self):
+        # Renumber live documents and drop dead postings
+        with self._lock:
+            remap = np.full(len(self.doc_ids), -1, dtype=np.int64)
+            live = [d for d in range(len(self.doc_ids)) if self.alive[d]]
+            remap[live] = np.arange(len(live))
+            for tid in range(len(self.terms)):
+                docs = np.frombuffer(self.post_docs[tid], dtype=np.uint32) if self.post_docs[tid] else np.zeros(0, np.uint32)
+                keep = remap[docs] >= 0 if len(docs) else np.zeros(0, bool)
+                self.post_docs[tid] = array("I", remap[docs[keep]].astype(np.uint32).tobytes())
+                self.post_tfs[tid] = array("H", np.frombuffer(self.post_tfs[tid], dtype=np.uint16)[keep].tobytes()) if len(docs) else array("H")
+            self.doc_ids = [self.doc_ids[d] for d in live]
+            self.doc_meta = [self.doc_meta[d] for d in live]
+            self.n_tokens = array("I", [self.n_tokens[d] for d in live])
+            self.alive = bytearray(b"\x01" * len(live))
+            self.by_id = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+
+    # ---- persistence ----
+    def _snapshot_gen(self) -> int:
+        try:
+            with np.load(os.path.join(self.path, "snapshot.npz")) as arrs:
+                return int(arrs["gen"])
+        except (OSError, KeyError, ValueError):
+            return 0
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock, self._file_lock():
+            self._catch_up(locked=True)
+            self._save_locked()
+
+    def _save_locked(self):
+        # Snapshot generation G+1 covers every log up to log.<G>. The next log is created before the snapshot is
+        # swapped in, so writers never append to a log the new snapshot already covers; log.<G-1> is deleted
+        # once nothing can need it (log.<G> stays for workers still reading it).
+        self.compact()
+        gen = self._gen + 1
+        lengths = np.fromiter((len(p) for p in self.post_docs), dtype=np.int64, count=len(self.post_docs))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        docs = b"".join(p.tobytes() for p in self.post_docs)
+        tfs = b"".join(p.tobytes() for p in self.post_tfs)
+        meta = json.dumps({"terms": self.terms, "doc_ids": self.doc_ids, "doc_meta": self.doc_meta}).encode("utf-8")
+        tmp = os.path.join(self.path, f"snapshot.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, gen=np.int64(gen), offsets=offsets, docs=np.frombuffer(docs, dtype=np.uint32),
+                     tfs=np.frombuffer(tfs, dtype=np.uint16), n_tokens=np.frombuffer(self.n_tokens.tobytes(), dtype=np.uint32),
+                     meta=np.frombuffer(meta, dtype=np.uint8))
+        open(self._log_path(gen), "ab").close()
+        os.replace(tmp, os.path.join(self.path, "snapshot.npz"))  # one file: the postings and metadata swap together
+        for old in range(max(0, gen - 2), -1, -1):
+            if not os.path.exists(self._log_path(old)):
+                break
+            os.remove(self._log_path(old))
+        self._gen, self._log_offset, self._log_ops = gen, 0, 0
+
+    def _load_snapshot(self):
+        snap = os.path.join(self.path, "snapshot.npz")
+        if not os.path.exists(snap):
+            return
+        with np.load(snap) as arrs:
+            meta = json.loads(arrs["meta"].tobytes())
+            offsets, docs, tfs = arrs["offsets"], arrs["docs"], arrs["tfs"]
+            for tok in meta["terms"]:
+                self._term_id(tok)
+            for tid in range(len(self.terms)):
+                a, b = offsets[tid], offsets[tid + 1]
+                self.post_docs[tid] = array("I", docs[a:b].tobytes())
+                self.post_tfs[tid] = array("H", tfs[a:b].tobytes())
+            self.n_tokens = array("I", arrs["n_tokens"].tobytes())
+            self._gen = int(arrs["gen"])
+        self.doc_ids = meta["doc_ids"]
+        self.doc_meta = meta["doc_meta"]
+        self.alive = bytearray(b"\x01" * len(self.doc_ids))
+        self.by_id = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+
+    def load(self):
+        t0 = time.perf_counter()
+        with self._lock, self._file_lock():
+            self._load_snapshot()
+            self._catch_up(locked=True)
+        self.stats["load_seconds"] = time.perf_counter() - t0
+
+    # ---- retrieval ----
+    def _matching_terms(self, term: str) -> np.ndarray:
+        # Term ids whose token contains `term` (same substring rule as alignment scoring)
+        term = term.lower()
+        if not term:
+            return np.zeros(0, dtype=np.uint32)
+        if len(term) <= GRAM:
+            ids = self.grams.get(term)
+            return np.frombuffer(ids, dtype=np.uint32) if ids else np.zeros(0, dtype=np.uint32)
+        postings = []
+        for j in range(len(term) - GRAM + 1):
+            ids = self.grams.get(term[j:j+GRAM])
+            if not ids:
+                return np.zeros(0, dtype=np.uint32)
+            postings.append(np.frombuffer(ids, dtype=np.uint32))
+        postings.sort(key=len)
+        cand = postings[0]
+        for p in postings[1:]:
+            cand = np.intersect1d(cand, p, assume_unique=True)
+        return np.array([t for t in cand if term in self.terms[t]], dtype=np.uint32)
+
+    def _term_scores(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        # (doc numbers, score) for live documents with at least one hit
+        tids = self._matching_terms(term)
+        if not len(tids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        docs = np.concatenate([np.frombuffer(self.post_docs[t], dtype=np.uint32) for t in tids]).astype(np.int64)
+        tfs = np.concatenate([np.frombuffer(self.post_tfs[t], dtype=np.uint16) for t in tids]).astype(np.float64)
+        uniq, inv = np.unique(docs, return_inverse=True)
+        hits = np.bincount(inv, weights=tfs)
+        alive = np.frombuffer(self.alive, dtype=np.uint8)[uniq].astype(bool)
+        uniq, hits = uniq[alive], hits[alive]
+        n = np.frombuffer(self.n_tokens, dtype=np.uint32)[uniq].astype(np.float64)
+        return uniq, np.minimum(1.0, hits / np.maximum(3.0, n / 50))
+
+    @timed("corpus_search")
+    def search(self, jd: JobDescription, top_k: int = 10) -> List[Dict[str, Any]]:
+        # Only documents that appear in some term's postings are scored; everything else has coverage 0
+        t0 = time.perf_counter()
+        req = jd.entities.required_skills or []
+        pref = jd.entities.preferred_skills or []
+        all_terms = list(dict.fromkeys([*req, *pref]))
+        with self._lock:
+            self.refresh()
+            results = self._search(req, pref, all_terms, top_k)
+            ms = (time.perf_counter() - t0) * 1000
+            self.stats["queries"] += 1
+            self.stats["last_query_ms"] = round(ms, 3)
+            self.stats["avg_query_ms"] = round(self.stats["avg_query_ms"] + (ms - self.stats["avg_query_ms"]) / self.stats["queries"], 3)
+        return results
+
+    def _search(self, req: List[str], pref: List[str], all_terms: List[str], top_k: int) -> List[Dict[str, Any]]:
+        per_term = {t: self._term_scores(t) for t in all_terms}
+        cand = np.unique(np.concatenate([d for d, _ in per_term.values()])) if per_term else np.zeros(0, np.int64)
+        results: List[Dict[str, Any]] = []
+        if len(cand):
+            score_sum = np.zeros(len(cand))
+            req_found, pref_found = np.zeros(len(cand)), np.zeros(len(cand))
+            found_by_term = {}
+            for t, (docs, scores) in per_term.items():
+                pos = np.searchsorted(cand, docs)
+                full = np.zeros(len(cand))
+                full[pos] = scores
+                score_sum += full
+                found_by_term[t] = full >= BANDS[1][0]  # strong or medium, as coverage_scores
+            for t in req:
+                req_found += found_by_term[t]
+            for t in pref:
+                pref_found += found_by_term[t]
+            req_cov = req_found / len(req) if req else np.ones(len(cand))
+            pref_cov = pref_found / len(pref) if pref else np.ones(len(cand))
+            mean = score_sum / max(1, len(all_terms))
+            sel = np.arange(len(cand))
+            if 0 < top_k < len(cand):
+                # The three sort keys folded into one float that never decreases along the lexsort order, so the
+                # top_k are among the documents at or above its k-th largest value; only those are lexsorted
+                key = (np.round(req_cov * 100) * 101 + np.round(pref_cov * 100)) * 2 + mean
+                kth = key[np.argpartition(-key, top_k - 1)[top_k - 1]]
+                sel = np.flatnonzero(key >= kth)
+            order = sel[np.lexsort((-mean[sel], -np.round(pref_cov[sel], 2), -np.round(req_cov[sel], 2)))][:top_k]
+            for i in order:
+                doc = int(cand[i])
+                results.append({
+                    "id": self.doc_ids[doc], "score": round(float(mean[i]), 2), "band": _band(float(mean[i])),
+                    "coverage": {"required": round(float(req_cov[i]), 2), "preferred": round(float(pref_cov[i]), 2)},
+                    "matched": [t for t in all_terms if found_by_term[t][i]], **self.doc_meta[doc],
+                })
+        return results
+
+    def index_bytes(self) -> int:
+        postings = sum(p.itemsize * len(p) for p in self.post_docs) + sum(p.itemsize * len(p) for p in self.post_tfs)
+        grams = sum(g.itemsize * len(g) for g in self.grams.values())
+        return postings + grams + self.n_tokens.itemsize * len(self.n_tokens) + len(self.alive)
+
+    def summary(self) -> Dict[str, Any]:
+        docs = len(self.by_id)
+        size = self.index_bytes()
+        return {"documents": docs, "deleted": self.deleted, "terms": len(self.terms), "index_bytes": size,
+                "bytes_per_document": round(size / docs, 1) if docs else 0.0,
+                **{k: round(v, 3) for k, v in self.stats.items()}}
+
+_corpus: Optional[ResumeCorpus] = None
+_corpus_lock = threading.Lock()
+
+def get_corpus() -> ResumeCorpus:
+    # First use loads the snapshot and replays the log, possibly from several request threads at once
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = ResumeCorpus()
+    return _corpus
+
+def flush_corpus():
+    # Snapshot on shutdown, but only if this process ever loaded the corpus
+    if _corpus is not None:
+        _corpus.save()
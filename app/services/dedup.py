@@ -0,0 +1,243 @@
+import hashlib, json, os, secrets, threading, time, zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+import numpy as np
+
+from ..models import Alignment, JobDescription, JobEntities, Resume
+from ..utils.text import tokenize
+from ..utils.timing import stage
+from .alignment import compute_alignment
+from .cache import CACHE_DIR
+from .parser import jd_from_text
+
+JD_DEDUP_ENABLED = os.getenv("JD_DEDUP_ENABLED", "1") == "1"
+JD_DEDUP_THRESHOLD = float(os.getenv("JD_DEDUP_THRESHOLD", "0.8"))  # estimated Jaccard similarity of word shingles
+JD_DEDUP_MAX = int(os.getenv("JD_DEDUP_MAX", "20000"))               # canonical listings kept (least recently seen evicted)
+JD_DEDUP_DIR = os.getenv("JD_DEDUP_DIR", os.path.join(CACHE_DIR, "dedup"))
+ALIGN_MEMO_SIZE = int(os.getenv("ALIGN_MEMO_SIZE", "4096"))
+SHINGLE = 3          # words per shingle
+PERMUTATIONS = 64    # MinHash signature length
+BANDS = 16           # LSH bands of PERMUTATIONS // BANDS rows: candidates from ~50% similarity, verified against the threshold
+ROWS = PERMUTATIONS // BANDS
+PRIME = (1 << 31) - 1
+SEED = 20240601      # fixed so signatures are comparable across processes and restarts
+FORMAT = f"{SHINGLE}:{PERMUTATIONS}:{BANDS}:{SEED}"
+
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(1, PRIME, size=PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, size=PERMUTATIONS, dtype=np.uint64)
+
+def signature(text: str) -> Optional[np.ndarray]:
+    # MinHash over word shingles of the normalized text; None when there is nothing to compare
+    tokens = tokenize(text or "")
+    if not tokens:
+        return None
+    k = min(SHINGLE, len(tokens))
+    shingles = {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+    x = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)) % PRIME
+    return ((x[:, None] * _A + _B) % PRIME).min(axis=0).astype(np.uint32)
+
+def skill_key(entities: JobEntities) -> Tuple[frozenset, frozenset, frozenset]:
+    # What the taxonomy scan found; order follows the text, so reordered boilerplate compares equal
+    return frozenset(entities.required_skills), frozenset(entities.tools), frozenset(entities.certifications)
+
+def entities_key(jd: JobDescription) -> str:
+    return hashlib.sha256(jd.entities.model_dump_json().encode()).hexdigest()
+
+class Canonical:
+    __slots__ = ("id", "sig", "entities", "title", "company", "source", "created", "seen", "duplicates")
+
+    def __init__(self, cid: str, sig: np.ndarray, entities: str, title: str, company: str, source: str,
+                 created: float, seen: float, duplicates: int = 0):
+        self.id = cid
+        self.sig = sig
+        self.entities = entities  # JobEntities JSON, reused verbatim by near-duplicates
+        self.title = title
+        self.company = company
+        self.source = source
+        self.created = created
+        self.seen = seen
+        self.duplicates = duplicates
+
+class JDIndex:
+    # MinHash/LSH index of canonical JD listings. A JD whose signature agrees with a canonical one on at least
+    # `threshold` of its positions, and whose taxonomy matches are the same, is linked to it, so reposts on other
+    # boards (tracking text, reordered boilerplate) share memoized alignments.
+    # Bounded to `max_entries` (LRU by last match); persisted as snapshot.npz + snapshot.json.
+    def __init__(self, path: Optional[str] = JD_DEDUP_DIR, threshold: float = JD_DEDUP_THRESHOLD, max_entries: int = JD_DEDUP_MAX):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Canonical]" = OrderedDict()
+        self.buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self.stats: Dict[str, int] = {"lookups": 0, "duplicates": 0, "canonical_added": 0, "entities_reused": 0, "evicted": 0}
+        self.dirty = False
+        self._lock = threading.RLock()
+        if path:
+            self.load()
+
+    @staticmethod
+    def _bands(sig: np.ndarray):
+        for b in range(BANDS):
+            yield b, sig[b * ROWS:(b + 1) * ROWS].tobytes()
+
+    def _insert(self, entry: Canonical):
+        self.entries[entry.id] = entry
+        for key in self._bands(entry.sig):
+            self.buckets.setdefault(key, set()).add(entry.id)
+        while len(self.entries) > self.max_entries:
+            _, old = self.entries.popitem(last=False)
+            for key in self._bands(old.sig):
+                ids = self.buckets.get(key)
+                if ids is not None:
+                    ids.discard(old.id)
+                    if not ids:
+                        del self.buckets[key]
+            self.stats["evicted"] += 1
+
+    def match(self, sig: Optional[np.ndarray]) -> Tuple[Optional[Canonical], float]:
+        # Best canonical listing at or above the threshold (estimated Jaccard = share of equal signature slots)
+        if sig is None:
+            return None, 0.0
+        with self._lock:
+            self.stats["lookups"] += 1
+            cands: Set[str] = set()
+            for key in self._bands(sig):
+                cands |= self.buckets.get(key, set())
+            best, best_sim = None, 0.0
+            for cid in cands:
+                sim = float(np.count_nonzero(self.entries[cid].sig == sig)) / PERMUTATIONS
+                if sim > best_sim:
+                    best, best_sim = self.entries[cid], sim
+            if best is None or best_sim < self.threshold:
+                return None, best_sim
+            return best, best_sim
+
+    def reuse(self, raw: str, source: str) -> JobDescription:
+        # Text JDs: extract (one taxonomy pass), then link. A confirmed near-duplicate takes over the canonical
+        # entities verbatim (keywords included), so its alignments are memoized together with the canonical listing's.
+        jd = jd_from_text(raw, source)
+        entry = self._link(jd, None)
+        if entry is not None:
+            jd.entities = JobEntities.model_validate_json(entry.entities)
+            with self._lock:
+                self.stats["entities_reused"] += 1
+        return jd
+
+    def link(self, jd: JobDescription, sig: Optional[np.ndarray] = None) -> JobDescription:
+        # After extraction: point `jd` at its canonical listing, or register it as a new one. Entities are never replaced.
+        self._link(jd, sig)
+        return jd
+
+    def _link(self, jd: JobDescription, sig: Optional[np.ndarray]) -> Optional[Canonical]:
+        # Shingle similarity alone cannot tell apart JDs built from one template with different skill lines, so a
+        # match only counts when the taxonomy found the same skills, tools and certifications in both.
+        with stage("dedup"):
+            if sig is None:
+                sig = signature(jd.raw_text)
+            if sig is None:
+                return None
+            entry, sim = self.match(sig)
+            if entry is not None and skill_key(JobEntities.model_validate_json(entry.entities)) == skill_key(jd.entities):
+                with self._lock:
+                    entry.seen = time.time()
+                    entry.duplicates += 1
+                    self.entries.move_to_end(entry.id)
+                    self.stats["duplicates"] += 1
+                    self.dirty = True
+                jd.source_meta.update({"canonical_id": entry.id, "duplicate_of": entry.source, "similarity": round(sim, 3)})
+                return entry
+            now = time.time()
+            entry = Canonical(secrets.token_hex(8), sig, jd.entities.model_dump_json(), jd.title, jd.company,
+                              str(jd.source_meta.get("filename", "")), now, now)
+            with self._lock:
+                self._insert(entry)
+                self.stats["canonical_added"] += 1
+                self.dirty = True
+        jd.source_meta["canonical_id"] = entry.id
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["lookups"]
+            return {**self.stats, "duplicate_rate": round(self.stats["duplicates"] / lookups, 3) if lookups else 0.0,
+                    "canonical": len(self.entries), "max_entries": self.max_entries, "buckets": len(self.buckets),
+                    "threshold": self.threshold, "index_bytes": self.index_bytes()}
+
+    def index_bytes(self) -> int:
+        return sum(e.sig.nbytes + len(e.entities) for e in self.entries.values()) + len(self.buckets) * (ROWS * 4 + 8)
+
+    # ---- persistence ----
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = list(self.entries.values())
+            self.dirty = False
+        os.makedirs(self.path, exist_ok=True)
+        sigs = np.stack([e.sig for e in entries]) if entries else np.zeros((0, PERMUTATIONS), dtype=np.uint32)
+        tmp = os.path.join(self.path, "snapshot.tmp.npz")
+        np.savez(tmp, sigs=sigs)
+        meta_tmp = os.path.join(self.path, "snapshot.tmp.json")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump({"format": FORMAT, "stats": self.stats,
+                       "entries": [[e.id, e.entities, e.title, e.company, e.source, e.created, e.seen, e.duplicates] for e in entries]}, f)
+        os.replace(tmp, os.path.join(self.path, "snapshot.npz"))
+        os.replace(meta_tmp, os.path.join(self.path, "snapshot.json"))
+
+    def load(self):
+        snap = os.path.join(self.path, "snapshot.npz")
+        meta_path = os.path.join(self.path, "snapshot.json")
+        if not (os.path.exists(snap) and os.path.exists(meta_path)):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        sigs = np.load(snap)["sigs"]
+        if meta.get("format") != FORMAT or len(sigs) != len(meta["entries"]):
+            return  # signatures from other parameters are not comparable; start over
+        for sig, row in zip(sigs, meta["entries"]):
+            self._insert(Canonical(row[0], sig.astype(np.uint32), *row[1:]))
+        self.stats.update(meta.get("stats", {}))
+
+class AlignmentMemo:
+    # Alignments by (JD entities, resume content). Near-duplicate JDs share their canonical entities, so every
+    # repost of a listing reuses the alignments already computed for it.
+    def __init__(self, max_entries: int = ALIGN_MEMO_SIZE):
+        self.max_entries = max_entries
+        self.items: "OrderedDict[Tuple[str, str], Alignment]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def align(self, resume: Resume, jd: JobDescription) -> Alignment:
+        key = (entities_key(jd), hashlib.sha256(resume.model_dump_json().encode()).hexdigest())
+        with self._lock:
+            hit = self.items.get(key)
+            if hit is not None:
+                self.items.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit.model_copy(deep=True)
+            self.stats["misses"] += 1
+        alignment = compute_alignment(resume, jd)
+        with self._lock:
+            self.items[key] = alignment.model_copy(deep=True)
+            while len(self.items) > self.max_entries:
+                self.items.popitem(last=False)
+        return alignment
+
+    def summary(self) -> Dict[str, int]:
+        return {**self.stats, "entries": len(self.items)}
+
+align_memo = AlignmentMemo()
+
+_index: Optional[JDIndex] = None
+
+def get_jd_index() -> JDIndex:
+    global _index
+    if _index is None:
+        _index = JDIndex()
+    return _index
+
+def flush_jd_index():
+    # Snapshot on shutdown, but only if this process ever loaded the index and changed it
+    if _index is not None and _index.dirty:
+        _index.save()
@@ -0,0 +1,128 @@
+import asyncio, os, threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from ..utils.timing import merge_timings, traced_call
+
+WORKER_MODE = os.getenv("WORKER_MODE", "process")  # process | thread | inline
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "0")) or (os.cpu_count() or 2)
+WORKER_QUEUE = int(os.getenv("WORKER_QUEUE", "32"))       # max tasks queued or running per app worker
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", "60"))  # seconds per task
+DISCONNECT_POLL = 0.25  # seconds between client-disconnect checks while a task runs
+
+class PoolBusy(Exception):
+    pass
+
+class TaskTimeout(Exception):
+    pass
+
+class ClientDisconnected(Exception):
+    pass
+
+class WorkerPool:
+    # Runs CPU-bound stages (pdfminer, python-docx, reportlab) off the event loop.
+    # Process pool by default, thread pool when processes are unavailable, inline for debugging.
+    def __init__(self, mode: str = WORKER_MODE, workers: int = WORKER_COUNT,
+                 max_pending: int = WORKER_QUEUE, timeout: float = WORKER_TIMEOUT):
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    try:
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    except (OSError, NotImplementedError, ImportError):
+                        self.mode = "thread"
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="worker")
+            return self._executor
+
+    def _submit(self, fn: Callable, *args: Any) -> Future:
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            # e.g. sandbox without working semaphores; degrade to threads for the rest of the process
+            with self._lock:
+                self._executor, self.mode = None, "thread"
+            return self._get_executor().submit(fn, *args)
+
+    async def run(self, fn: Callable, *args: Any, request=None, timeout: Optional[float] = None) -> Any:
+        # A slot in `pending` is held until the task itself finishes: cancel() cannot stop a task that already
+        # runs, so a timed-out or abandoned task still counts against WORKER_QUEUE while it occupies a worker
+        if self.mode == "inline":
+            return fn(*args)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise PoolBusy(f"{self.pending} tasks pending")
+            self.pending += 1
+        try:
+            executor = self._get_executor()
+            cf = self._submit(traced_call, fn, *args)  # stage timings come back with the result
+        except BaseException:
+            self._release()
+            raise
+        cf.add_done_callback(self._release)
+        try:
+            loop = asyncio.get_running_loop()
+            fut = asyncio.wrap_future(cf)
+            deadline = loop.time() + (timeout or self.timeout)
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TaskTimeout(f"{getattr(fn, '__name__', 'task')} exceeded {timeout or self.timeout}s")
+                done, _ = await asyncio.wait({fut}, timeout=min(remaining, DISCONNECT_POLL))
+                if done:
+                    result, timings = fut.result()
+                    merge_timings(timings)
+                    return result
+                if request is not None and await request.is_disconnected():
+                    raise ClientDisconnected()
+        except BrokenProcessPool:
+            # a worker died while this task ran (crash, OOM kill or restart()): the executor stays broken, so the
+            # next submit starts fresh workers instead of failing
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        except BaseException:
+            # timeout, disconnect or handler cancellation: drop the task if it has not started yet
+            cf.cancel()
+            raise
+
+    def _release(self, _: Optional[Future] = None):
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self):
+        return {"mode": self.mode, "workers": self.workers, "pending": self.pending, "max_pending": self.max_pending}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def restart(self):
+        # cancel() cannot stop a task that already runs: after a timeout, terminate the worker processes so the
+        # tasks queued behind it start on fresh ones. Their other running tasks fail with BrokenProcessPool.
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.restarts += 1
+        if executor is None:
+            return
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for proc in processes:
+            proc.terminate()
+
+pool = WorkerPool()
@@ -1,18 +1,61 @@
-from typing import Tuple
-from docx import Document
-from docx.shared import Pt
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import os, time
+from typing import Any, Dict, Iterator, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+import hashlib, json, os, threading
 
 from ..models import Resume
+from ..utils.timing import timed
+from .backends import require
 
-def export_docx(resume: Resume, out_path: str) -> str:
+EXPORT_CACHE_BYTES = int(os.getenv("EXPORT_CACHE_BYTES", str(64 * 1024 * 1024)))
+DOCX_FONT, DOCX_FONT_SIZE = "Calibri", 11
+PDF_FONT, PDF_FONT_SIZE = "Times-Roman", 11
+TEMPLATE_VERSION = "1"  # bump when the layout below changes so cached artifacts are not reused
+TEMPLATE = f"{TEMPLATE_VERSION}|{DOCX_FONT}:{DOCX_FONT_SIZE}|{PDF_FONT}:{PDF_FONT_SIZE}"
+FORMATS = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+def export_key(resume: Resume) -> str:
+    # Only the fields the renderers read, plus the template; other edits (source_meta etc.) reuse the artifacts
+    rendered = {"name": resume.pii.get("name", ""), "email": resume.pii.get("email", ""), "has_pii": bool(resume.pii),
+                "summary": resume.summary, "raw_text": resume.raw_text}
+    h = hashlib.sha256(TEMPLATE.encode())
+    h.update(json.dumps(rendered, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+@lru_cache(maxsize=1)
+def _docx_base() -> bytes:
+    # Empty document with styles applied; loading it from bytes skips python-docx's default template setup
+    from docx import Document
+    from docx.shared import Pt
     doc = Document()
-    styles = doc.styles
-    for s in ["Normal"]:
-        styles[s].font.name = "Calibri"
-        styles[s].font.size = Pt(11)
+    doc.styles["Normal"].font.name = DOCX_FONT
+    doc.styles["Normal"].font.size = Pt(DOCX_FONT_SIZE)
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+def _pdf_backend():
+    require("exporter", "pdf")
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    _pdf_font()
+    return canvas, letter
+
+@lru_cache(maxsize=1)
+def _pdf_font():
+    from reportlab.pdfbase import pdfmetrics
+    return pdfmetrics.getFont(PDF_FONT)  # loads and caches the font metrics once per process
+
+@timed("render_docx")
+def render_docx(resume: Resume) -> bytes:
+    require("exporter", "docx")
+    from docx import Document
+    doc = Document(BytesIO(_docx_base()))
 
     # Summary
     if resume.pii:
@@ -28,26 +71,126 @@ def export_docx(resume: Resume, out_path: str) -> str:
     doc.add_heading("Experience", level=1)
     doc.add_paragraph(resume.raw_text[:2000])  # MVP
 
-    doc.save(out_path)
-    return out_path
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
 
-def export_pdf(resume: Resume, out_path: str) -> str:
-    c = canvas.Canvas(out_path, pagesize=letter)
+@timed("render_pdf")
+def render_pdf(resume: Resume) -> bytes:
+    canvas, letter = _pdf_backend()
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
     width, height = letter
     textobject = c.beginText(40, height-50)
-    textobject.setFont("Times-Roman", 11)
+    textobject.setFont(PDF_FONT, PDF_FONT_SIZE)
     body = (resume.summary + "\n\n" + resume.raw_text)[:6000]
     for line in body.split("\n"):
         textobject.textLine(line[:100])
     c.drawText(textobject)
     c.showPage()
     c.save()
-    return out_path
+    return buf.getvalue()
+
+@timed("render_report_pdf")
+def render_report_pdf(ctx: Dict[str, Any]) -> bytes:
+    # Same data as report.html.j2 (see rendering.report_context); starts a new page when the text reaches the bottom margin
+    canvas, letter = _pdf_backend()
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    width, height = letter
+    lines = ["Alignment Report", "", f"Generated: {ctx['generated']}", "", "Coverage"]
+    lines += [f"  {name}: {value * 100:.0f}%" for name, value in ctx["coverage"].items()]
+    lines += ["", "Gaps"] + [f"  - {g['term']} – {g['reason']}"[:100] for g in ctx["gaps"]]
+    textobject = None
+    for line in lines:
+        if textobject is None or textobject.getY() < 50:
+            if textobject is not None:
+                c.drawText(textobject)
+                c.showPage()
+            textobject = c.beginText(40, height-50)
+            textobject.setFont(PDF_FONT, PDF_FONT_SIZE)
+        textobject.textLine(line)
+    c.drawText(textobject)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+RENDERERS = {"docx": render_docx, "pdf": render_pdf}
+
+_threads = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+def render_all(resume: Resume) -> Dict[str, bytes]:
+    # Both formats at once; callers with a process pool can instead submit each renderer separately
+    futures = {fmt: _threads.submit(fn, resume) for fmt, fn in RENDERERS.items()}
+    return {fmt: f.result() for fmt, f in futures.items()}
+
+class ExportCache:
+    # Rendered artifacts by (export_key, format), LRU under a byte budget
+    def __init__(self, max_bytes: int = EXPORT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.items: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.used = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, fmt: str) -> Optional[bytes]:
+        with self._lock:
+            data = self.items.get((key, fmt))
+            if data is None:
+                self.stats["misses"] += 1
+                return None
+            self.items.move_to_end((key, fmt))
+            self.stats["hits"] += 1
+            return data
+
+    def put(self, key: str, fmt: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self.items.pop((key, fmt), None)
+            if old is not None:
+                self.used -= len(old)
+            self.items[(key, fmt)] = data
+            self.used += len(data)
+            while self.used > self.max_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.used -= len(evicted)
+
+    def summary(self) -> Dict[str, int]:
+        return {**self.stats, "entries": len(self.items), "bytes": self.used}
+
+export_cache = ExportCache()
+
+def export_bytes(resume: Resume) -> Tuple[str, Dict[str, bytes]]:
+    key = export_key(resume)
+    out = {fmt: export_cache.get(key, fmt) for fmt in RENDERERS}
+    missing = [fmt for fmt, data in out.items() if data is None]
+    if len(missing) == len(RENDERERS):
+        out = render_all(resume)
+    else:
+        out.update({fmt: RENDERERS[fmt](resume) for fmt in missing})
+    for fmt in missing:
+        export_cache.put(key, fmt, out[fmt])
+    return key, out
+
+def iter_chunks(data: bytes, size: int = 64 * 1024) -> Iterator[bytes]:
+    view = memoryview(data)
+    for i in range(0, len(data), size):
+        yield bytes(view[i:i + size])
+
+def write_artifact(path: str, data: bytes):
+    # Content-addressed names never change meaning, so an existing file is already correct
+    if os.path.exists(path):
+        return
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
 
 def export_resume_files(resume: Resume, base_dir: str) -> Tuple[str,str]:
-    ts = int(time.time())
-    docx_path = os.path.join(base_dir, f"resume_{ts}.docx")
-    pdf_path = os.path.join(base_dir, f"resume_{ts}.pdf")
-    export_docx(resume, docx_path)
-    export_pdf(resume, pdf_path)
+    key, out = export_bytes(resume)
+    docx_path = os.path.join(base_dir, f"resume_{key[:32]}.docx")
+    pdf_path = os.path.join(base_dir, f"resume_{key[:32]}.pdf")
+    write_artifact(docx_path, out["docx"])
+    write_artifact(pdf_path, out["pdf"])
     return docx_path, pdf_path
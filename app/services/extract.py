@@ -0,0 +1,113 @@
+import codecs, os, time
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from ..utils.text import StreamNormalizer
+from ..utils.timing import stage
+from .backends import require
+
+PARSE_MAX_PAGES = int(os.getenv("PARSE_MAX_PAGES", "50"))
+PARSE_MAX_CHARS = int(os.getenv("PARSE_MAX_CHARS", "200000"))       # normalized characters kept
+PARSE_MAX_SECONDS = float(os.getenv("PARSE_MAX_SECONDS", "20"))     # wall clock, checked between pages
+TXT_CHUNK = 64 * 1024
+_END = object()
+
+class ExtractionLimits:
+    __slots__ = ("max_pages", "max_chars", "max_seconds")
+
+    def __init__(self, max_pages: int = PARSE_MAX_PAGES, max_chars: int = PARSE_MAX_CHARS,
+                 max_seconds: float = PARSE_MAX_SECONDS):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_seconds = max_seconds
+
+    def __repr__(self) -> str:
+        return f"ExtractionLimits({self.max_pages}, {self.max_chars}, {self.max_seconds})"
+
+DEFAULT_LIMITS = ExtractionLimits()
+
+def _pdf_pages(fp: BinaryIO, max_pages: int) -> Iterator[Optional[str]]:
+    # One page at a time through pdfminer; yields None instead of parsing a page past the limit
+    require("parser", "pdf")
+    from io import StringIO
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    rsrc = PDFResourceManager(caching=True)
+    buf = StringIO()
+    device = TextConverter(rsrc, buf, laparams=LAParams())
+    interp = PDFPageInterpreter(rsrc, device)
+    try:
+        for i, page in enumerate(PDFPage.get_pages(fp, caching=True)):
+            if i >= max_pages:
+                yield None
+                return
+            interp.process_page(page)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    finally:
+        device.close()
+
+def _docx_paragraphs(fp: BinaryIO) -> Iterator[str]:
+    require("parser", "docx")
+    from docx import Document
+    for p in Document(fp).paragraphs:
+        yield p.text + "\n"
+
+def _txt_chunks(fp: BinaryIO) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        b = fp.read(TXT_CHUNK)
+        if not b:
+            yield decoder.decode(b"", final=True)
+            return
+        yield decoder.decode(b)
+
+def extract_text(filename: str, fp: BinaryIO, limits: ExtractionLimits = DEFAULT_LIMITS) -> Tuple[str, Dict[str, Any]]:
+    # Stream the document through StreamNormalizer, stopping early at the page/char/time limits.
+    # Returns normalized text and meta for source_meta (pages, truncated, truncated_reason).
+    name = (filename or "").lower()
+    is_pdf = name.endswith(".pdf")
+    if is_pdf:
+        chunks: Iterator[Optional[str]] = _pdf_pages(fp, limits.max_pages)
+    elif name.endswith(".docx"):
+        chunks = _docx_paragraphs(fp)
+    else:
+        chunks = _txt_chunks(fp)
+    norm = StreamNormalizer()
+    parts, chars, units, reason = [], 0, 0, None
+    deadline = time.monotonic() + limits.max_seconds
+    while True:
+        with stage("extract"):  # pdfminer/python-docx/decoding work happens inside next()
+            chunk = next(chunks, _END)
+        if chunk is _END:
+            break
+        if chunk is None:
+            reason = "max_pages"
+            break
+        units += 1
+        with stage("normalize"):
+            piece = norm.feed(chunk)
+        if chars + len(piece) > limits.max_chars:
+            parts.append(piece[:limits.max_chars - chars].rstrip())
+            reason = "max_chars"
+            break
+        parts.append(piece)
+        chars += len(piece)
+        if time.monotonic() > deadline:
+            reason = "time_limit"
+            break
+    close = getattr(chunks, "close", None)
+    if close: close()
+    meta: Dict[str, Any] = {"truncated": reason is not None}
+    if reason:
+        meta["truncated_reason"] = reason
+    if is_pdf:
+        meta["pages"] = units
+    return "".join(parts), meta
+
+def extract_file(filename: str, path: str, limits: ExtractionLimits = DEFAULT_LIMITS) -> Tuple[str, Dict[str, Any]]:
+    with open(path, "rb") as fp:
+        return extract_text(filename, fp, limits)
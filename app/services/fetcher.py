@@ -0,0 +1,129 @@
+import asyncio, codecs, os, re, time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from ..utils.text import normalize_text
+from .backends import require
+
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))     # body cap; longer pages are truncated
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "4"))                         # concurrent requests per host
+FETCH_CACHE_BYTES = int(os.getenv("FETCH_CACHE_BYTES", str(32 * 1024 * 1024)))  # normalized text kept in memory
+FETCH_DEFAULT_TTL = float(os.getenv("FETCH_DEFAULT_TTL", "300"))               # freshness when the server sends no max-age
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)")
+
+class CacheEntry:
+    __slots__ = ("text", "etag", "last_modified", "expires_at", "size")
+
+    def __init__(self, text: str, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.size = len(text.encode("utf-8"))  # bytes, like FETCH_CACHE_BYTES; len() would count characters
+
+def _freshness(headers: "httpx.Headers") -> Optional[float]:
+    # Seconds the response may be served without revalidation; None means do not store
+    cc = headers.get("cache-control", "").lower()
+    if "no-store" in cc or "private" in cc:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    m = _MAX_AGE_RE.search(cc)
+    if m:
+        return float(m.group(1))
+    return FETCH_DEFAULT_TTL
+
+class UrlFetcher:
+    # Shared connection pool + HTTP cache (ETag / Last-Modified / Cache-Control) holding normalized JD text
+    def __init__(self, max_bytes: int = FETCH_MAX_BYTES, cache_bytes: int = FETCH_CACHE_BYTES,
+                 per_host: int = FETCH_PER_HOST, timeout: float = FETCH_TIMEOUT):
+        self.max_bytes = max_bytes
+        self.cache_bytes = cache_bytes
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.cached_bytes = 0
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "errors": 0, "truncated": 0}
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._loop = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        # Connections and semaphores belong to one event loop; rebuild if we are called from another
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            require("fetch", "url")
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, follow_redirects=True,
+                limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS, max_keepalive_connections=FETCH_MAX_CONNECTIONS),
+            )
+            self._loop = loop
+            self._hosts = {}
+        return self._client
+
+    def _store(self, url: str, entry: CacheEntry):
+        old = self.cache.pop(url, None)
+        if old is not None:
+            self.cached_bytes -= old.size
+        if entry.size > self.cache_bytes:
+            return
+        self.cache[url] = entry
+        self.cached_bytes += entry.size
+        while self.cached_bytes > self.cache_bytes:
+            _, evicted = self.cache.popitem(last=False)
+            self.cached_bytes -= evicted.size
+
+    async def fetch(self, url: str) -> str:
+        entry = self.cache.get(url)
+        if entry is not None:
+            self.cache.move_to_end(url)
+            if entry.expires_at > time.time():
+                self.stats["hits"] += 1
+                return entry.text
+        try:
+            client = self._get_client()
+            host = urlsplit(url).netloc
+            sem = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+            headers = {}
+            if entry is not None:
+                if entry.etag: headers["If-None-Match"] = entry.etag
+                if entry.last_modified: headers["If-Modified-Since"] = entry.last_modified
+            async with sem:
+                async with client.stream("GET", url, headers=headers) as r:
+                    if r.status_code == 304 and entry is not None:
+                        ttl = _freshness(r.headers)
+                        entry.expires_at = time.time() + (ttl or 0.0)
+                        self.stats["revalidated"] += 1
+                        return entry.text
+                    r.raise_for_status()
+                    decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+                    parts, received = [], 0
+                    async for chunk in r.aiter_bytes():
+                        received += len(chunk)
+                        if received > self.max_bytes:
+                            parts.append(decoder.decode(chunk[:len(chunk) - (received - self.max_bytes)]))
+                            self.stats["truncated"] += 1
+                            break
+                        parts.append(decoder.decode(chunk))
+                    parts.append(decoder.decode(b"", final=True))
+        except Exception:
+            self.stats["errors"] += 1
+            return ""
+        self.stats["misses"] += 1
+        text = normalize_text("".join(parts))
+        ttl = _freshness(r.headers)
+        if ttl is not None:
+            self._store(url, CacheEntry(text, r.headers.get("etag"), r.headers.get("last-modified"), time.time() + ttl))
+        return text
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+fetcher = UrlFetcher()
@@ -0,0 +1,179 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Tuple
+
+from ..models import JobDescription, AlignmentItem
+from ..utils.text import TOKEN_RE
+from .alignment import _band, _score_hits
+from .analysis import analyze
+
+_TOKEN_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789+.#-")
+CHUNK = 4096  # chars per text chunk; a splice rewrites the chunks it touches, never the whole text
+
+class EditError(ValueError):
+    pass
+
+class ChunkedText:
+    # Text as a list of chunks plus their start offsets, so an edit costs its own size plus an offset shift
+    # per following chunk instead of two full-string copies. str() joins it (only when the text is read).
+    __slots__ = ("chunks", "starts", "n")
+
+    def __init__(self, text: str):
+        self.chunks = [text[i:i + CHUNK] for i in range(0, len(text), CHUNK)] or [""]
+        self.starts: List[int] = []
+        self._reindex(0)
+
+    def _reindex(self, i: int):
+        pos = self.starts[i] if i < len(self.starts) else 0
+        del self.starts[i:]
+        for c in self.chunks[i:]:
+            self.starts.append(pos)
+            pos += len(c)
+        self.n = pos
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __str__(self) -> str:
+        return "".join(self.chunks)
+
+    def _find(self, pos: int) -> int:
+        return max(0, bisect_right(self.starts, pos) - 1) if pos < self.n else len(self.chunks) - 1
+
+    def char(self, pos: int) -> str:
+        i = self._find(pos)
+        return self.chunks[i][pos - self.starts[i]]
+
+    def slice(self, start: int, end: int) -> str:
+        if start >= end:
+            return ""
+        i, j = self._find(start), self._find(end - 1)
+        return "".join(self.chunks[i:j + 1])[start - self.starts[i]:end - self.starts[i]]
+
+    def splice(self, start: int, end: int, new: str):
+        i, j = self._find(start), self._find(end)
+        merged = self.chunks[i][:start - self.starts[i]] + new + self.chunks[j][end - self.starts[j]:]
+        parts = [merged[k:k + CHUNK] for k in range(0, len(merged), CHUNK)] if len(merged) > 2 * CHUNK else [merged]
+        if not merged and len(self.chunks) > j - i + 1:
+            parts = []  # drop the emptied chunk unless it is the only one left
+        self.chunks[i:j + 1] = parts
+        self._reindex(i)
+
+class IncrementalAligner:
+    # Keeps token counts and per-term hit counts for one resume/JD pair so text edits only re-tokenize
+    # the touched token runs. Skill/tool items, gaps and coverage always equal a full compute_alignment;
+    # evidence offsets and responsibilities are left to the full path.
+    __slots__ = ("buf", "n_tokens", "jd", "hits", "version")
+
+    def __init__(self, text: str, jd: JobDescription, version: int = 0):
+        doc = analyze(text or "")
+        self.buf = ChunkedText(text or "")  # the text as written; windows are lowered as they are read
+        self.n_tokens = len(doc.tokens)
+        self.jd = jd
+        self.version = version
+        index = doc.index
+        self.hits: Dict[str, int] = {}
+        for term in self._terms():
+            t = term.lower()
+            if t not in self.hits:
+                self.hits[t] = index.hits(t) if t else 0
+
+    @property
+    def text(self) -> str:
+        return str(self.buf)
+
+    def _terms(self) -> List[str]:
+        e = self.jd.entities
+        return [*(e.required_skills or []), *(e.preferred_skills or []), *(e.tools or [])]
+
+    def score(self, term: str) -> float:
+        return _score_hits(self.hits[term.lower()], self.n_tokens) if term else 0.0
+
+    def _splice(self, start: int, end: int, new: str) -> Tuple[int, int, str]:
+        # Returns the splice that undoes this one
+        buf, n = self.buf, len(self.buf)
+        if not (0 <= start <= end <= n):
+            raise EditError(f"span {start}:{end} outside 0:{n}")
+        # widen to whole token runs so tokens outside [a, b) are unaffected by the edit; a character whose
+        # lowercase form has a token character in it (e.g. "İ" -> "i" + dot) extends the run too
+        a, b = start, end
+        while a > 0 and not _TOKEN_CHARS.isdisjoint(buf.char(a-1).lower()): a -= 1
+        while b < n and not _TOKEN_CHARS.isdisjoint(buf.char(b).lower()): b += 1
+        window = buf.slice(a, b)
+        old = window[start - a:end - a]
+        # lowered after splicing, so offsets always index the text as written even where lower() changes lengths
+        removed = TOKEN_RE.findall(window.lower())
+        added = TOKEN_RE.findall((window[:start - a] + new + window[end - a:]).lower())
+        buf.splice(start, end, new)
+        self.n_tokens += len(added) - len(removed)
+        for t in self.hits:
+            if t:
+                self.hits[t] += sum(1 for tok in added if t in tok) - sum(1 for tok in removed if t in tok)
+        return start, start + len(new), old
+
+    def apply(self, edits: List[Dict[str, Any]]):
+        # ops use char offsets into the current text: insert {at,text}, delete {start,end}, replace {start,end,text}.
+        # All or nothing: a bad edit undoes the ones before it in the batch.
+        undo: List[Tuple[int, int, str]] = []
+        try:
+            if not isinstance(edits, list):
+                raise EditError("edits must be a list")
+            for e in edits:
+                if not isinstance(e, dict):
+                    raise EditError(f"edit must be an object, got {type(e).__name__}")
+                if not isinstance(e.get("text", ""), str):
+                    raise EditError("edit text must be a string")
+                op = e.get("op")
+                if op == "insert":
+                    undo.append(self._splice(int(e["at"]), int(e["at"]), e.get("text", "")))
+                elif op == "delete":
+                    undo.append(self._splice(int(e["start"]), int(e["end"]), ""))
+                elif op == "replace":
+                    undo.append(self._splice(int(e["start"]), int(e["end"]), e.get("text", "")))
+                else:
+                    raise EditError(f"unknown op {op!r}")
+        except Exception:
+            for start, end, old in reversed(undo):
+                self._splice(start, end, old)
+            raise
+        self.version += 1
+
+    def items(self) -> Tuple[List[AlignmentItem], List[AlignmentItem]]:
+        e = self.jd.entities
+        def item(term: str) -> AlignmentItem:
+            s = self.score(term)
+            return AlignmentItem(term=term, evidence=[], strength=_band(s), confidence=float(f"{s:.2f}"))
+        skills = [item(t) for t in dict.fromkeys([*(e.required_skills or []), *(e.preferred_skills or [])])]
+        tools = [item(t) for t in dict.fromkeys(e.tools or [])]
+        return skills, tools
+
+    def gaps(self) -> List[Dict[str, str]]:
+        e = self.jd.entities
+        return [{"term": t, "reason": "not found", "suggestion": "ApprovalRequired"}
+                for t in dict.fromkeys([*(e.required_skills or []), *(e.preferred_skills or [])]) if self.score(t) < 0.35]
+
+    def coverage(self) -> Dict[str, float]:
+        def cov(terms: List[str]) -> float:
+            if not terms: return 1.0
+            return round(sum(1 for t in terms if _band(self.score(t)) in {"strong", "medium"}) / len(terms), 2)
+        return {"required": cov(self.jd.entities.required_skills or []), "preferred": cov(self.jd.entities.preferred_skills or [])}
+
+    def snapshot(self) -> Dict[str, Any]:
+        skills, tools = self.items()
+        return {"skills": {i.term: i for i in skills}, "tools": {i.term: i for i in tools},
+                "gaps": [g["term"] for g in self.gaps()], "coverage": self.coverage()}
+
+def diff_snapshots(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for kind in ("skills", "tools"):
+        changed = [it.model_dump() for term, it in after[kind].items()
+                   if (before[kind][term].strength, before[kind][term].confidence) != (it.strength, it.confidence)]
+        if changed:
+            out[kind] = changed
+    was, now = set(before["gaps"]), set(after["gaps"])
+    added = [t for t in after["gaps"] if t not in was]
+    removed = [t for t in before["gaps"] if t not in now]
+    if added or removed:
+        out["gaps"] = {"added": added, "removed": removed}
+    if after["coverage"] != before["coverage"]:
+        out["coverage"] = after["coverage"]
+    return out
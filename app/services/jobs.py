@@ -0,0 +1,446 @@
+import asyncio, csv, hashlib, io, json, os, secrets, shutil, sqlite3, threading, time, zipfile
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..models import Resume, JobDescription
+from .alignment import compute_alignment, coverage_scores
+from .artifacts import ARTIFACT_TTL, get_artifacts
+from .cache import CACHE_DIR, parse_cache
+from .executor import WORKER_COUNT, WORKER_MODE, WorkerPool, TaskTimeout
+from .exporter import export_resume_files
+from .parser import parse_resume_file
+from .uploads import MAX_UPLOAD_BYTES, UPLOAD_CHUNK
+
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(CACHE_DIR, "jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0")) or WORKER_COUNT   # items processed at once per app worker
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "1000"))
+JOB_MAX_BYTES = int(os.getenv("JOB_MAX_BYTES", str(1024 * 1024 * 1024)))  # total extracted input per job
+JOB_ITEM_TIMEOUT = float(os.getenv("JOB_ITEM_TIMEOUT", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))  # an item whose worker died this often is marked failed
+JOB_TTL = float(os.getenv("JOB_TTL", str(ARTIFACT_TTL)))   # finished jobs are forgotten after this many seconds
+JOB_POLL_INTERVAL = 0.5
+JOB_RECOVER_INTERVAL = 60  # seconds between checks for jobs orphaned by a crashed worker
+LEASE_SECONDS = JOB_ITEM_TIMEOUT + 30  # a running item whose lease expired is assumed lost (crash) and re-queued
+SUPPORTED = (".pdf", ".docx", ".txt")
+FINISHED = ("done", "cancelled")
+
+class JobError(Exception):
+    pass
+
+@lru_cache(maxsize=8)
+def _job_description(jd_json: str) -> JobDescription:
+    return JobDescription.model_validate_json(jd_json)
+
+def process_item(filename: str, path: str, digest: str, jd_json: str, out_dir: str) -> Dict[str, Any]:
+    # One resume end to end; runs in the job pool (a worker process by default), so it only takes plain arguments
+    key, resume = parse_cache.lookup_digest(Resume, "resume", filename, digest)
+    if resume is None:
+        resume = parse_resume_file(filename, path)
+        parse_cache.store(key, resume)
+    jd = _job_description(jd_json)
+    alignment = compute_alignment(resume, jd)
+    coverage = coverage_scores(alignment, jd)
+    os.makedirs(out_dir, exist_ok=True)
+    docx_path, pdf_path = export_resume_files(resume, out_dir)
+    return {"name": resume.pii.get("name", ""), "coverage": coverage, "gaps": [g["term"] for g in alignment.gaps],
+            "truncated": bool(resume.source_meta.get("truncated")), "exports": {"docx": docx_path, "pdf": pdf_path}}
+
+class Item:
+    __slots__ = ("job", "seq", "filename", "path", "digest", "attempts")
+
+    def __init__(self, job: str, seq: int, filename: str, path: str, digest: str, attempts: int):
+        self.job = job
+        self.seq = seq
+        self.filename = filename
+        self.path = path
+        self.digest = digest
+        self.attempts = attempts
+
+class JobStore:
+    # Durable queue: job and item state in SQLite (shared by app workers), inputs and exports under JOBS_DIR/<id>/.
+    # Items are claimed with a lease; a restart re-queues whatever was claimed but never finished.
+    def __init__(self, root: str = JOBS_DIR, index_path: Optional[str] = None):
+        self.root = root
+        self.index_path = index_path or os.path.join(CACHE_DIR, "jobs.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.index_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, jd TEXT, total INTEGER, skipped TEXT, "
+                         "archive TEXT, created REAL, updated REAL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS items (job TEXT, seq INTEGER, filename TEXT, path TEXT, digest TEXT, status TEXT, "
+                         "owner TEXT, lease REAL, attempts INTEGER, error TEXT, result TEXT, PRIMARY KEY (job, seq))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_status ON items (status, lease)")
+
+    def workdir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def create(self, job_id: str, jd: JobDescription, inputs: List[Tuple[str, str, str]], skipped: List[str]):
+        # `inputs` are (filename, path, sha256) already inside workdir(job_id) (see stage_inputs)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?, NULL, ?, ?)",
+                                 (job_id, "queued", jd.model_dump_json(), len(inputs), json.dumps(skipped), now, now))
+                self._db.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, 'queued', NULL, 0, 0, NULL, NULL)",
+                                     [(job_id, i, name, path, digest) for i, (name, path, digest) in enumerate(inputs)])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def claim(self, n: int, owner: str, now: Optional[float] = None) -> List[Item]:
+        # Oldest queued items first, then items whose lease expired (retried until JOB_MAX_ATTEMPTS, see expire_leases).
+        # Idle polls only read; the write transaction starts once there is something to claim.
+        now = time.time() if now is None else now
+        if n <= 0:
+            return []
+        claimable = "status = 'queued' OR (status = 'running' AND lease < ? AND attempts < ?)"
+        with self._lock:
+            if self._db.execute(f"SELECT 1 FROM items WHERE {claimable} LIMIT 1", (now, JOB_MAX_ATTEMPTS)).fetchone() is None:
+                return []
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(f"SELECT job, seq, filename, path, digest, attempts FROM items WHERE {claimable} ORDER BY rowid LIMIT ?",
+                                        (now, JOB_MAX_ATTEMPTS, n)).fetchall()
+                self._db.executemany("UPDATE items SET status = 'running', owner = ?, lease = ?, attempts = attempts + 1 WHERE job = ? AND seq = ?",
+                                     [(owner, now + LEASE_SECONDS, job, seq) for job, seq, *_ in rows])
+                for job in {r[0] for r in rows}:
+                    self._db.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'queued'", (now, job))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [Item(job, seq, name, path, digest, attempts + 1) for job, seq, name, path, digest, attempts in rows]
+
+    def expire_leases(self, now: Optional[float] = None) -> int:
+        # Items lost with their worker this often are given up on (see recover)
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._db.execute("UPDATE items SET status = 'failed', error = 'worker lost', owner = NULL "
+                                    "WHERE status = 'running' AND lease < ? AND attempts >= ?", (now, JOB_MAX_ATTEMPTS)).rowcount
+
+    def finish(self, item: Item, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with self._lock:
+            self._db.execute("UPDATE items SET status = ?, error = ?, result = ?, owner = NULL WHERE job = ? AND seq = ? AND status = 'running'",
+                             (status, error, json.dumps(result) if result is not None else None, item.job, item.seq))
+            self._db.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), item.job))
+
+    def retry(self, item: Item, count_attempt: bool = True):
+        with self._lock:
+            self._db.execute("UPDATE items SET status = 'queued', owner = NULL, attempts = attempts - ? WHERE job = ? AND seq = ? AND status = 'running'",
+                             (0 if count_attempt else 1, item.job, item.seq))
+
+    def release(self, owner: str):
+        # Graceful shutdown: hand claimed items back without waiting for their leases to expire
+        with self._lock:
+            self._db.execute("UPDATE items SET status = 'queued', owner = NULL, attempts = attempts - 1 WHERE status = 'running' AND owner = ?", (owner,))
+
+    def job_row(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT id, status, jd, total, skipped, archive, created, updated FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("id", "status", "jd", "total", "skipped", "archive", "created", "updated"), row))
+
+    def counts(self, job_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM items WHERE job = ? GROUP BY status", (job_id,)).fetchall()
+        return dict(rows)
+
+    def items(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT seq, filename, status, attempts, error, result FROM items WHERE job = ? ORDER BY seq", (job_id,)).fetchall()
+        return [{"seq": seq, "filename": name, "status": status, "attempts": attempts, "error": error,
+                 "result": json.loads(result) if result else None} for seq, name, status, attempts, error, result in rows]
+
+    def status(self, job_id: str, items: bool = False) -> Optional[Dict[str, Any]]:
+        job = self.job_row(job_id)
+        if job is None:
+            return None
+        counts = self.counts(job_id)
+        out = {"job_id": job_id, "status": job["status"], "total": job["total"], "done": counts.get("done", 0),
+               "failed": counts.get("failed", 0), "running": counts.get("running", 0), "queued": counts.get("queued", 0),
+               "skipped": json.loads(job["skipped"]), "created": job["created"], "updated": job["updated"]}
+        if job["archive"]:
+            out["archive_url"] = f"/files/{job['archive']}"
+        if items:
+            out["items"] = [{k: v for k, v in it.items() if k != "result"} | self._public(it["result"]) for it in self.items(job_id)]
+        return out
+
+    @staticmethod
+    def _public(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Export paths are internal; the archive holds the files
+        return {k: v for k, v in (result or {}).items() if k != "exports"}
+
+    def claim_finalize(self, job_id: str) -> bool:
+        # True for exactly one caller once every item of a running job has finished
+        with self._lock:
+            pending = self._db.execute("SELECT COUNT(*) FROM items WHERE job = ? AND status IN ('queued', 'running')", (job_id,)).fetchone()[0]
+            if pending:
+                return False
+            return self._db.execute("UPDATE jobs SET status = 'archiving', updated = ? WHERE id = ? AND status = 'running'",
+                                    (time.time(), job_id)).rowcount == 1
+
+    def set_done(self, job_id: str, archive: Optional[str]):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = 'done', archive = ?, updated = ? WHERE id = ?", (archive, time.time(), job_id))
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            if self._db.execute("UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ? AND status IN ('queued', 'running')",
+                                (time.time(), job_id)).rowcount == 0:
+                return False
+            self._db.execute("UPDATE items SET status = 'cancelled' WHERE job = ? AND status = 'queued'", (job_id,))
+        return True
+
+    def unfinished(self) -> List[str]:
+        # Jobs whose last item finished without the job being archived (or cleaned up, if cancelled): a worker
+        # died in between, an item was given up on in claim(), or an archive build was interrupted
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = 'running' WHERE status = 'archiving' AND updated < ?", (time.time() - LEASE_SECONDS,))
+            rows = self._db.execute("SELECT id, status FROM jobs WHERE status IN ('running', 'cancelled') AND id NOT IN "
+                                    "(SELECT job FROM items WHERE status IN ('queued', 'running'))").fetchall()
+        return [job_id for job_id, status in rows if status == "running" or os.path.isdir(self.workdir(job_id))]
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        with self._lock:
+            ids = [r[0] for r in self._db.execute("SELECT id FROM jobs WHERE status IN ('done', 'cancelled') AND updated < ?",
+                                                  (now - JOB_TTL,)).fetchall()]
+            self._db.executemany("DELETE FROM items WHERE job = ?", [(i,) for i in ids])
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+        for job_id in ids:
+            shutil.rmtree(self.workdir(job_id), ignore_errors=True)
+        return ids
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            items = dict(self._db.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return {"jobs": jobs, "items": items}
+
+def _safe_name(name: str) -> str:
+    base = os.path.basename(name.replace("\\", "/"))
+    return "".join(c if c.isalnum() or c in "._- " else "_" for c in base).strip() or "resume"
+
+def _copy(src, dst_path: str, budget: int) -> Tuple[int, str]:
+    # Streams src into dst_path, hashing as it goes; raises JobError past `budget` bytes (zip bombs, oversized files)
+    h, size = hashlib.sha256(), 0
+    with open(dst_path, "wb") as out:
+        while True:
+            chunk = src.read(UPLOAD_CHUNK)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > budget:
+                raise JobError(f"input exceeds {budget} bytes")
+            h.update(chunk)
+            out.write(chunk)
+    return size, h.hexdigest()
+
+def stage_inputs(store: JobStore, job_id: str, uploads: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str, str]], List[str]]:
+    # uploads: (filename, spooled path). Zips are expanded; unsupported entries are reported as skipped.
+    # Returns ([(filename, path, sha256)], skipped) with every path inside the job's workdir.
+    in_dir = os.path.join(store.workdir(job_id), "in")
+    os.makedirs(in_dir, exist_ok=True)
+    inputs: List[Tuple[str, str, str]] = []
+    skipped: List[str] = []
+    total = 0
+
+    def add(name: str, src) -> None:
+        nonlocal total
+        if len(inputs) >= JOB_MAX_ITEMS:
+            raise JobError(f"more than {JOB_MAX_ITEMS} files")
+        path = os.path.join(in_dir, f"{len(inputs):05d}-{_safe_name(name)}")
+        size, digest = _copy(src, path, min(MAX_UPLOAD_BYTES, JOB_MAX_BYTES - total))
+        total += size
+        inputs.append((os.path.basename(name), path, digest))
+
+    try:
+        for filename, spooled in uploads:
+            ext = os.path.splitext(filename or "")[1].lower()
+            if ext == ".zip":
+                try:
+                    zf = zipfile.ZipFile(spooled)
+                except zipfile.BadZipFile:
+                    raise JobError(f"{filename}: not a valid zip archive")
+                with zf:
+                    for info in zf.infolist():
+                        name = info.filename
+                        if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                            continue
+                        if os.path.splitext(name)[1].lower() not in SUPPORTED:
+                            skipped.append(name)
+                            continue
+                        with zf.open(info) as src:
+                            add(name, src)
+            elif ext in SUPPORTED:
+                with open(spooled, "rb") as src:
+                    add(filename, src)
+            else:
+                skipped.append(filename or "")
+    except BaseException:
+        shutil.rmtree(store.workdir(job_id), ignore_errors=True)
+        raise
+    return inputs, skipped
+
+def submit(store: JobStore, jd: JobDescription, uploads: List[Tuple[str, str]]) -> str:
+    job_id = secrets.token_hex(8)
+    inputs, skipped = stage_inputs(store, job_id, uploads)
+    if not inputs:
+        shutil.rmtree(store.workdir(job_id), ignore_errors=True)
+        raise JobError(f"no PDF, DOCX or TXT files found (skipped: {len(skipped)})")
+    store.create(job_id, jd, inputs, skipped)
+    return job_id
+
+def build_archive(store: JobStore, job_id: str) -> str:
+    # results.json + summary.csv + exports/<seq>-<file>.{docx,pdf}, written to the artifact store; returns its name
+    items = store.items(job_id)
+    path = os.path.join(store.workdir(job_id), "results.zip")
+    rows = io.StringIO()
+    writer = csv.writer(rows)
+    writer.writerow(["seq", "filename", "status", "name", "required", "preferred", "gaps", "error"])
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for it in items:
+            result = it["result"] or {}
+            stem = os.path.splitext(_safe_name(it["filename"]))[0]
+            for fmt, export in (result.get("exports") or {}).items():
+                if os.path.exists(export):
+                    zf.write(export, f"exports/{it['seq']:05d}-{stem}.{fmt}", compress_type=zipfile.ZIP_STORED)  # already compressed
+            cov = result.get("coverage") or {}
+            writer.writerow([it["seq"], it["filename"], it["status"], result.get("name", ""), cov.get("required", ""),
+                             cov.get("preferred", ""), len(result.get("gaps") or []), it["error"] or ""])
+        zf.writestr("summary.csv", rows.getvalue())
+        zf.writestr("results.json", json.dumps({"job": store.status(job_id), "items": [it | {"result": store._public(it["result"])} for it in items]}, indent=1))
+    with open(path, "rb") as f:
+        art = get_artifacts().put_stream(iter(lambda: f.read(UPLOAD_CHUNK), b""), "zip", key=f"job:{job_id}", content_type="application/zip")
+    return art.name
+
+class JobRunner:
+    # Feeds claimed items to a bounded pool (separate from the interactive one, so bulk jobs never starve
+    # /parse or /export) and archives each job when its last item finishes.
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, mode: str = WORKER_MODE):
+        self.store = store
+        self.workers = workers
+        self.pool = WorkerPool(mode=mode, workers=workers, max_pending=workers, timeout=JOB_ITEM_TIMEOUT)
+        self.owner = f"{os.getpid()}:{secrets.token_hex(4)}"
+        self.tasks: set = set()
+        self._wake: Optional[asyncio.Event] = None
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _process(self, item: Item):
+        # SQLite calls run in a thread: the store is shared with other app workers and may wait on their writes
+        store = self.store
+        job = await asyncio.to_thread(store.job_row, item.job)
+        restarts = self.pool.restarts
+        try:
+            if job is None or job["status"] == "cancelled":
+                await asyncio.to_thread(store.finish, item, "cancelled")
+                return
+            result = await self.pool.run(process_item, item.filename, item.path, item.digest, job["jd"],
+                                         os.path.join(store.workdir(item.job), "out"))
+            await asyncio.to_thread(store.finish, item, "done", result)
+        except BrokenProcessPool:
+            if self.pool.restarts != restarts:
+                # killed by restart() after another item timed out: not this item's fault
+                await asyncio.to_thread(store.retry, item, False)
+            else:
+                self.pool.shutdown()  # the next submit starts fresh workers
+                if item.attempts >= JOB_MAX_ATTEMPTS:
+                    await asyncio.to_thread(store.finish, item, "failed", None, "worker crashed")
+                else:
+                    await asyncio.to_thread(store.retry, item)
+        except TaskTimeout:
+            # the task keeps running in its worker; without a restart the next items would queue behind it
+            self.pool.restart()
+            await asyncio.to_thread(store.finish, item, "failed", None, f"timed out after {JOB_ITEM_TIMEOUT:g}s")
+        except Exception as e:  # one bad file never fails the job
+            await asyncio.to_thread(store.finish, item, "failed", None, f"{type(e).__name__}: {e}")
+        await self.finalize(item.job)
+
+    async def finalize(self, job_id: str):
+        store = self.store
+        job = await asyncio.to_thread(store.job_row, job_id)
+        if job is not None and job["status"] == "cancelled":
+            if not (await asyncio.to_thread(store.counts, job_id)).get("running"):
+                shutil.rmtree(store.workdir(job_id), ignore_errors=True)
+            return
+        if not await asyncio.to_thread(store.claim_finalize, job_id):
+            return
+        try:
+            name = await asyncio.to_thread(build_archive, store, job_id)
+        except Exception:
+            await asyncio.to_thread(store.set_done, job_id, None)
+            raise
+        else:
+            await asyncio.to_thread(store.set_done, job_id, name)
+        shutil.rmtree(store.workdir(job_id), ignore_errors=True)  # inputs and exports now live in the archive
+
+    async def recover(self):
+        # Periodic housekeeping: expired jobs, items whose leases ran out too often, jobs left unarchived
+        await asyncio.to_thread(self.store.expire)
+        await asyncio.to_thread(self.store.expire_leases)
+        for job_id in await asyncio.to_thread(self.store.unfinished):
+            await self.finalize(job_id)
+
+    async def run(self, until_idle: bool = False):
+        self._wake = asyncio.Event()
+        await self.recover()
+        recovered = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() - recovered > JOB_RECOVER_INTERVAL:
+                    await self.recover()
+                    recovered = time.monotonic()
+                claimed = await asyncio.to_thread(self.store.claim, self.workers - len(self.tasks), self.owner)
+                for item in claimed:
+                    task = asyncio.create_task(self._process(item))
+                    self.tasks.add(task)
+                    task.add_done_callback(self._done)
+                if until_idle and not claimed and not self.tasks:
+                    return
+                if not claimed:
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            for task in list(self.tasks):
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.store.release(self.owner)
+
+    def _done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        self.wake()
+
+    async def events(self, job_id: str) -> AsyncIterator[str]:
+        # NDJSON progress: one line per change, ending with the final state
+        last = None
+        while True:
+            snap = await asyncio.to_thread(self.store.status, job_id)
+            if snap is None:
+                return
+            key = (snap["status"], snap["done"], snap["failed"], snap["running"])
+            if key != last:
+                last = key
+                yield json.dumps(snap) + "\n"
+            if snap["status"] in FINISHED:
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+_runner: Optional[JobRunner] = None
+
+def get_jobs() -> JobRunner:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(JobStore())
+    return _runner
@@ -0,0 +1,249 @@
+import hashlib, json, os, secrets, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models import Resume, JobDescription, JobPackage, Settings, Alignment, EditItem
+from .alignment import compute_alignment, coverage_scores
+from .ats import ats_check
+from .cache import CACHE_DIR
+from .incremental import IncrementalAligner, diff_snapshots
+from .optimizer import rewrite_bullets, build_tailored_resume
+
+PACKAGE_STORE = os.getenv("PACKAGE_STORE", "memory")  # memory | disk (shared by all app workers)
+PACKAGE_TTL = float(os.getenv("PACKAGE_TTL", "3600"))  # seconds since last use
+PACKAGE_MAX = int(os.getenv("PACKAGE_MAX", "1000"))    # in-memory store entries (LRU)
+
+class VersionConflict(Exception):
+    def __init__(self, current: int):
+        super().__init__(f"package is at version {current}")
+        self.current = current
+
+class PackageRecord:
+    # A JobPackage plus memoized results; `fingerprint` covers resume, JD and settings and is computed when first
+    # read after a change, `version` counts updates so clients can send edits against a known state.
+    # `pending` is an IncrementalAligner holding resume text not yet copied into the package (see PackageService.sync).
+    __slots__ = ("id", "package", "memo", "_fingerprint", "version", "pending")
+
+    def __init__(self, id: str, package: JobPackage, memo: Optional[Dict[str, Any]] = None, fingerprint: str = "",
+                 version: int = 0):
+        self.id = id
+        self.package = package
+        self.memo: Dict[str, Any] = memo or {}
+        self._fingerprint = fingerprint
+        self.version = version
+        self.pending = None
+
+    @property
+    def fingerprint(self) -> str:
+        if not self._fingerprint:
+            self._fingerprint = _fingerprint(self.package)
+        return self._fingerprint
+
+    @fingerprint.setter
+    def fingerprint(self, value: str):
+        self._fingerprint = value
+
+    def to_json(self) -> str:
+        return json.dumps({"id": self.id, "package": self.package.model_dump(mode="json"),
+                           "memo": self.memo, "fingerprint": self._fingerprint, "version": self.version})
+
+    @classmethod
+    def from_json(cls, data: str) -> "PackageRecord":
+        d = json.loads(data)
+        return cls(d["id"], JobPackage.model_validate(d["package"]), d["memo"], d["fingerprint"], d.get("version", 0))
+
+def _fingerprint(pkg: JobPackage) -> str:
+    h = hashlib.sha256()
+    for part in (pkg.resume, pkg.job_description, pkg.settings):
+        h.update(part.model_dump_json().encode("utf-8"))
+    return h.hexdigest()
+
+class MemoryPackageStore:
+    def __init__(self, ttl: float = PACKAGE_TTL, max_entries: int = PACKAGE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, PackageRecord]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pid: str) -> Optional[PackageRecord]:
+        with self._lock:
+            item = self._data.get(pid)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                del self._data[pid]
+                return None
+            self._data[pid] = (time.time() + self.ttl, item[1])
+            self._data.move_to_end(pid)
+            return item[1]
+
+    def put(self, rec: PackageRecord):
+        with self._lock:
+            self._data[rec.id] = (time.time() + self.ttl, rec)
+            self._data.move_to_end(rec.id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def replace(self, rec: PackageRecord, base_version: int):
+        # Records are shared objects here, and the version was checked by the caller in the same worker
+        self.put(rec)
+
+    def delete(self, pid: str) -> bool:
+        with self._lock:
+            return self._data.pop(pid, None) is not None
+
+class DiskPackageStore:
+    def __init__(self, path: Optional[str] = None, ttl: float = PACKAGE_TTL):
+        self.path = path or os.path.join(CACHE_DIR, "packages.sqlite3")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS packages (id TEXT PRIMARY KEY, data TEXT, expires REAL)")
+        self._puts = 0
+
+    def get(self, pid: str) -> Optional[PackageRecord]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT data FROM packages WHERE id = ? AND expires >= ?", (pid, now)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE packages SET expires = ? WHERE id = ?", (now + self.ttl, pid))
+        return PackageRecord.from_json(row[0])
+
+    def put(self, rec: PackageRecord):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO packages VALUES (?, ?, ?)", (rec.id, rec.to_json(), now + self.ttl))
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._db.execute("DELETE FROM packages WHERE expires < ?", (now,))
+
+    def replace(self, rec: PackageRecord, base_version: int):
+        # Compare-and-set on the stored version: another app worker may have edited the package since it was read
+        now = time.time()
+        with self._lock:
+            if self._db.execute("UPDATE packages SET data = ?, expires = ? WHERE id = ? AND json_extract(data, '$.version') = ?",
+                                (rec.to_json(), now + self.ttl, rec.id, base_version)).rowcount:
+                return
+            row = self._db.execute("SELECT json_extract(data, '$.version') FROM packages WHERE id = ?", (rec.id,)).fetchone()
+        raise VersionConflict(row[0] if row else -1)
+
+    def delete(self, pid: str) -> bool:
+        with self._lock:
+            return self._db.execute("DELETE FROM packages WHERE id = ?", (pid,)).rowcount > 0
+
+class PackageService:
+    # Session API over a store: create once, then reuse memoized alignment/coverage/edits/ATS by id
+    def __init__(self, store=None):
+        self.store = store if store is not None else (DiskPackageStore() if PACKAGE_STORE == "disk" else MemoryPackageStore())
+        self.stats = {"memo_hits": 0, "memo_misses": 0}
+        self._aligners: "OrderedDict[str, IncrementalAligner]" = OrderedDict()  # per-worker incremental state
+        self._lock = threading.Lock()
+
+    def create(self, resume: Resume, jd: JobDescription, settings: Optional[Settings] = None) -> PackageRecord:
+        pkg = JobPackage(resume=resume, job_description=jd, settings=settings or Settings())
+        rec = PackageRecord(secrets.token_urlsafe(12), pkg)
+        self.store.put(rec)
+        return rec
+
+    def get(self, pid: str, sync: bool = True) -> Optional[PackageRecord]:
+        rec = self.store.get(pid)
+        return self.sync(rec) if rec is not None and sync else rec
+
+    @staticmethod
+    def sync(rec: PackageRecord) -> PackageRecord:
+        # Copy text edited through edit_resume into the package; deferred so a run of edits does not
+        # rebuild the resume text on every keystroke
+        if rec.pending is not None:
+            rec.package.resume.raw_text = rec.pending.text
+            rec.pending = None
+        return rec
+
+    def update(self, rec: PackageRecord, resume: Optional[Resume] = None, jd: Optional[JobDescription] = None,
+               settings: Optional[Settings] = None) -> PackageRecord:
+        pkg = self.sync(rec).package
+        if resume is not None: pkg.resume = resume
+        if jd is not None: pkg.job_description = jd
+        if settings is not None: pkg.settings = settings
+        fp = _fingerprint(pkg)
+        if fp != rec.fingerprint:
+            rec.fingerprint, rec.memo = fp, {}
+            rec.version += 1
+            pkg.alignment, pkg.edits, pkg.report = None, [], None
+        self.store.put(rec)
+        return rec
+
+    def edit_resume(self, rec: PackageRecord, base_version: int, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Apply text edits to the package resume and return only the alignment fields that changed.
+        # Work per edit is proportional to the edit: the text is spliced in chunks, the fingerprint is recomputed
+        # when next read, and the in-memory store keeps the text in the aligner until the package is read again.
+        if base_version != rec.version:
+            raise VersionConflict(rec.version)
+        pkg = rec.package
+        with self._lock:
+            aligner = self._aligners.pop(rec.id, None)
+        if aligner is None or aligner.version != rec.version:
+            aligner = IncrementalAligner(self.sync(rec).package.resume.raw_text, pkg.job_description, rec.version)
+        before = aligner.snapshot()
+        aligner.apply(edits)
+        changes = diff_snapshots(before, aligner.snapshot())
+        rec.fingerprint, rec.memo, rec.version, rec.pending = "", {}, aligner.version, aligner
+        pkg.alignment, pkg.edits, pkg.report = None, [], None
+        if isinstance(self.store, DiskPackageStore):
+            self.store.replace(self.sync(rec), base_version)  # other workers read the text from disk
+        else:
+            self.store.replace(rec, base_version)
+        with self._lock:
+            self._aligners[rec.id] = aligner
+            while len(self._aligners) > PACKAGE_MAX:
+                self._aligners.popitem(last=False)
+        return {"version": rec.version, "changes": changes}
+
+    def delete(self, pid: str) -> bool:
+        return self.store.delete(pid)
+
+    def _memo(self, rec: PackageRecord, key: str, compute):
+        self.sync(rec)
+        if key in rec.memo:
+            self.stats["memo_hits"] += 1
+            return rec.memo[key]
+        self.stats["memo_misses"] += 1
+        rec.memo[key] = compute()
+        self.store.put(rec)
+        return rec.memo[key]
+
+    def alignment(self, rec: PackageRecord) -> Alignment:
+        pkg = self.sync(rec).package
+        if pkg.alignment is None:
+            self.stats["memo_misses"] += 1
+            pkg.alignment = compute_alignment(pkg.resume, pkg.job_description)
+            self.store.put(rec)
+        else:
+            self.stats["memo_hits"] += 1
+        return pkg.alignment
+
+    def coverage(self, rec: PackageRecord) -> Dict[str, float]:
+        return self._memo(rec, "coverage", lambda: coverage_scores(self.alignment(rec), rec.package.job_description))
+
+    def ats(self, rec: PackageRecord) -> List[Dict[str, Any]]:
+        return self._memo(rec, "ats", lambda: ats_check(rec.package.resume))
+
+    def optimize(self, rec: PackageRecord) -> Tuple[List[EditItem], Resume]:
+        pkg = self.sync(rec).package
+        alignment = self.alignment(rec)
+        if "tailored_resume" not in rec.memo:
+            pkg.edits = rewrite_bullets(pkg.resume, pkg.job_description, alignment)
+        # build_tailored_resume mutates its argument, so tailor a copy
+        tailored = self._memo(rec, "tailored_resume", lambda: build_tailored_resume(
+            pkg.resume.model_copy(deep=True), pkg.job_description, alignment).model_dump(mode="json"))
+        return pkg.edits, Resume.model_validate(tailored)
+
+_service: Optional[PackageService] = None
+
+def get_packages() -> PackageService:
+    global _service
+    if _service is None:
+        _service = PackageService()
+    return _service
@@ -1,40 +1,32 @@
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 from io import BytesIO
-from pdfminer.high_level import extract_text as pdf_extract_text
-from docx import Document
-import requests
 
 from ..models import Resume, JobDescription, JobEntities
 from ..utils.text import normalize_text
+from ..utils.timing import stage
+from .extract import extract_file, extract_text
+from .taxonomy import get_taxonomy
 
 def parse_txt_bytes(b: bytes) -> str:
-    try:
-        return normalize_text(b.decode("utf-8", errors="ignore"))
-    except Exception:
-        return normalize_text(b.decode("latin-1", errors="ignore"))
+    return extract_text("doc.txt", BytesIO(b))[0]
 
 def parse_pdf_bytes(b: bytes) -> str:
-    bio = BytesIO(b)
-    text = pdf_extract_text(bio) or ""
-    return normalize_text(text)
+    return extract_text("doc.pdf", BytesIO(b))[0]
 
 def parse_docx_bytes(b: bytes) -> str:
-    bio = BytesIO(b)
-    doc = Document(bio)
-    parts = []
-    for p in doc.paragraphs:
-        parts.append(p.text)
-    text = "\n".join(parts)
-    return normalize_text(text)
+    return extract_text("doc.docx", BytesIO(b))[0]
 
 def parse_unknown(filename: str, content: bytes) -> str:
-    name = filename.lower()
-    if name.endswith(".pdf"): return parse_pdf_bytes(content)
-    if name.endswith(".docx"): return parse_docx_bytes(content)
-    return parse_txt_bytes(content)
+    return extract_text(filename, BytesIO(content))[0]
 
 def parse_resume(filename: str, content: bytes) -> Resume:
-    text = parse_unknown(filename, content)
+    return resume_from_text(*extract_text(filename, BytesIO(content)), filename)
+
+def parse_resume_file(filename: str, path: str) -> Resume:
+    # Spooled upload on disk: pages are extracted one at a time, never the whole file in memory
+    return resume_from_text(*extract_file(filename, path), filename)
+
+def resume_from_text(text: str, meta: Dict[str, Any], filename: str) -> Resume:
     # Very naive section slicing – MVP; UI allows manual fixes
     lines = [l.strip() for l in text.split("\n") if l.strip()]
     summary = lines[0][:300] if lines else ""
@@ -46,11 +38,12 @@ def parse_resume(filename: str, content: bytes) -> Resume:
         skills={"hard":[],"soft":[],"certifications":[],"languages":[]},
         projects=[],
         raw_text=text,
-        source_meta={"filename": filename}
+        source_meta={"filename": filename, **meta}
     )
     return resume
 
 def fetch_url_text(url: str) -> str:
+    import requests  # sync fallback for library use; the API fetches through services.fetcher
     try:
         r = requests.get(url, timeout=10)
         r.raise_for_status()
@@ -64,32 +57,43 @@ def parse_jd(
     if url:
         raw = fetch_url_text(url)
     elif content:
-        raw = parse_unknown(filename, content)
+        raw, meta = extract_text(filename, BytesIO(content))
+        return jd_from_text(raw, filename, meta)
     else:
         raw = normalize_text(text_input or "")
+    return jd_from_text(raw, filename or url)
+
+def parse_jd_file(filename: str, path: str) -> JobDescription:
+    raw, meta = extract_file(filename, path)
+    return jd_from_text(raw, filename, meta)
 
-    # Naive extraction: split lines, gather likely skills/tools keywords by simple heuristics
+def jd_from_text(raw: str, source: str = "jd.txt", meta: Optional[Dict[str, Any]] = None) -> JobDescription:
+    # `raw` must already be normalized (see normalize_text)
+    # Taxonomy scan over the full JD (single pass, independent of taxonomy size)
+    with stage("taxonomy"):
+        found = get_taxonomy().extract(raw)
     entities = JobEntities(
-        required_skills=[],
+        # Tools count toward required coverage too, as the keyword heuristic this replaced did (AWS, Docker, ...)
+        required_skills=list(dict.fromkeys([*found["skills"], *found["tools"]])),
         preferred_skills=[],
         responsibilities=[],
-        tools=[],
-        certifications=[],
+        tools=found["tools"],
+        certifications=found["certifications"],
         domains=[],
         keywords=[]
     )
-    # Heuristic: collect words that look like tools/skills
-    for token in set(raw.split()[:500]):
-        if any(ch.isdigit() for ch in token):  # e.g., ISO27001, SOC2, etc.
-            entities.keywords.append(token.strip(",.;:"))
-        if token.lower() in {"python","sql","node.js","nodejs","aws","gcp","azure","docker","kubernetes","snowflake"}:
-            entities.required_skills.append(token)
+    # Heuristic: canonical matches plus codes that carry digits (e.g., ISO27001, SOC2, etc.)
+    keywords = dict.fromkeys([*found["skills"], *found["tools"], *found["certifications"]])
+    for token in raw.split():
+        if any(ch.isdigit() for ch in token):
+            keywords.setdefault(token.strip(",.;:"), None)
+    entities.keywords = list(keywords)
 
     jd = JobDescription(
         title="",
         company="",
         entities=entities,
         raw_text=raw,
-        source_meta={"filename": filename or url}
+        source_meta={"filename": source, **(meta or {})}
     )
     return jd
@@ -0,0 +1,63 @@
+import hashlib, os
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List
+
+from ..models import Alignment
+from .cache import CACHE_DIR
+
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", os.path.join(os.path.dirname(__file__), "..", "templates"))
+RENDER_CHUNK_BYTES = int(os.getenv("RENDER_CHUNK_BYTES", str(16 * 1024)))
+TEMPLATES = ("report.html.j2", "cover_letter.txt.j2")
+AUTOESCAPE = ("html", "html.j2")
+
+@lru_cache(maxsize=1)
+def get_env() -> "Environment":
+    # Templates are compiled once per process; the bytecode cache lets other workers skip the compile step
+    # (escaping is baked into the bytecode, so the autoescape setting is part of the cache file name)
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined, select_autoescape
+    bcc_dir = os.path.join(CACHE_DIR, "jinja")
+    os.makedirs(bcc_dir, exist_ok=True)
+    tag = hashlib.sha256(repr(AUTOESCAPE).encode()).hexdigest()[:8]
+    return Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(AUTOESCAPE, default_for_string=False, default=False),
+        bytecode_cache=FileSystemBytecodeCache(bcc_dir, f"__jinja2_{tag}_%s.cache"),
+        auto_reload=False,
+        undefined=StrictUndefined,
+        keep_trailing_newline=True,
+    )
+
+def warm_templates() -> List[str]:
+    env = get_env()
+    for name in TEMPLATES:
+        env.get_template(name)
+    return list(TEMPLATES)
+
+def get_template(name: str) -> "Template":
+    return get_env().get_template(name)  # Environment caches compiled templates by name
+
+def encode_chunks(parts: Iterable[str], size: int = RENDER_CHUNK_BYTES) -> Iterator[bytes]:
+    # Coalesce the template's many small string pieces into ~size byte chunks
+    buf: List[bytes] = []
+    n = 0
+    for part in parts:
+        b = part.encode("utf-8")
+        buf.append(b)
+        n += len(b)
+        if n >= size:
+            yield b"".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield b"".join(buf)
+
+def stream(name: str, **ctx: Any) -> Iterator[bytes]:
+    return encode_chunks(get_template(name).generate(**ctx))
+
+def report_context(alignment: Alignment, coverage: Dict[str, float]) -> Dict[str, Any]:
+    # Plain data only, so the same context feeds the HTML template and the PDF renderer in a worker process
+    return {
+        "generated": datetime.utcnow().isoformat() + "Z",
+        "coverage": dict(coverage),
+        "gaps": [{"term": g["term"], "reason": g["reason"]} for g in alignment.gaps],
+    }
@@ -0,0 +1,114 @@
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+
+from ..models import Resume, ResponsibilityCoverage
+from ..utils.text import tokenize
+from .analysis import analyze
+
+K1, B = 1.2, 0.75
+EVIDENCE_TOP = 3
+STOPWORDS = frozenset("""a an and are as at be by for from has have in into is it its of on or our that the their this
+to was we were will with you your across within using use including etc""".split())
+_SUFFIXES = ("ies", "ied", "ing", "ed", "es", "s")
+_VOWELS = frozenset("aeiouy")
+
+@lru_cache(maxsize=65536)
+def _stem(t: str) -> str:
+    # Light inflection stemmer so that use/uses/using/used and manage/managed/managing meet: strip one suffix
+    # (ing/ed only when a vowel stays, as in Porter's rule; never the "ed" of need), undouble a final consonant
+    # (running -> run), then drop a final "e"
+    for suf in _SUFFIXES:
+        if not t.endswith(suf):
+            continue
+        stem = t[:-len(suf)]
+        if suf in ("ing", "ed"):
+            if len(stem) < 2 or not _VOWELS.intersection(stem) or t.endswith("eed"):
+                break
+            if stem[-1] == stem[-2] and stem[-1] not in "aeiouls":
+                stem = stem[:-1]
+        elif suf in ("ies", "ied"):
+            stem += "y"
+        elif len(stem) < 3 or t.endswith("ss"):
+            continue
+        t = stem
+        break
+    if len(t) >= 3 and t.endswith("e") and not t.endswith("ee"):
+        t = t[:-1]
+    return t
+
+def _terms(text: str) -> List[str]:
+    out = []
+    for t in tokenize(text):
+        t = t.strip(".-")
+        if not t or t in STOPWORDS: continue
+        out.append(_stem(t))
+    return out
+
+def resume_units(resume: Resume) -> Tuple[Tuple[str, str], ...]:
+    # Experience bullets when the resume is structured, otherwise sentences/bullets of raw_text
+    bullets = [(b.id, b.text) for e in resume.experience for b in e.bullets if b.text.strip()]
+    if bullets:
+        return tuple(bullets)
+    return tuple((f"s{i+1}", p) for i, p in enumerate(analyze(resume.raw_text or "").sentence_texts()))
+
+class BM25Index:
+    # Sentence x term BM25 weight matrix built once per resume; queries are scored with one matrix product
+    __slots__ = ("ids", "vocab", "weights", "present", "idf", "idf_absent")
+
+    def __init__(self, units: Tuple[Tuple[str, str], ...]):
+        self.ids = [uid for uid, _ in units]
+        docs = [Counter(_terms(text)) for _, text in units]
+        self.vocab: Dict[str, int] = {}
+        for d in docs:
+            for t in d:
+                self.vocab.setdefault(t, len(self.vocab))
+        n, v = len(docs), len(self.vocab)
+        tf = np.zeros((n, v), dtype=np.float32)
+        for i, d in enumerate(docs):
+            if d:
+                tf[i, [self.vocab[t] for t in d]] = list(d.values())
+        lengths = tf.sum(axis=1)
+        avgdl = float(lengths.mean()) if n else 0.0
+        df = (tf > 0).sum(axis=0)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self.idf_absent = float(np.log(1.0 + (n + 0.5) / 0.5))
+        norm = K1 * (1 - B + B * lengths / (avgdl or 1.0))
+        self.weights = (tf * (K1 + 1) / (tf + norm[:, None])) * self.idf  # (sentences, terms)
+        self.present = (tf > 0).astype(np.float32)
+
+    def match(self, queries: List[str]) -> List[ResponsibilityCoverage]:
+        if not queries:
+            return []
+        q = np.zeros((len(queries), len(self.vocab)), dtype=np.float32)
+        total_idf = np.zeros(len(queries), dtype=np.float32)
+        for i, query in enumerate(queries):
+            for t in set(_terms(query)):
+                col = self.vocab.get(t)
+                if col is None:
+                    total_idf[i] += self.idf_absent
+                else:
+                    q[i, col] = 1.0
+                    total_idf[i] += self.idf[col]
+        if not self.ids:
+            return [ResponsibilityCoverage(jd_item=r, evidence_ids=[], coverage=0.0) for r in queries]
+        scores = q @ self.weights.T                     # BM25, (queries, sentences)
+        overlap = (q * self.idf) @ self.present.T      # idf mass of query terms present in each sentence
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :EVIDENCE_TOP]
+        rows = np.arange(len(queries))
+        best = top[:, 0]
+        best_scores = scores[rows, best]
+        cov = np.where((best_scores > 0) & (total_idf > 0), overlap[rows, best] / np.maximum(total_idf, 1e-9), 0.0)
+        cov = np.minimum(1.0, cov)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        return [ResponsibilityCoverage(jd_item=r, evidence_ids=[self.ids[j] for j, sc in zip(top[i], top_scores[i]) if sc > 0],
+                                       coverage=float(f"{cov[i]:.2f}"))
+                for i, r in enumerate(queries)]
+
+@lru_cache(maxsize=64)
+def bm25_index(units: Tuple[Tuple[str, str], ...]) -> BM25Index:
+    return BM25Index(units)
+
+def match_responsibilities(resume: Resume, responsibilities: List[str]) -> List[ResponsibilityCoverage]:
+    return bm25_index(resume_units(resume)).match(list(responsibilities))
@@ -0,0 +1,102 @@
+import json, os
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
+
+TAXONOMY_PATH = os.getenv("TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "taxonomy.json"))
+CATEGORIES = ("skills", "tools", "certifications")
+
+class AhoCorasick:
+    # Multi-pattern automaton: one left-to-right pass over the text finds every pattern occurrence,
+    # so scan cost depends on text length (plus matches), not on how many patterns are loaded.
+    __slots__ = ("_goto", "_fail", "_out")
+
+    def __init__(self, patterns: Dict[str, Any]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[Tuple[int, Any]]] = [[]]
+        for pat, payload in patterns.items():
+            node = 0
+            for ch in pat:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append((len(pat), payload))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            r = queue.popleft()
+            for ch, s in goto[r].items():
+                queue.append(s)
+                f = fail[r]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[s] = goto[f].get(ch, 0)
+                out[s] = out[s] + out[fail[s]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in out[node]:
+                yield i - length + 1, i + 1, payload
+
+SHORT_ALIAS = 3  # letters-only aliases up to this long are acronyms that collide with words ("ts", "ml", "qa")
+
+def _surface(term: str) -> str:
+    return " ".join(term.lower().split())
+
+def _cased(alias: str):
+    # Exact spellings a short alias must appear in: all capitals, or as written when the taxonomy gives a
+    # mixed-case form ("iOS", "IaC"). Other terms match case-insensitively (None).
+    if len(alias) > SHORT_ALIAS or not alias.isalpha():
+        return None
+    return frozenset({alias.upper(), alias} if alias != alias.lower() else {alias.upper()})
+
+class Taxonomy:
+    def __init__(self, data: Dict[str, Any]):
+        self.version = data.get("version", 0)
+        skip = {_surface(a) for a in data.get("ambiguous", [])}
+        # Names that are also everyday words ("react quickly", "spring hiring") match only capitalized as listed, or in capitals
+        cased = {_surface(t): frozenset({t, t.upper()}) for t in data.get("cased", [])}
+        patterns: Dict[str, Tuple[str, str, Any]] = {}
+        for cat in CATEGORIES:
+            for canonical, aliases in (data.get(cat) or {}).items():
+                for i, term in enumerate([canonical, *aliases]):
+                    s = _surface(term)
+                    if s and s not in skip:
+                        patterns.setdefault(s, (canonical, cat, cased.get(s) or (_cased(term) if i else None)))
+        self.size = len(patterns)
+        self._matcher = AhoCorasick(patterns)
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        # Leftmost-longest, whole-word matches; canonical names in order of first appearance
+        original, text = text, text.lower()
+        n = len(text)
+        aligned = len(original) == n  # lower() can change the length of some non-ASCII text
+        hits = sorted(self._matcher.finditer(text), key=lambda h: (h[0], h[0] - h[1]))
+        found: Dict[str, Dict[str, None]] = {cat: {} for cat in CATEGORIES}
+        last_end = 0
+        for start, end, (canonical, cat, cased) in hits:
+            if start < last_end: continue
+            if start > 0 and text[start-1].isalnum(): continue
+            if end < n and text[end].isalnum(): continue
+            if cased is not None and not (aligned and original[start:end] in cased): continue
+            found[cat][canonical] = None
+            last_end = end
+        return {cat: list(v) for cat, v in found.items()}
+
+def load_taxonomy(path: str = TAXONOMY_PATH) -> Taxonomy:
+    with open(path, "r", encoding="utf-8") as f:
+        return Taxonomy(json.load(f))
+
+@lru_cache(maxsize=1)
+def get_taxonomy() -> Taxonomy:
+    return load_taxonomy()
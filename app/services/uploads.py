@@ -0,0 +1,163 @@
+import asyncio, hashlib, os, re, tempfile
+from typing import AsyncGenerator, Optional, Tuple
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.routing import APIRoute
+from starlette.formparsers import MultiPartParser, MultiPartException
+
+from .cache import CACHE_DIR
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(CACHE_DIR, "uploads"))
+UPLOAD_CHUNK = 1024 * 1024
+FORM_OVERHEAD = 64 * 1024  # multipart boundaries, part headers and text fields on top of the file bytes
+
+PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+
+class UploadTooLarge(Exception):
+    pass
+
+class SpoolFile:
+    # File part written straight into UPLOAD_DIR while the multipart body is parsed, hashed and size-checked
+    # as each chunk arrives, so an upload is stored once and rejected as soon as it passes the limit.
+    # Removed when the form is closed at the end of the request.
+    def __init__(self, filename: str, max_bytes: int):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        ext = os.path.splitext(filename or "")[1].lower()
+        fd, self.name = tempfile.mkstemp(prefix="upload-", suffix=ext, dir=UPLOAD_DIR)
+        self._f = os.fdopen(fd, "w+b")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        self.sha256.update(data)
+        return self._f.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._f.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+        discard(self.name)
+
+class SpoolingMultiPartParser(MultiPartParser):
+    # Starlette's parser keeps file parts in a 1 MB SpooledTemporaryFile that then rolls over to an
+    # anonymous temp file; parts go to a SpoolFile instead so spool_upload can hand out the path as is
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            self._files_to_close_on_error.pop().close()
+            upload.file = SpoolFile(upload.filename or "", MAX_UPLOAD_BYTES)
+            self._files_to_close_on_error.append(upload.file)
+
+async def _limited(stream: AsyncGenerator[bytes, None], limit: int) -> AsyncGenerator[bytes, None]:
+    # Chunked bodies carry no Content-Length, so the total is also counted while the body is read
+    total = 0
+    async for chunk in stream:
+        total += len(chunk)
+        if total > limit:
+            raise UploadTooLarge(f"Request body exceeds {limit} bytes")
+        yield chunk
+
+class UploadRequest(Request):
+    body_limit = MAX_UPLOAD_BYTES + FORM_OVERHEAD
+
+    async def _get_form(self, *, max_files=1000, max_fields=1000):
+        if self._form is not None or not self.headers.get("content-type", "").startswith("multipart/form-data"):
+            return await super()._get_form(max_files=max_files, max_fields=max_fields)
+        parser = SpoolingMultiPartParser(self.headers, _limited(self.stream(), self.body_limit),
+                                         max_files=max_files, max_fields=max_fields)
+        try:
+            self._form = await parser.parse()
+        except MultiPartException as e:
+            raise HTTPException(status_code=400, detail=e.message)
+        except UploadTooLarge as e:
+            for f in parser._files_to_close_on_error:
+                await asyncio.to_thread(f.close)
+            raise HTTPException(status_code=413, detail=str(e))
+        return self._form
+
+class UploadRoute(APIRoute):
+    # Route class for endpoints that take files (app.router.route_class / APIRouter(route_class=...)):
+    # multipart bodies larger than body_limit() are refused from Content-Length before any of the body is
+    # read, and file parts are spooled once, by SpoolingMultiPartParser
+    def body_limit(self) -> int:
+        return MAX_UPLOAD_BYTES + FORM_OVERHEAD
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def upload_handler(request: Request):
+            limit = self.body_limit()
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                length = request.headers.get("content-length", "")
+                if length.isdigit() and int(length) > limit:
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {limit} bytes")
+                request = UploadRequest(request.scope, request.receive)
+                request.body_limit = limit
+            return await handler(request)
+
+        return upload_handler
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None) -> Tuple[str, str]:
+    # Returns (path, sha256 hex) of the upload on disk. Parts parsed by an UploadRoute are already spooled
+    # and hashed, and their file lives until the request ends; anything else is copied to a private temp
+    # file in fixed-size chunks, hashing as it streams. The caller removes the file (see discard).
+    max_bytes = max_bytes if max_bytes is not None else MAX_UPLOAD_BYTES
+    if isinstance(file.file, SpoolFile):
+        if file.file.size > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        await asyncio.to_thread(file.file.flush)
+        return file.file.name, file.file.sha256.hexdigest()
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=ext, dir=UPLOAD_DIR)
+    h, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                h.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        discard(path)
+        raise
+    return path, h.hexdigest()
+
+def discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def pdf_page_estimate(path: str) -> int:
+    # Counts page objects without parsing the PDF; pages inside compressed object streams are missed, so
+    # this is a lower bound used only for admission cost
+    n, tail = 0, b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(UPLOAD_CHUNK)
+            if not chunk:
+                break
+            buf = tail + chunk
+            n += sum(1 for m in PDF_PAGE_RE.finditer(buf) if m.end() > len(tail))  # matches inside `tail` were counted already
+            tail = buf[-32:]
+    return n
@@ -0,0 +1,183 @@
+import asyncio, math, os, time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from starlette.responses import JSONResponse
+
+from .metrics import ADMISSION_IN_USE, ADMISSION_QUEUE, ADMISSION_REJECTED, ADMISSION_WAIT
+from .timing import stage
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMIT_COST_BYTES = int(os.getenv("ADMIT_COST_BYTES", str(2 * 1024 * 1024)))  # one extra cost unit per this many request bytes
+ADMIT_COST_PAGES = int(os.getenv("ADMIT_COST_PAGES", "20"))                   # ... and per this many PDF pages
+
+def _limits(name: str, limit: int, queue: int, wait: float) -> Tuple[int, int, float]:
+    # ADMIT_<CLASS>_LIMIT (cost units running at once), _QUEUE (requests waiting), _WAIT (seconds before giving up)
+    prefix = f"ADMIT_{name.upper()}_"
+    return (int(os.getenv(prefix + "LIMIT", "0")) or limit, int(os.getenv(prefix + "QUEUE", str(queue))),
+            float(os.getenv(prefix + "WAIT", str(wait))))
+
+CLASSES = {
+    "light": _limits("light", 64, 256, 5),
+    "standard": _limits("standard", 8, 64, 10),
+    "heavy": _limits("heavy", os.cpu_count() or 2, 32, 15),  # PDF/DOCX parsing and rendering; matches the worker pool size
+}
+# (method, path prefix, class), first match wins; None = never queued (probes and scrapes must answer under load).
+# Progress streams and file downloads hold their ticket until the body is sent, so they would use up the light
+# class for as long as clients stay connected; they do no work worth admitting.
+ROUTES: List[Tuple[str, str, Optional[str]]] = [
+    ("GET", "/healthz", None), ("GET", "/readyz", None), ("GET", "/metrics", None),
+    ("GET", "/jobs/", None), ("GET", "/files/", None), ("HEAD", "/files/", None),
+    ("POST", "/parse/", "heavy"), ("POST", "/export/", "heavy"), ("POST", "/report", "heavy"),
+    ("POST", "/cover-letter", "heavy"),
+    ("POST", "/jobs", "standard"),  # only spools and enqueues; the items run in the job pool
+    ("POST", "/align/batch", "standard"), ("POST", "/search/", "standard"), ("POST", "/corpus/", "standard"),
+    ("POST", "/packages", "standard"), ("POST", "/profile/", "standard"),
+]
+DEFAULT_CLASS = "light"
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class Ticket:
+    __slots__ = ("cls", "cost", "started")
+
+    def __init__(self, cls: "CostClass", cost: int):
+        self.cls = cls
+        self.cost = cost
+        self.started = time.perf_counter()
+
+    def charge(self, units: int):
+        # Cost discovered after admission (e.g. page count once the upload is spooled). Never blocks this request;
+        # the units count against the class until it finishes, so later requests wait instead.
+        units = max(0, min(units, self.cls.limit - self.cost))
+        self.cost += units
+        self.cls.in_use += units
+        ADMISSION_IN_USE.set(self.cls.in_use, self.cls.name)
+
+class CostClass:
+    # Weighted FIFO semaphore with a bounded queue: `limit` cost units run at once, at most `max_queue` requests
+    # wait, each for at most `max_wait` seconds. Runs on the event loop only, so it needs no locks.
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_use = 0
+        self.waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self.service_s = 0.05  # moving average of time held, for Retry-After
+        self.stats: Dict[str, int] = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def retry_after(self) -> int:
+        return max(1, min(60, math.ceil((len(self.waiters) + 1) * self.service_s / self.limit)))
+
+    def _reject(self, reason: str):
+        self.stats[f"rejected_{reason}"] += 1
+        ADMISSION_REJECTED.inc(1, self.name, reason)
+        raise Rejected(reason, self.retry_after())
+
+    def _grant(self, cost: int) -> Ticket:
+        self.in_use += cost
+        self.stats["admitted"] += 1
+        ADMISSION_IN_USE.set(self.in_use, self.name)
+        return Ticket(self, cost)
+
+    def _fits(self, cost: int) -> bool:
+        return self.in_use + cost <= self.limit or self.in_use == 0
+
+    async def acquire(self, cost: int) -> Ticket:
+        cost = max(1, min(cost, self.limit))
+        if not self.waiters and self._fits(cost):
+            ADMISSION_WAIT.observe(0.0, self.name)
+            return self._grant(cost)
+        if len(self.waiters) >= self.max_queue:
+            self._reject("queue_full")
+        fut = asyncio.get_running_loop().create_future()
+        waiter = (cost, fut)
+        self.waiters.append(waiter)
+        self.stats["queued"] += 1
+        ADMISSION_QUEUE.set(len(self.waiters), self.name)
+        t0 = time.perf_counter()
+        try:
+            with stage("admission"):
+                return await asyncio.wait_for(fut, self.max_wait)
+        except asyncio.TimeoutError:
+            self._reject("timeout")
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():  # granted just as the client went away
+                self.release(fut.result())
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+                ADMISSION_QUEUE.set(len(self.waiters), self.name)
+            ADMISSION_WAIT.observe(time.perf_counter() - t0, self.name)
+
+    def release(self, ticket: Ticket):
+        self.in_use -= ticket.cost
+        held = time.perf_counter() - ticket.started
+        self.service_s += (held / ticket.cost - self.service_s) * 0.1
+        while self.waiters and self._fits(self.waiters[0][0]):
+            cost, fut = self.waiters.popleft()
+            if not fut.done():  # a waiter that timed out or disconnected is skipped
+                fut.set_result(self._grant(cost))
+        ADMISSION_QUEUE.set(len(self.waiters), self.name)
+        ADMISSION_IN_USE.set(self.in_use, self.name)
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, "limit": self.limit, "in_use": self.in_use, "queue": len(self.waiters),
+                "max_queue": self.max_queue, "max_wait": self.max_wait, "avg_service_ms": round(self.service_s * 1000, 2)}
+
+def estimate_cost(content_length: int = 0, pages: int = 0) -> int:
+    return 1 + content_length // ADMIT_COST_BYTES + pages // ADMIT_COST_PAGES
+
+class AdmissionController:
+    def __init__(self, classes: Dict[str, Tuple[int, int, float]] = CLASSES, routes=ROUTES):
+        self.classes = {name: CostClass(name, *limits) for name, limits in classes.items()}
+        self.routes = routes
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        for m, prefix, name in self.routes:
+            if method == m and path.startswith(prefix):
+                return name
+        return DEFAULT_CLASS
+
+    async def admit(self, name: str, cost: int) -> Ticket:
+        return await self.classes[name].acquire(cost)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"enabled": ADMISSION_ENABLED, "classes": {name: c.summary() for name, c in self.classes.items()}}
+
+admission = AdmissionController()
+
+class AdmissionMiddleware:
+    # Pure ASGI. Requests wait for their cost class before reaching the app and get 429 + Retry-After when the
+    # class queue is full or the wait runs out, so a burst of heavy requests cannot slow down the light ones.
+    # The ticket is in request.state.admission for handlers that learn the real cost later (see Ticket.charge).
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        name = self.controller.classify(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        length = next((v for k, v in scope["headers"] if k == b"content-length"), b"0")
+        try:
+            ticket = await self.controller.admit(name, estimate_cost(int(length) if length.isdigit() else 0))
+        except Rejected as e:
+            response = JSONResponse({"detail": f"Server busy ({name} requests: {e.reason.replace('_', ' ')}), retry later"},
+                                    status_code=429, headers={"Retry-After": str(e.retry_after)})
+            await response(scope, receive, send)
+            return
+        scope.setdefault("state", {})["admission"] = ticket
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ticket.cls.release(ticket)
@@ -0,0 +1,64 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .text import tokenize_spans
+
+GRAM = 3  # substrings up to this length are indexed directly; longer terms intersect trigram postings
+
+class TokenIndex:
+    # One pass over the text: token counts, char positions and a substring lookup over the vocabulary.
+    # Lets callers score many terms without re-tokenizing the document for each one.
+    __slots__ = ("n_tokens", "counts", "positions", "vocab", "_grams", "_matches")
+
+    def __init__(self, text: str = "", spans: Optional[Iterable[Tuple[str, int, int]]] = None):
+        # `spans` lets callers that already tokenized (see services.analysis) skip a second pass
+        self.counts: Dict[str, int] = {}
+        self.positions: Dict[str, List[Tuple[int, int]]] = {}
+        n = 0
+        for tok, start, end in (spans if spans is not None else tokenize_spans(text or "")):
+            n += 1
+            if tok in self.counts:
+                self.counts[tok] += 1
+                self.positions[tok].append((start, end))
+            else:
+                self.counts[tok] = 1
+                self.positions[tok] = [(start, end)]
+        self.n_tokens = n
+        self.vocab: List[str] = list(self.counts)
+        self._grams: Dict[str, Set[int]] = {}
+        for i, tok in enumerate(self.vocab):
+            for k in range(1, min(GRAM, len(tok)) + 1):
+                for j in range(len(tok) - k + 1):
+                    self._grams.setdefault(tok[j:j+k], set()).add(i)
+        self._matches: Dict[str, List[str]] = {}
+
+    def matches(self, term: str) -> List[str]:
+        # Vocabulary tokens that contain `term` as a substring (same rule as `term in token`)
+        term = term.lower()
+        if term in self._matches:
+            return self._matches[term]
+        if not term:
+            found = list(self.vocab)
+        elif len(term) <= GRAM:
+            found = [self.vocab[i] for i in self._grams.get(term, ())]
+        else:
+            postings = []
+            for j in range(len(term) - GRAM + 1):
+                ids = self._grams.get(term[j:j+GRAM])
+                if not ids:
+                    postings = []
+                    break
+                postings.append(ids)
+            if postings:
+                postings.sort(key=len)
+                cand = set(postings[0]).intersection(*postings[1:])
+                found = [self.vocab[i] for i in cand if term in self.vocab[i]]
+            else:
+                found = []
+        self._matches[term] = found
+        return found
+
+    def hits(self, term: str) -> int:
+        return sum(self.counts[t] for t in self.matches(term))
+
+    def spans(self, term: str, limit: int = 0) -> List[Tuple[int, int]]:
+        out = sorted(p for t in self.matches(term) for p in self.positions[t])
+        return out[:limit] if limit else out
@@ -0,0 +1,50 @@
+import time
+from starlette.datastructures import MutableHeaders
+
+from . import profiler
+from .metrics import IN_FLIGHT, REQUESTS, REQUEST_SECONDS, STAGE_SECONDS
+from .timing import collect_timings
+
+def server_timing(timings, total_ms: float) -> str:
+    parts = [f"{name};dur={ms:.3f}" for name, ms in timings.items()]
+    parts.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(parts)
+
+class InstrumentationMiddleware:
+    # Pure ASGI (no BaseHTTPMiddleware task/stream overhead): opens the request's stage collector, adds a
+    # Server-Timing header when the response starts, and records request/stage histograms when it ends
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        prof = profiler.SamplingProfiler().start() if profiler.wants_profile(scope) else None
+        status = 500
+        t0 = time.perf_counter()
+        IN_FLIGHT.inc(1, method)
+        with collect_timings() as timings:
+            async def send_wrapper(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(timings, (time.perf_counter() - t0) * 1000))
+                    if prof is not None:
+                        headers.append("X-Profile-Id", prof.id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - t0
+                route = getattr(scope.get("route"), "path", "unmatched")
+                IN_FLIGHT.dec(1, method)
+                REQUESTS.inc(1, method, route, str(status))
+                REQUEST_SECONDS.observe(elapsed, method, route)
+                for name, ms in timings.items():
+                    STAGE_SECONDS.observe(ms / 1000, name)
+                if prof is not None:
+                    profiler.save_profile(prof.id, prof.stop())
@@ -0,0 +1,129 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Minimal Prometheus text-format registry (counters, gauges, histograms with labels); no client library needed
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str):
+        # collectors copy running totals kept elsewhere (cache stats); for a counter they only ever grow
+        with self._lock:
+            self.values[labels] = value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {v:g}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, *labels: str):
+        self.inc(-amount, *labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self.values: Dict[Tuple[str, ...], List[float]] = {}  # per label set: bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, *labels: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0.0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self.values.items())
+        out = self.header()
+        for key, row in items:
+            cum = 0.0
+            for bound, n in zip(self.buckets, row):
+                cum += n
+                le = 'le="%g"' % bound
+                out.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cum:g}")
+            cum += row[len(self.buckets)]
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cum:g}")
+            out.append(f"{self.name}_sum{_labels(self.label_names, key)} {row[-1]:.6f}")
+            out.append(f"{self.name}_count{_labels(self.label_names, key)} {cum:g}")
+        return out
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []  # refresh gauges from live stats right before a scrape
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets or LATENCY_BUCKETS))
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        lines: List[str] = []
+        for m in self.metrics:
+            lines += m.render()
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled", ("method",))
+STAGE_SECONDS = REGISTRY.histogram("stage_duration_seconds", "Per-request time spent in each instrumented stage", ("stage",))
+PARSED_BYTES = REGISTRY.counter("parsed_bytes_total", "Bytes of uploaded documents parsed", ("kind",))
+CACHE_HIT_RATIO = REGISTRY.gauge("cache_hit_ratio", "Hit rate since start per cache", ("cache",))
+CACHE_EVENTS = REGISTRY.counter("cache_events_total", "Cache events since start (hits, misses, ...)", ("cache", "event"))
+ADMISSION_QUEUE = REGISTRY.gauge("admission_queue_depth", "Requests waiting for admission per cost class", ("cost_class",))
+ADMISSION_IN_USE = REGISTRY.gauge("admission_in_use", "Cost units currently admitted per cost class", ("cost_class",))
+ADMISSION_WAIT = REGISTRY.histogram("admission_wait_seconds", "Time requests waited for admission", ("cost_class",))
+ADMISSION_REJECTED = REGISTRY.counter("admission_rejected_total", "Requests shed with 429", ("cost_class", "reason"))
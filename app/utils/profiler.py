@@ -0,0 +1,75 @@
+import os, secrets, sys, threading, time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+# Opt-in per-request sampling profiler: with PROFILE_ENABLED=1, a request carrying `X-Profile: 1` is sampled
+# and the folded stacks (flamegraph.pl / speedscope format) are kept in memory under the returned X-Profile-Id.
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+IDLE_FRAMES = {"wait", "select", "poll", "sleep", "_wait_for_tstate_lock"}  # parked threads are not work
+# Threads that run request work besides the event loop: asyncio.to_thread, Starlette's sync endpoints and the
+# thread-mode worker/export pools. Background threads (sweeps, job runner, other profilers) are left out.
+# These threads and the loop are shared, so concurrent requests still show up in a profile.
+REQUEST_THREADS = ("asyncio_", "AnyIO worker", "worker", "export")
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        # Created on the event loop thread of the request being profiled
+        self.interval = interval
+        self.loop_thread = threading.get_ident()
+        self.id = secrets.token_hex(8)
+        self.samples: Counter = Counter()
+        self.started = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == me or frame.f_code.co_name in IDLE_FRAMES:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                name = names.get(tid, str(tid))
+                if tid != self.loop_thread and not name.startswith(REQUEST_THREADS):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        folded = "\n".join(f"{stack} {n}" for stack, n in self.samples.most_common())
+        return f"# duration_ms={(time.perf_counter() - self.started) * 1000:.1f} interval_ms={self.interval * 1000:g}\n{folded}\n"
+
+_profiles: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+
+def wants_profile(scope) -> bool:
+    return PROFILE_ENABLED and any(k == b"x-profile" and v == b"1" for k, v in scope.get("headers", ()))
+
+def save_profile(pid: str, folded: str):
+    with _lock:
+        _profiles[pid] = folded
+        while len(_profiles) > PROFILE_KEEP:
+            _profiles.popitem(last=False)
+
+def get_profile(pid: str) -> Optional[str]:
+    with _lock:
+        return _profiles.get(pid)
+
+def profile_ids() -> Dict[str, int]:
+    with _lock:
+        return {pid: len(text) for pid, text in _profiles.items()}
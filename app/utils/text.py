@@ -1,7 +1,9 @@
 import re, unicodedata
-from typing import List
+from typing import List, Tuple
 
 SAFE_BULLET = "•"
+TOKEN_RE = re.compile(r"[a-z0-9+.#-]+")
+WS_RE = re.compile(r"\s+")
 
 def normalize_text(txt: str) -> str:
     if not txt:
@@ -12,12 +14,39 @@ def normalize_text(txt: str) -> str:
     txt = re.sub(r"\s+", " ", txt).strip()
     return txt
 
+class StreamNormalizer:
+    # Chunked normalize_text: feed pieces as they arrive (pages, paragraphs, decoded blocks);
+    # the concatenated output equals normalize_text of the concatenated input for whitespace and bullets.
+    __slots__ = ("started", "pending_space")
+
+    def __init__(self):
+        self.started = False
+        self.pending_space = False
+
+    def feed(self, txt: str) -> str:
+        if not txt:
+            return ""
+        txt = unicodedata.normalize("NFKC", txt)
+        txt = txt.replace("\u2022", SAFE_BULLET).replace("*", SAFE_BULLET)
+        body = WS_RE.sub(" ", txt).strip()
+        if not body:
+            self.pending_space = self.pending_space or self.started
+            return ""
+        lead = " " if self.started and (self.pending_space or txt[0].isspace()) else ""
+        self.started = True
+        self.pending_space = txt[-1].isspace()
+        return lead + body
+
 def tokenize(txt: str) -> List[str]:
     txt = txt.lower()
     # simple tokenization
-    tokens = re.findall(r"[a-z0-9+.#-]+", txt)
+    tokens = TOKEN_RE.findall(txt)
     return tokens
 
+def tokenize_spans(txt: str) -> List[Tuple[str, int, int]]:
+    # Same tokens as tokenize(), plus (start, end) character offsets into the lowercased text
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(txt.lower())]
+
 ACTION_VERBS = [
     "led","built","automated","designed","implemented","optimized","launched","improved","delivered",
     "migrated","developed","analyzed","reduced","increased","collaborated","owned","drove"
@@ -0,0 +1,63 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    # Per-request collector; stage() calls inside the block add their elapsed ms to the returned dict.
+    # Nested collectors share the outer dict, so the instrumentation middleware sees the endpoint's stages.
+    timings = _timings.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(timings.get(name, 0.0) + (time.perf_counter() - t0) * 1000, 3)
+
+def timed(name: str) -> Callable:
+    # Decorator form of stage(); a single ContextVar lookup when no collector is active
+    def deco(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _timings.get() is None:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def traced_call(fn: Callable, *args: Any) -> Tuple[Any, Dict[str, float]]:
+    # Runs in a pool worker (thread or process), where the request's collector is not visible;
+    # the stage timings travel back with the result and are merged by merge_timings()
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        return fn(*args), timings
+    finally:
+        _timings.reset(token)
+
+def merge_timings(extra: Dict[str, float]):
+    timings = _timings.get()
+    if timings is None:
+        return
+    for name, ms in extra.items():
+        timings[name] = round(timings.get(name, 0.0) + ms, 3)
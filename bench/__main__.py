@@ -0,0 +1,65 @@
+import argparse, json, os, sys
+
+# Measure cold parses: the corpus is deterministic, so a persistent parse cache would turn later runs into cache hits
+os.environ.setdefault("PARSE_CACHE_ENABLED", "0")
+
+from .corpus import CorpusGenerator, write_corpus
+from .harness import compare, environment, format_comparison, load_json, max_rss_kb
+from .suites import load_suite, micro_suite
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench", description="Micro-benchmarks and load runs over a synthetic corpus")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--iterations", type=int, default=50, help="timed iterations per micro-benchmark")
+    ap.add_argument("--requests", type=int, default=200, help="requests per load scenario")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--quick", action="store_true", help="few iterations, for CI smoke runs")
+    ap.add_argument("--only", default="", help="run benchmarks whose name contains this string")
+    ap.add_argument("--no-micro", action="store_true")
+    ap.add_argument("--no-load", action="store_true")
+    ap.add_argument("--url", default="", help="load-test a running server instead of the in-process app")
+    ap.add_argument("--out", default="", help="write results JSON here")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--write-corpus", default="", help="only write the synthetic corpus to this directory")
+    args = ap.parse_args(argv)
+
+    if args.write_corpus:
+        print(f"wrote {len(write_corpus(args.write_corpus, seed=args.seed))} files to {args.write_corpus}")
+        return 0
+    if args.quick:
+        args.iterations, args.requests = min(args.iterations, 10), min(args.requests, 40)
+
+    gen = CorpusGenerator(args.seed)
+    results = {"meta": {**environment(), "seed": args.seed, "iterations": args.iterations,
+                        "requests": args.requests, "concurrency": args.concurrency}}
+    if not args.no_micro:
+        results["micro"] = micro_suite(gen, args.iterations, args.only)
+    if not args.no_load:
+        results["load"] = load_suite(gen, args.requests, args.concurrency, args.url, args.only)
+    results["max_rss_kb"] = max_rss_kb()
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"baseline updated: {args.baseline}", file=sys.stderr)
+        return 0
+    if os.path.exists(args.baseline):
+        rows = compare(results, load_json(args.baseline), args.tolerance)
+        print(format_comparison(rows), file=sys.stderr)
+        if any(r["regressed"] for r in rows):
+            print("performance regression against baseline", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
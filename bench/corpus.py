@@ -0,0 +1,100 @@
+import json, os, random
+from io import BytesIO
+from typing import Any, Dict, List
+
+from app.services.taxonomy import TAXONOMY_PATH
+
+# Deterministic synthetic resumes and JDs: same seed and sizes -> byte-identical TXT and same text for DOCX/PDF
+
+FILLER = ("team project customer platform service data system process quality release roadmap stakeholder "
+          "pipeline feature support migration report budget metric design review incident").split()
+TITLES = ["Software Engineer", "Data Engineer", "Backend Developer", "ML Engineer", "DevOps Engineer", "Analyst"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+VERBS = ["Led", "Built", "Automated", "Designed", "Implemented", "Optimized", "Migrated", "Reduced", "Delivered"]
+
+def _vocabulary() -> List[str]:
+    with open(TAXONOMY_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    return sorted({term for kind in ("skills", "tools") for term in data.get(kind, {})})
+
+class CorpusGenerator:
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+        self.vocab = _vocabulary()
+
+    def _rng(self, kind: str, i: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{i}")
+
+    def resume_text(self, i: int, bullets: int = 12, skill_density: float = 0.2) -> str:
+        # skill_density: probability that any bullet word is a taxonomy skill/tool
+        rng = self._rng("resume", i)
+        lines = [f"Candidate {i}", f"candidate{i}@example.com | +1 555 010 {i % 10000:04d}",
+                 f"Summary: {rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience.", "Experience"]
+        for b in range(bullets):
+            if b % 4 == 0:
+                lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} {2010 + b % 12}-{2012 + b % 12}")
+            words = [rng.choice(self.vocab) if rng.random() < skill_density else rng.choice(FILLER) for _ in range(rng.randint(8, 16))]
+            lines.append(f"• {rng.choice(VERBS)} {' '.join(words)}; improved latency by {rng.randint(5, 60)}%.")
+        lines += ["Skills", ", ".join(rng.sample(self.vocab, 10))]
+        return "\n".join(lines) + "\n"
+
+    def jd_text(self, i: int, words: int = 300, skills: int = 15) -> str:
+        rng = self._rng("jd", i)
+        wanted = rng.sample(self.vocab, skills)
+        body = [rng.choice(FILLER) for _ in range(max(words - skills, 0))]
+        for term in wanted:
+            body.insert(rng.randint(0, len(body)), term)
+        sentences = [" ".join(body[k:k + 12]).capitalize() + "." for k in range(0, len(body), 12)]
+        return f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}\nResponsibilities\n" + "\n".join(sentences) + "\n"
+
+    def render(self, text: str, fmt: str) -> bytes:
+        if fmt == "txt":
+            return text.encode("utf-8")
+        if fmt == "docx":
+            from docx import Document
+            doc = Document()
+            for line in text.splitlines():
+                doc.add_paragraph(line)
+            buf = BytesIO()
+            doc.save(buf)
+            return buf.getvalue()
+        if fmt == "pdf":
+            from reportlab.lib.pagesizes import letter
+            from reportlab.pdfgen import canvas
+            buf = BytesIO()
+            c = canvas.Canvas(buf, pagesize=letter, invariant=1)
+            text_obj = c.beginText(40, letter[1] - 50)
+            text_obj.setFont("Helvetica", 9)
+            for line in text.splitlines():
+                if text_obj.getY() < 50:
+                    c.drawText(text_obj)
+                    c.showPage()
+                    text_obj = c.beginText(40, letter[1] - 50)
+                    text_obj.setFont("Helvetica", 9)
+                text_obj.textLine(line[:120])
+            c.drawText(text_obj)
+            c.showPage()
+            c.save()
+            return buf.getvalue()
+        raise ValueError(f"Unknown format: {fmt}")
+
+    def resumes(self, n: int, fmt: str = "txt", **kw: Any) -> List[Dict[str, Any]]:
+        return [{"filename": f"resume_{i}.{fmt}", "content": self.render(self.resume_text(i, **kw), fmt)} for i in range(n)]
+
+    def jds(self, n: int, **kw: Any) -> List[str]:
+        return [self.jd_text(i, **kw) for i in range(n)]
+
+def write_corpus(out_dir: str, n: int = 20, seed: int = 42, formats=("txt", "docx", "pdf")) -> List[str]:
+    gen = CorpusGenerator(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        for doc in gen.resumes(n, fmt):
+            paths.append(os.path.join(out_dir, doc["filename"]))
+            with open(paths[-1], "wb") as f:
+                f.write(doc["content"])
+    for i, text in enumerate(gen.jds(n)):
+        paths.append(os.path.join(out_dir, f"jd_{i}.txt"))
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write(text)
+    return paths
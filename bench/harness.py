@@ -0,0 +1,93 @@
+import json, math, platform, sys, time, tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+def percentile(sorted_ms: List[float], q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    k = (len(sorted_ms) - 1) * q
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_ms[lo] + (sorted_ms[hi] - sorted_ms[lo]) * (k - lo)
+
+def summarize(samples_ms: List[float], wall_s: float, peak_kb: Optional[float] = None) -> Dict[str, Any]:
+    s = sorted(samples_ms)
+    out = {
+        "n": len(s),
+        "mean_ms": round(sum(s) / len(s), 4) if s else 0.0,
+        "p50_ms": round(percentile(s, 0.50), 4),
+        "p95_ms": round(percentile(s, 0.95), 4),
+        "p99_ms": round(percentile(s, 0.99), 4),
+        "max_ms": round(s[-1], 4) if s else 0.0,
+        "ops_per_s": round(len(s) / wall_s, 2) if wall_s > 0 else 0.0,
+    }
+    if peak_kb is not None:
+        out["peak_kb"] = round(peak_kb, 1)
+    return out
+
+def run_micro(fn: Callable[[int], Any], iterations: int, setup: Optional[Callable[[int], None]] = None,
+              warmup: int = 2) -> Dict[str, Any]:
+    # fn(i) is timed; setup(i) runs untimed before it (e.g. clearing caches so every iteration is cold).
+    # Peak memory is traced in a separate pass so tracemalloc overhead does not skew the latencies.
+    for i in range(warmup):
+        if setup: setup(i)
+        fn(i)
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        if setup: setup(i)
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    wall = time.perf_counter() - start
+    if setup: setup(0)
+    tracemalloc.start()
+    try:
+        fn(0)
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return summarize(samples, wall, peak)
+
+def max_rss_kb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else float(rss)
+
+def environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+METRICS = ("p50_ms", "p95_ms")
+GATED = ("p50_ms",)  # tail percentiles of short runs are too noisy to fail a build on; they are reported only
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25,
+            min_delta_ms: float = 0.05) -> List[Dict[str, Any]]:
+    # One row per benchmark/metric present in both runs; `regressed` when a gated metric is slower than baseline
+    # by more than `tolerance` (relative) and `min_delta_ms` (absolute, so noise on tiny benchmarks is ignored)
+    rows = []
+    for section in ("micro", "load"):
+        for name, base in baseline.get(section, {}).items():
+            cur = current.get(section, {}).get(name)
+            if cur is None:
+                continue
+            for metric in METRICS:
+                b, c = base.get(metric), cur.get(metric)
+                if not b or c is None:
+                    continue
+                ratio = c / b
+                rows.append({"benchmark": f"{section}/{name}", "metric": metric, "baseline": b, "current": c,
+                             "ratio": round(ratio, 3), "regressed": metric in GATED and ratio > 1 + tolerance and c - b > min_delta_ms})
+    return rows
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':40} {'metric':7} {'baseline':>10} {'current':>10} {'ratio':>7}"]
+    for r in rows:
+        flag = "  REGRESSION" if r["regressed"] else ""
+        lines.append(f"{r['benchmark']:40} {r['metric']:7} {r['baseline']:10.3f} {r['current']:10.3f} {r['ratio']:7.2f}{flag}")
+    return "\n".join(lines)
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
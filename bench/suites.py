@@ -0,0 +1,144 @@
+import asyncio, tempfile, time
+from typing import Any, Callable, Dict, List
+
+from app.models import Resume
+from app.services.alignment import compute_alignment
+from app.services.analysis import analyze
+from app.services.ats import ats_check
+from app.services.exporter import export_cache, export_resume_files
+from app.services.optimizer import rewrite_bullets
+from app.services.parser import parse_jd, parse_resume
+from app.services.responsibility import bm25_index
+from app.utils.fastjson import dumps, dumps_std
+from app.utils.text import normalize_text, tokenize
+from app.schemas import OptimizeResponse
+
+from .corpus import CorpusGenerator
+from .harness import run_micro, summarize
+
+def clear_caches(_: int = 0):
+    # Memoized analysis/index/export results would otherwise turn every iteration after the first into a cache hit
+    analyze.cache_clear()
+    bm25_index.cache_clear()
+    with export_cache._lock:
+        export_cache.items.clear()
+        export_cache.used = 0
+
+def micro_suite(gen: CorpusGenerator, iterations: int, only: str = "") -> Dict[str, Dict[str, Any]]:
+    docs = 8
+    texts = [gen.resume_text(i, bullets=24) for i in range(docs)]
+    files = {fmt: gen.resumes(docs, fmt, bullets=24) for fmt in ("txt", "docx", "pdf")}
+    jd_texts = gen.jds(docs, words=400)
+    resumes = [parse_resume(d["filename"], d["content"]) for d in files["txt"]]
+    jds = [parse_jd(text_input=t) for t in jd_texts]
+    alignments = [compute_alignment(r, j) for r, j in zip(resumes, jds)]
+    out_tmp = tempfile.TemporaryDirectory(prefix="bench-export-")  # removed once the cases have run
+    out_dir = out_tmp.name
+    # ~50 KB /optimize-style response: the old path (model_dump + stdlib json) vs pydantic-core straight to bytes
+    payloads = [OptimizeResponse(edits=rewrite_bullets(r, j, a), tailored_resume=r.model_copy(update={"raw_text": r.raw_text * 8}))
+                for r, j, a in zip(resumes, jds, alignments)]
+
+    cases: Dict[str, Callable[[int], Any]] = {
+        "normalize_text": lambda i: normalize_text(texts[i % docs] * 20),
+        "tokenize": lambda i: tokenize(texts[i % docs] * 20),
+        "parse_resume_txt": lambda i: parse_resume(files["txt"][i % docs]["filename"], files["txt"][i % docs]["content"]),
+        "parse_resume_docx": lambda i: parse_resume(files["docx"][i % docs]["filename"], files["docx"][i % docs]["content"]),
+        "parse_resume_pdf": lambda i: parse_resume(files["pdf"][i % docs]["filename"], files["pdf"][i % docs]["content"]),
+        "parse_jd": lambda i: parse_jd(text_input=jd_texts[i % docs]),
+        "compute_alignment": lambda i: compute_alignment(resumes[i % docs], jds[i % docs]),
+        "ats_check": lambda i: ats_check(resumes[i % docs]),
+        "rewrite_bullets": lambda i: rewrite_bullets(resumes[i % docs], jds[i % docs], alignments[i % docs]),
+        "export_resume_files": lambda i: export_resume_files(resumes[i % docs], out_dir),
+        "serialize_std": lambda i: dumps_std(payloads[i % docs].model_dump()),
+        "serialize_fast": lambda i: dumps(payloads[i % docs]),  # what FastJSONResponse renders
+    }
+    slow = {"parse_resume_pdf", "parse_resume_docx", "export_resume_files"}
+    results = {}
+    with out_tmp:
+        for name, fn in cases.items():
+            if only and only not in name:
+                continue
+            n = max(iterations // 4, 3) if name in slow else iterations
+            results[name] = run_micro(fn, n, setup=clear_caches)
+    return results
+
+async def _load(client, requests: List[Callable], concurrency: int) -> Dict[str, Any]:
+    sem = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    errors = rejected = 0
+
+    async def one(make):
+        nonlocal errors, rejected
+        async with sem:
+            t0 = time.perf_counter()
+            r = await make(client)
+            samples.append((time.perf_counter() - t0) * 1000)
+            if r.status_code == 429:
+                rejected += 1  # shed by admission control; latency still counted
+            elif r.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(make) for make in requests))
+    out = summarize(samples, time.perf_counter() - start)
+    out["errors"] = errors
+    out["rejected"] = rejected
+    out["concurrency"] = concurrency
+    return out
+
+async def load_suite_async(gen: CorpusGenerator, requests: int, concurrency: int, url: str = "", only: str = "") -> Dict[str, Dict[str, Any]]:
+    # End-to-end through the HTTP stack: in-process via ASGI by default, or a running server with `url`
+    import httpx
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    docs = 16
+    resumes = [Resume(raw_text=normalize_text(gen.resume_text(i))).model_dump() for i in range(docs)]
+    jds = [parse_jd(text_input=t).model_dump() for t in gen.jds(docs)]
+    uploads = gen.resumes(requests, "txt")  # distinct content per request, so the parse cache never hits
+    scenarios = {
+        "healthz": lambda i: (lambda c: c.get("/healthz")),
+        "align": lambda i: (lambda c: c.post("/align", json={"resume": resumes[i % docs], "job_description": jds[i % docs]})),
+        "ats_check": lambda i: (lambda c: c.post("/ats/check", json={"resume": resumes[i % docs]})),
+        "parse_resume": lambda i: (lambda c: c.post("/parse/resume", files={"file": (uploads[i]["filename"], uploads[i]["content"], "text/plain")})),
+    }
+    results = {}
+    async with client:
+        for name, make in scenarios.items():
+            if only and only not in name:
+                continue
+            results[name] = await _load(client, [make(i) for i in range(requests)], concurrency)
+        if not only or only in "storm":
+            results.update(await _storm(client, gen, resumes, jds, requests, concurrency))
+    return results
+
+async def _storm(client, gen: CorpusGenerator, resumes, jds, requests: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    # Export storm: a burst of distinct (uncached) exports while light traffic keeps flowing for its whole duration.
+    # With admission control the light p99 stays close to the plain "align" scenario; excess exports get 429.
+    docs = len(resumes)
+    exports = [Resume(raw_text=normalize_text(gen.resume_text(1000 + i, bullets=40))).model_dump() for i in range(requests)]
+    heavy = [(lambda c, r=r: c.post("/export/resume", json={"resume": r})) for r in exports]
+    storm = asyncio.ensure_future(_load(client, heavy, concurrency * 4))
+    samples: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+
+    async def light(worker: int):
+        nonlocal errors
+        i = worker
+        while not storm.done():
+            t0 = time.perf_counter()
+            r = await client.post("/align", json={"resume": resumes[i % docs], "job_description": jds[i % docs]})
+            samples.append((time.perf_counter() - t0) * 1000)
+            errors += r.status_code >= 400
+            i += concurrency
+            await asyncio.sleep(0.005)  # steady user traffic rather than a second flood
+    await asyncio.gather(*(light(w) for w in range(max(1, concurrency // 2))))
+    light_out = summarize(samples, time.perf_counter() - start)
+    light_out["errors"] = errors
+    return {"storm_light": light_out, "storm_heavy": await storm}
+
+def load_suite(gen: CorpusGenerator, requests: int, concurrency: int, url: str = "", only: str = "") -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(load_suite_async(gen, requests, concurrency, url, only))
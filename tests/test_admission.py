@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils import admission as adm
+from app.utils.admission import AdmissionController, CostClass, Rejected, estimate_cost
+
+client = TestClient(app)
+
+def test_classify_routes():
+    c = AdmissionController()
+    assert c.classify("GET", "/healthz") is None
+    assert c.classify("GET", "/jobs/abc/events") is None and c.classify("GET", "/files/ab/cd.zip") is None
+    assert c.classify("POST", "/jobs") == "standard"
+    assert c.classify("POST", "/export/resume/pdf") == "heavy"
+    assert c.classify("POST", "/parse/resume") == "heavy"
+    assert c.classify("POST", "/align/batch") == "standard"
+    assert c.classify("POST", "/align") == "light"
+    assert c.classify("POST", "/ats/check") == "light"
+
+def test_cost_estimate(monkeypatch):
+    monkeypatch.setattr(adm, "ADMIT_COST_BYTES", 1000)
+    monkeypatch.setattr(adm, "ADMIT_COST_PAGES", 10)
+    assert estimate_cost() == 1
+    assert estimate_cost(2500) == 3
+    assert estimate_cost(2500, 25) == 5
+
+def test_bounded_queue_sheds_and_admits_fifo():
+    async def run():
+        cls = CostClass("heavy", limit=2, max_queue=1, max_wait=5)
+        a, b = await cls.acquire(1), await cls.acquire(1)
+        waiting = asyncio.ensure_future(cls.acquire(1))
+        await asyncio.sleep(0)
+        assert len(cls.waiters) == 1
+        with pytest.raises(Rejected) as e:
+            await cls.acquire(1)
+        assert e.value.reason == "queue_full" and e.value.retry_after >= 1
+        cls.release(a)
+        c = await waiting
+        assert cls.in_use == 2 and not cls.waiters
+        for t in (b, c):
+            cls.release(t)
+        assert cls.in_use == 0
+        assert cls.stats == {"admitted": 3, "queued": 1, "rejected_queue_full": 1, "rejected_timeout": 0}
+    asyncio.run(run())
+
+def test_wait_timeout_and_cost_units():
+    async def run():
+        cls = CostClass("heavy", limit=4, max_queue=8, max_wait=0.05)
+        big = await cls.acquire(10)  # capped at the limit
+        assert big.cost == 4
+        with pytest.raises(Rejected) as e:
+            await cls.acquire(1)
+        assert e.value.reason == "timeout" and not cls.waiters
+        cls.release(big)
+        small = await cls.acquire(1)
+        small.charge(2)  # e.g. page count learned after the upload
+        assert cls.in_use == 3
+        with pytest.raises(Rejected):
+            await cls.acquire(2)
+        cls.release(small)
+        assert cls.in_use == 0
+    asyncio.run(run())
+
+def _use_controller(monkeypatch, ctl: AdmissionController):
+    client.get("/healthz")  # builds the middleware stack
+    node = app.middleware_stack
+    while not isinstance(node, adm.AdmissionMiddleware):
+        node = node.app
+    monkeypatch.setattr(node, "controller", ctl)
+
+def test_heavy_saturation_does_not_block_light_requests(monkeypatch):
+    ctl = AdmissionController({"light": (8, 8, 1), "standard": (2, 2, 1), "heavy": (1, 0, 1)})
+    _use_controller(monkeypatch, ctl)
+
+    async def hold():
+        return await ctl.admit("heavy", 1)
+    ticket = asyncio.run(hold())  # an export in progress fills the heavy class
+    r = client.post("/export/resume", json={"resume": {"raw_text": "x"}})
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+    assert client.get("/healthz").status_code == 200
+    r = client.post("/ats/check", json={"resume": {"raw_text": "Python"}})
+    assert r.status_code == 200
+    assert ctl.classes["light"].stats["admitted"] == 1 and ctl.classes["heavy"].stats["rejected_queue_full"] == 1
+    ctl.classes["heavy"].release(ticket)
+
+def test_light_p99_holds_during_export_storm(monkeypatch, tmp_path):
+    import httpx
+    from app.models import Resume
+    from app.services import artifacts
+    from bench.corpus import CorpusGenerator
+    from bench.suites import _storm, clear_caches
+    monkeypatch.setattr(artifacts, "_store", artifacts.ArtifactStore(str(tmp_path / "files"), str(tmp_path / "a.sqlite3")))
+    ctl = AdmissionController({"light": (64, 256, 5), "standard": (8, 64, 10), "heavy": (1, 4, 30)})
+    _use_controller(monkeypatch, ctl)
+    clear_caches()  # every export must render
+    gen = CorpusGenerator(3)
+    resumes = [Resume(raw_text=gen.resume_text(i)).model_dump() for i in range(4)]
+    jds = [{"entities": {"required_skills": ["Python", "SQL"]}, "raw_text": t} for t in gen.jds(4)]
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=60) as c:
+            return await _storm(c, gen, resumes, jds, requests=12, concurrency=2)
+    out = asyncio.run(run())
+    heavy = ctl.classes["heavy"].stats
+    assert heavy["queued"] >= 4 and heavy["rejected_queue_full"] > 0  # the heavy class was saturated throughout
+    assert out["storm_light"]["n"] >= 5 and out["storm_light"]["errors"] == 0
+    assert out["storm_light"]["p99_ms"] < 250
+
+def test_admission_stats_and_metrics():
+    assert set(client.get("/stats/admission").json()["classes"]) == {"light", "standard", "heavy"}
+    client.post("/ats/check", json={"resume": {"raw_text": "Python"}})
+    text = client.get("/metrics").text
+    assert 'admission_wait_seconds_count{cost_class="light"}' in text
+    assert 'admission_in_use{cost_class="light"}' in text
+
+def test_pdf_page_estimate(tmp_path):
+    from app.services.uploads import pdf_page_estimate
+    from bench.corpus import CorpusGenerator
+    doc = CorpusGenerator(1).resumes(1, "pdf", bullets=200)[0]
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(doc["content"])
+    assert pdf_page_estimate(str(path)) >= 2
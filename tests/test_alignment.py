@@ -0,0 +1,52 @@
+import random
+from app.models import Resume, JobDescription
+from app.services.alignment import compute_alignment, _band
+from app.utils.index import TokenIndex
+from app.utils.text import tokenize
+
+def _reference_score(term, text):
+    tkns = tokenize(text)
+    if not term or not tkns: return 0.0
+    hits = sum(1 for t in tkns if term.lower() in t)
+    return min(1.0, hits / max(3, len(tkns)/50))
+
+def test_index_matches_substring_rule():
+    rng = random.Random(7)
+    words = ["python", "pythonic", "sql", "mysql", "c++", "node.js", "go", "aws", "kubernetes", "data"]
+    text = " ".join(rng.choice(words) for _ in range(400))
+    idx = TokenIndex(text)
+    for term in words + ["py", "s", "q", "etes", "machine learning", "", "missing"]:
+        assert idx.hits(term) == sum(1 for t in tokenize(text) if term.lower() in t)
+
+def test_alignment_scores_unchanged_and_evidence_offsets():
+    text = "Built ETL in Python and SQL for Snowflake. Python tooling, MySQL tuning, Docker."
+    resume = Resume(raw_text=text)
+    jd = JobDescription(entities={"required_skills": ["Python", "SQL", "Rust"], "tools": ["Docker"]})
+    al = compute_alignment(resume, jd)
+    for it in al.skills + al.tools:
+        s = _reference_score(it.term, text)
+        assert it.confidence == float(f"{s:.2f}") and it.strength == _band(s)
+    py = al.skills[0]
+    start, end = map(int, py.evidence[0].split(":"))
+    assert text[start:end].lower() == "python"
+    assert [g["term"] for g in al.gaps] == ["Rust"]
+
+def test_align_batch_matches_single_alignment():
+    from app.services.alignment import align_batch, coverage_scores
+    rng = random.Random(3)
+    words = ["python", "sql", "snowflake", "docker", "aws", "spark", "etl", "java", "go", "excel"]
+    resume = Resume(raw_text=" ".join(rng.choice(words[:6] + ["the", "and", "team"]) for _ in range(120)))
+    jds = [JobDescription(entities={"required_skills": rng.sample(words, 4) + ["Python"],
+                                    "preferred_skills": rng.sample(words, 2)}) for _ in range(25)]
+    jds.append(JobDescription())
+    batch = align_batch(resume, jds)
+    for res, jd in zip(batch["results"], jds):
+        single = compute_alignment(resume, jd)
+        assert res["coverage"] == coverage_scores(single, jd)
+        assert res["gaps"] == single.gaps
+    keys = [(-r["coverage"]["required"], -r["coverage"]["preferred"], r["index"]) for r in batch["results"]]
+    assert batch["ranking"] == [k[2] for k in sorted(keys)]
+    top = align_batch(resume, jds, top_k=3)
+    assert top["ranking"] == batch["ranking"][:3] and [r["index"] for r in top["results"]] == sorted(top["ranking"])
+    fortieth = JobDescription(entities={"required_skills": ["python"] + [f"missing{i}" for i in range(39)]})
+    assert align_batch(resume, [fortieth])["results"][0]["coverage"] == coverage_scores(compute_alignment(resume, fortieth), fortieth)
@@ -0,0 +1,34 @@
+import random, re
+from app.models import Resume
+from app.services.analysis import analyze, AnalyzedDocument
+from app.services.ats import ats_check
+from app.services.optimizer import rewrite_bullets
+from app.utils.text import tokenize
+
+EMAIL = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+PHONE = r"\+?\d[\d\s().-]{7,}\d"
+PARTS = ["Python", "SQL", "2019", "-", "•", "jane.doe@x.com", "+1 (555) 123-4567", "c#dev@x.com", "a@b.com-x",
+         " | ", "data.", "Led", "team;", "2020-2021", "K8s", "email:me@site.io", "ISO27001", "x|y", "555.123.4567x"]
+
+def test_single_pass_matches_separate_scans():
+    rng = random.Random(5)
+    for _ in range(2000):
+        t = " ".join(rng.choice(PARTS) for _ in range(rng.randint(0, 30)))
+        if rng.random() < 0.3: t = t.replace(" ", "")
+        doc = AnalyzedDocument(t)
+        assert doc.tokens == tokenize(t)
+        assert [t.lower()[a:b] for a, b in zip(doc.starts, doc.ends)] == doc.tokens
+        assert doc.dates == re.findall(r"(20\d{2}|19\d{2})", t)
+        assert bool(doc.emails or doc.phones) == bool(re.search(EMAIL, t) or re.search(PHONE, t))
+        assert bool(doc.tables) == (" | " in t)
+
+def test_sentences_bullets_and_cache():
+    text = "Data engineer. • Built ETL in Spark; cut costs 30%. • Call 555-123-4567 or jane@x.io"
+    doc = analyze(text)
+    assert analyze(text) is doc
+    assert doc.sentence_texts() == ["Data engineer.", "Built ETL in Spark;", "cut costs 30%.", "Call 555-123-4567 or jane@x.io"]
+    assert [text[i] for i in doc.bullets] == ["•", "•"]
+    checks = {c["rule"]: c["pass"] for c in ats_check(Resume(raw_text=text))}
+    assert checks["Contact info present"] and checks["No tables"] and not checks["Dates detectable"]
+    edits = rewrite_bullets(Resume(raw_text=text), None, None)
+    assert [e.new_text for e in edits] == ["Led: Data engineer", "Built: Built ETL in Spark", "Automated: cut costs 30%"]
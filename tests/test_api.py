@@ -1,9 +1,20 @@
-import json
+import json, os
+import pytest
 from fastapi.testclient import TestClient
+from app import main
 from app.main import app
+from app.services import artifacts, uploads
+from app.services.cache import ParseCache
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    # Artifacts, spooled uploads and parsed documents go under tmp_path instead of the real files/ and cache/
+    monkeypatch.setattr(artifacts, "_store", artifacts.ArtifactStore(str(tmp_path / "files"), str(tmp_path / "artifacts.sqlite3")))
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(main, "parse_cache", ParseCache(path=str(tmp_path / "parse.sqlite3"), version="test"))
+
 def test_health():
     r = client.get("/healthz")
     assert r.status_code == 200
@@ -26,3 +37,167 @@ def test_align_and_optimize_roundtrip():
     r2 = client.post("/optimize", json={"resume": resume, "job_description": jd})
     assert r2.status_code == 200
     assert "tailored_resume" in r2.json()
+
+def test_parse_resume_upload():
+    r = client.post("/parse/resume", files={"file": ("cv.txt", b"Jane Doe\nData engineer with Python and SQL", "text/plain")})
+    assert r.status_code == 200
+    assert "Python" in r.json()["resume"]["raw_text"]
+
+def test_parse_resume_repeat_upload_is_cached():
+    before = client.get("/stats/cache").json()["parse"]
+    files = {"file": ("again.txt", b"Repeat upload with Kubernetes", "text/plain")}
+    client.post("/parse/resume", files=files)
+    r = client.post("/parse/resume", files=files)
+    after = client.get("/stats/cache").json()["parse"]
+    assert r.json()["resume"]["source_meta"]["filename"] == "again.txt"
+    assert after["memory_hits"] + after["disk_hits"] > before["memory_hits"] + before["disk_hits"]
+
+def test_align_batch_endpoint(monkeypatch):
+    ran = []
+    run = main.pool.run
+    async def spy(fn, *args, **kw):
+        ran.append(fn.__name__)
+        return await run(fn, *args, **kw)
+    monkeypatch.setattr(main.pool, "run", spy)  # the NumPy work stays off the event loop
+    resume = {"raw_text": "Python SQL " * 20}
+    jds = [{"entities": {"required_skills": ["Rust"]}}, {"entities": {"required_skills": ["Python", "SQL"]}}]
+    r = client.post("/align/batch", json={"resume": resume, "job_descriptions": jds, "top_k": 1})
+    assert r.status_code == 200
+    assert r.json()["ranking"] == [1]
+    assert [res["index"] for res in r.json()["results"]] == [1]  # top_k trims results too
+    r = client.post("/align/batch", json={"resume": resume, "job_descriptions": jds})
+    assert r.json()["ranking"] == [1, 0] and r.json()["results"][0]["gaps"][0]["term"] == "Rust"
+    assert client.post("/align/batch", json={"resume": resume, "job_descriptions": jds, "top_k": 0}).status_code == 400
+    assert ran == ["align_batch", "align_batch"]
+
+def test_corpus_search_endpoint(tmp_path, monkeypatch):
+    from app.services import corpus as corpus_service
+    monkeypatch.setattr(corpus_service, "_corpus", corpus_service.ResumeCorpus(path=str(tmp_path)))
+    client.post("/corpus/resumes", json={"id": "a", "resume": {"raw_text": "Python " * 10}})
+    client.post("/corpus/resumes", json={"id": "b", "resume": {"raw_text": "Java " * 10}})
+    r = client.post("/search/resumes", json={"job_description": {"entities": {"required_skills": ["Python"]}}, "top_k": 5})
+    assert [x["id"] for x in r.json()["results"]] == ["a"]
+    assert r.json()["results"][0]["band"] == "strong"
+    assert client.delete("/corpus/resumes/a").status_code == 200
+    assert client.get("/corpus/stats").json()["documents"] == 1
+
+def test_optimize_reports_stage_timings():
+    resume = {"raw_text": "Built ETL in Python. Led SQL migrations."}
+    jd = {"entities": {"required_skills": ["Python"]}}
+    r = client.post("/optimize", json={"resume": resume, "job_description": jd})
+    assert {"validate", "analyze", "alignment", "rewrite", "tailor"} <= set(r.json()["timings_ms"])
+
+def test_package_session_flow():
+    resume = {"pii": {"name": "Test User"}, "raw_text": "Python SQL " * 10}
+    jd = {"title": "Data Engineer", "entities": {"required_skills": ["Python", "SQL"]}}
+    pid = client.post("/packages", json={"resume": resume, "job_description": jd}).json()["package_id"]
+    r = client.post("/align", json={"package_id": pid})
+    assert r.status_code == 200 and r.json()["coverage"]["required"] == 1.0
+    assert client.post("/optimize", json={"package_id": pid}).status_code == 200
+    assert client.post("/ats/check", json={"package_id": pid}).status_code == 200
+    client.patch(f"/packages/{pid}", json={"job_description": {"entities": {"required_skills": ["Rust"]}}})
+    assert client.post("/align", json={"package_id": pid}).json()["coverage"]["required"] == 0.0
+    assert client.post("/align", json={"package_id": "nope"}).status_code == 404
+
+def test_package_incremental_resume_edit():
+    pid = client.post("/packages", json={"resume": {"raw_text": "Java and Java"},
+                                         "job_description": {"entities": {"required_skills": ["Python"]}}}).json()["package_id"]
+    r = client.patch(f"/packages/{pid}/resume", json={"base_version": 0, "edits": [{"op": "insert", "at": 13, "text": " Python Python"}]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["version"] == 1 and body["changes"]["skills"][0]["strength"] == "medium"
+    assert body["changes"]["gaps"] == {"added": [], "removed": ["Python"]}
+    assert body["changes"]["coverage"]["required"] == 1.0
+    assert client.patch(f"/packages/{pid}/resume", json={"base_version": 0, "edits": []}).status_code == 409
+
+def test_parse_resume_rejects_oversized_upload(monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 16)
+    r = client.post("/parse/resume", files={"file": ("cv.txt", b"x" * 64, "text/plain")})
+    assert r.status_code == 413
+    assert not os.listdir(uploads.UPLOAD_DIR)
+
+def test_oversized_upload_is_refused_before_the_body_is_read(monkeypatch):
+    import asyncio
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 16)
+    sent, reads = [], []
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+             "path": "/parse/resume", "raw_path": b"/parse/resume", "root_path": "", "query_string": b"",
+             "client": ("test", 1), "server": ("test", 80),
+             "headers": [(b"host", b"test"), (b"content-type", b"multipart/form-data; boundary=x"),
+                         (b"content-length", str(10 ** 9).encode())]}
+
+    async def receive():
+        reads.append(1)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    assert sent[0]["status"] == 413 and not reads
+
+def test_upload_is_spooled_once(monkeypatch):
+    import hashlib
+    seen = []
+    real = uploads.spool_upload
+
+    async def spy(file, max_bytes=None):
+        path, digest = await real(file, max_bytes)
+        seen.append((path, file.file.name, digest))
+        return path, digest
+    monkeypatch.setattr(main, "spool_upload", spy)
+    r = client.post("/parse/resume", files={"file": ("cv.txt", b"Python engineer", "text/plain")})
+    assert r.status_code == 200
+    path, part_path, digest = seen[0]
+    assert path == part_path and os.path.samefile(os.path.dirname(path), uploads.UPLOAD_DIR)  # the parsed part itself, no copy
+    assert digest == hashlib.sha256(b"Python engineer").hexdigest()
+    assert not os.path.exists(path)
+
+def test_export_is_content_addressed_and_cached():
+    from app.services.exporter import export_cache
+    resume = {"summary": "Backend engineer", "raw_text": "Built APIs in Python", "source_meta": {"filename": "a.pdf"}}
+    first = client.post("/export/resume", json={"resume": resume}).json()
+    assert first["pdf_url"].endswith(".pdf") and first["docx_url"][:-5] == first["pdf_url"][:-4]
+    served = client.get(first["pdf_url"])
+    assert served.status_code == 200 and served.content.startswith(b"%PDF")
+    assert "immutable" in served.headers["cache-control"]
+    assert client.get(first["pdf_url"], headers={"If-None-Match": served.headers["etag"]}).status_code == 304
+    hits = export_cache.stats["hits"]
+    # source_meta is not rendered, so the same artifacts are reused
+    again = client.post("/export/resume", json={"resume": {**resume, "source_meta": {"filename": "b.pdf"}}}).json()
+    assert again == first and export_cache.stats["hits"] == hits + 2
+    changed = client.post("/export/resume", json={"resume": {**resume, "summary": "Data engineer"}}).json()
+    assert changed["export_id"] != first["export_id"]
+
+def test_export_download_streams_from_memory():
+    r = client.post("/export/resume/pdf", json={"resume": {"summary": "Backend engineer", "raw_text": "Python"}})
+    assert r.status_code == 200 and r.headers["content-type"] == "application/pdf"
+    assert r.content.startswith(b"%PDF") and r.headers["etag"].strip('"')
+    docx = client.post("/export/resume/docx", json={"resume": {"summary": "Backend engineer", "raw_text": "Python"}})
+    assert docx.content[:2] == b"PK"
+    assert client.post("/export/resume/odt", json={"resume": {}}).status_code == 404
+
+def test_cover_letters_do_not_overwrite_each_other():
+    jd = {"title": "Engineer", "entities": {"required_skills": ["Python"]}}
+    a = client.post("/cover-letter", json={"resume": {"pii": {"name": "Ann"}}, "job_description": jd}).json()["txt_url"]
+    b = client.post("/cover-letter", json={"resume": {"pii": {"name": "Bo"}}, "job_description": jd}).json()["txt_url"]
+    assert a != b
+    assert client.get(a).text.rstrip().endswith("Ann") and client.get(b).text.rstrip().endswith("Bo")
+    assert client.get("/files/../app/main.py").status_code == 404
+
+def test_report_renders_escaped_html_and_pdf():
+    skills = [f"Skill{i}" for i in range(100)] + ["<script>"]
+    payload = {"resume": {"raw_text": "Skill1 engineer"}, "job_description": {"entities": {"required_skills": skills}}}
+    body = client.post("/report", json=payload).json()
+    html = client.get(body["html_url"]).text
+    assert "&lt;script&gt;" in html and "<script>" not in html
+    assert html.count("<li>") == 101 and "<th>required</th><td>0%</td>" in html
+    pdf = client.get(body["pdf_url"]).content
+    assert pdf.startswith(b"%PDF") and pdf.count(b"/Type /Page\n") + pdf.count(b"/Type /Page ") >= 2
+    streamed = client.post("/report/html", json=payload)
+    assert streamed.headers["content-type"].startswith("text/html") and streamed.text.count("<li>") == 101
+
+def test_profile_save_keeps_settings_as_sent():
+    r = client.post("/profile/save", json={"settings": {"theme": "dark"}, "resume": {"summary": "Data engineer"}})
+    saved = json.loads(client.get(r.json()["profile_url"]).content)
+    assert saved["settings"] == {"theme": "dark"} and saved["resume"]["summary"] == "Data engineer"
@@ -0,0 +1,52 @@
+import os
+from app.services.artifacts import ArtifactStore
+
+def make(tmp_path, **kw):
+    return ArtifactStore(str(tmp_path / "files"), str(tmp_path / "artifacts.sqlite3"), **kw)
+
+def test_put_is_sharded_atomic_and_content_addressed(tmp_path):
+    store = make(tmp_path)
+    a = store.put(b"hello", "txt")
+    b = store.put(b"hello", "txt")
+    assert a.name != b.name  # random ids never collide
+    shard1, shard2, fname = a.name.split("/")
+    assert fname.startswith(shard1 + shard2) and open(a.path, "rb").read() == b"hello"
+    c = store.put(b"pdf", "pdf", key="export:abc")
+    assert store.put(b"ignored", "pdf", key="export:abc").name == c.name and store.stats["reused"] == 1
+    assert not [f for _, _, files in os.walk(store.root) for f in files if f.endswith(".tmp")]
+    assert store.get(c.name).content_type == "application/pdf" and store.get("nope.txt") is None
+
+def test_sweep_drops_expired_then_least_recently_used(tmp_path):
+    store = make(tmp_path, ttl=100, max_bytes=25)
+    old = store.put(b"x" * 10, "txt")
+    store._db.execute("UPDATE artifacts SET accessed = accessed - 1000 WHERE name = ?", (old.name,))
+    assert store.sweep() == [old.name] and not os.path.exists(old.path)
+    a = store.put(b"a" * 10, "txt")
+    b = store.put(b"b" * 10, "txt")
+    store._db.execute("UPDATE artifacts SET accessed = accessed - 10 WHERE name = ?", (a.name,))
+    store.get(b.name)
+    c = store.put(b"c" * 10, "txt")  # 30 bytes > 25: a is least recently used
+    sweeper = store._sweeper  # eviction runs after put returns
+    if sweeper is not None:
+        sweeper.join(5)
+    assert store.get(a.name) is None and not os.path.exists(a.path)
+    assert store.get(b.name) and store.get(c.name)
+    assert store.summary()["bytes"] == 20
+
+def test_running_total_tracks_replaces_deletes_and_sweeps(tmp_path):
+    store = make(tmp_path, ttl=100, max_bytes=1000)
+    def summed():
+        return store._db.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+    a = store.put(b"a" * 10, "txt")
+    k = store.put(b"k" * 30, "pdf", key="export:k")
+    os.remove(k.path)  # a lost file is rewritten under the same name
+    assert store.put(b"k" * 7, "pdf", key="export:k").size == 7
+    assert store.summary()["bytes"] == summed() == 17
+    assert store.delete(a.name) and not store.delete(a.name) and not os.path.exists(a.path)
+    store._db.execute("UPDATE artifacts SET accessed = accessed - 1000")
+    assert store.sweep() == [k.name] and not os.path.exists(k.path)
+    assert store.summary()["bytes"] == summed() == 0
+    again = store.put(b"k" * 5, "pdf", key="export:k")  # evicted key written afresh keeps file and row together
+    assert store.get(again.name).size == 5 and open(again.path, "rb").read() == b"k" * 5
+    reopened = make(tmp_path)
+    assert reopened.summary()["bytes"] == 5
@@ -0,0 +1,30 @@
+from bench.corpus import CorpusGenerator
+from bench.harness import compare, percentile, run_micro
+from app.services.parser import parse_resume
+
+def test_corpus_is_deterministic_and_parses_in_every_format():
+    a, b = CorpusGenerator(7), CorpusGenerator(7)
+    assert a.resume_text(3) == b.resume_text(3) and a.jd_text(3, words=50) == b.jd_text(3, words=50)
+    assert a.resume_text(3) != CorpusGenerator(8).resume_text(3)
+    assert a.render(a.resume_text(1), "pdf") == b.render(b.resume_text(1), "pdf")
+    dense, sparse = a.resume_text(0, skill_density=0.9), a.resume_text(0, skill_density=0.0)
+    assert len(set(dense.split()) & set(a.vocab)) > len(set(sparse.split()) & set(a.vocab))
+    texts = [parse_resume(d["filename"], d["content"]).raw_text for fmt in ("txt", "docx", "pdf") for d in a.resumes(1, fmt)]
+    assert texts[0] == texts[1] and texts[0].startswith("Candidate 0") and "candidate0@example.com" in texts[2]
+
+def test_harness_percentiles_and_baseline_comparison():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    stats = run_micro(lambda i: sum(range(100)), 5)
+    assert stats["n"] == 5 and stats["p50_ms"] <= stats["p99_ms"] and "peak_kb" in stats
+    base = {"micro": {"fast": {"p50_ms": 1.0, "p95_ms": 2.0}, "gone": {"p50_ms": 1.0}}}
+    cur = {"micro": {"fast": {"p50_ms": 1.5, "p95_ms": 9.0}}}
+    rows = compare(cur, base, tolerance=0.25)
+    assert [(r["metric"], r["regressed"]) for r in rows] == [("p50_ms", True), ("p95_ms", False)]
+    assert not any(r["regressed"] for r in compare(cur, base, tolerance=0.6))
+
+def test_micro_suite_removes_its_export_dir(tmp_path, monkeypatch):
+    import tempfile
+    from bench.suites import micro_suite
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    results = micro_suite(CorpusGenerator(7), 3, only="export_resume_files")
+    assert list(results) == ["export_resume_files"] and not list(tmp_path.iterdir())
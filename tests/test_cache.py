@@ -0,0 +1,60 @@
+from app.models import Resume
+from app.services.cache import ParseCache
+
+def test_parse_cache_tiers_shared_disk_and_version_invalidation(tmp_path):
+    path = str(tmp_path / "parse.sqlite3")
+    a = ParseCache(path=path, version="v1")
+    key, hit = a.lookup(Resume, "resume", "cv.pdf", b"%PDF bytes")
+    assert hit is None
+    a.store(key, Resume(raw_text="Python engineer"))
+    assert a.lookup(Resume, "resume", "other-name.pdf", b"%PDF bytes")[1].raw_text == "Python engineer"
+    assert a.lookup(Resume, "resume", "cv.docx", b"%PDF bytes")[1] is None  # extension picks the parser
+
+    b = ParseCache(path=path, version="v1")  # another app worker sharing the disk tier
+    assert b.lookup(Resume, "resume", "cv.pdf", b"%PDF bytes")[1].raw_text == "Python engineer"
+    assert b.stats["disk_hits"] == 1
+    b.lookup(Resume, "resume", "cv.pdf", b"%PDF bytes")
+    assert b.stats["memory_hits"] == 1
+
+    c = ParseCache(path=path, version="v2")  # parser code changed
+    assert c.lookup(Resume, "resume", "cv.pdf", b"%PDF bytes")[1] is None
+    # v1 workers still running during a rolling deploy keep their entries; LRU eviction removes them later
+    assert a.lookup(Resume, "resume", "cv.pdf", b"%PDF bytes")[1].raw_text == "Python engineer"
+
+def test_parse_cache_byte_budgets(tmp_path):
+    cache = ParseCache(path=str(tmp_path / "p.sqlite3"), memory_bytes=100, disk_bytes=250, version="v")
+    for i in range(5):
+        cache.put(f"k{i}", b"x" * 60)
+    assert list(cache.memory) == ["k4"] and cache.memory_used == 60
+    total = cache._conn().execute("SELECT SUM(size) FROM parse_cache").fetchone()[0]
+    assert total <= 250 and cache.get("k4") is not None and cache.get("k0") is None
+    cache.put("k4", b"x" * 10)  # replacing an entry adjusts the running total by the difference
+    assert cache._conn().execute("SELECT bytes FROM parse_cache_total").fetchone()[0] == \
+        cache._conn().execute("SELECT SUM(size) FROM parse_cache").fetchone()[0]
+
+def test_parse_cache_keeps_other_versions_until_evicted(tmp_path):
+    path = str(tmp_path / "p.sqlite3")
+    old, new = ParseCache(path=path, version="v1", disk_bytes=250), ParseCache(path=path, version="v2", disk_bytes=250)
+    old.put("old", b"o" * 60)
+    new.put("new", b"n" * 60)
+    ParseCache(path=path, version="v1")._conn()  # reconnecting no longer deletes v2 rows, or v2 deletes v1's
+    assert new._conn().execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0] == 2
+    for i in range(3):
+        new.put(f"k{i}", b"x" * 60)
+    assert new._conn().execute("SELECT key FROM parse_cache WHERE key = 'old'").fetchone() is None
+
+def _read_in_child(cache, key, out):
+    cache.memory.clear()
+    out.put((cache.get(key), len(cache._inherited), cache._db is not None and cache._db is not cache._inherited[0]))
+
+def test_parse_cache_reopens_connection_after_fork(tmp_path):
+    import multiprocessing
+    cache = ParseCache(path=str(tmp_path / "p.sqlite3"), version="v")
+    cache.put("k", b"data")
+    assert cache._db is not None
+    ctx = multiprocessing.get_context("fork")  # how the job pool starts its workers on Linux
+    out = ctx.Queue()
+    child = ctx.Process(target=_read_in_child, args=(cache, "k", out))
+    child.start()
+    assert out.get(timeout=10) == (b"data", 1, True)
+    child.join()
@@ -0,0 +1,64 @@
+import random
+from app.models import Resume, JobDescription
+from app.services.alignment import compute_alignment, coverage_scores
+from app.services.corpus import ResumeCorpus
+
+WORDS = ["python", "pyspark", "sql", "mysql", "snowflake", "docker", "java", "javascript", "team", "and", "built"]
+
+def _resumes(n, seed=11):
+    rng = random.Random(seed)
+    return [Resume(raw_text=" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 200)))) for _ in range(n)]
+
+def test_search_matches_alignment_coverage_and_skips_unmatched(tmp_path):
+    corpus = ResumeCorpus(path=str(tmp_path))
+    resumes = _resumes(60)
+    ids = [corpus.add(r, f"r{i}") for i, r in enumerate(resumes)]
+    corpus.add(Resume(raw_text="gardening cooking"), "none")
+    jd = JobDescription(entities={"required_skills": ["Python", "SQL", "Rust"], "preferred_skills": ["Docker"]})
+    results = corpus.search(jd, top_k=100)
+    assert "none" not in [r["id"] for r in results]
+    for r in results:
+        resume = resumes[ids.index(r["id"])]
+        assert r["coverage"] == coverage_scores(compute_alignment(resume, jd), jd)
+    covs = [(r["coverage"]["required"], r["coverage"]["preferred"]) for r in results]
+    assert covs == sorted(covs, reverse=True)
+    for k in (1, 3, 7):  # partial selection returns the head of the full ranking, ties included
+        assert corpus.search(jd, top_k=k) == results[:k]
+
+def test_corpus_persists_adds_and_removes(tmp_path):
+    corpus = ResumeCorpus(path=str(tmp_path))
+    for i, r in enumerate(_resumes(10)):
+        corpus.add(r, f"r{i}")
+    corpus.save()
+    corpus.add(Resume(raw_text="rust rust rust engineer"), "rusty")
+    corpus.remove("r3")
+    jd = JobDescription(entities={"required_skills": ["rust", "python"]})
+    expected = corpus.search(jd, top_k=20)
+
+    reloaded = ResumeCorpus(path=str(tmp_path))  # snapshot + log replay
+    assert reloaded.search(jd, top_k=20) == expected
+    assert "r3" not in reloaded.by_id and reloaded.summary()["documents"] == 10
+    for i in range(6):
+        reloaded.remove(f"r{i}")
+    assert reloaded.deleted < 3  # compacted past the tombstone ratio
+    rust_only = JobDescription(entities={"required_skills": ["rust"]})
+    assert [r["id"] for r in reloaded.search(rust_only)] == ["rusty"]
+
+def test_workers_sharing_a_corpus_dir_never_lose_each_others_writes(tmp_path, monkeypatch):
+    import os
+    from app.services import corpus as corpus_service
+    monkeypatch.setattr(corpus_service, "CORPUS_SNAPSHOT_EVERY", 3)
+    a, b = ResumeCorpus(path=str(tmp_path)), ResumeCorpus(path=str(tmp_path))  # two app workers
+    rust = JobDescription(entities={"required_skills": ["rust"]})
+    for i in range(4):  # rotations happen in both workers along the way
+        a.add(Resume(raw_text=f"rust engineer a{i}"), f"a{i}")
+        b.add(Resume(raw_text=f"rust engineer b{i}"), f"b{i}")
+    assert b.remove("a0") and not a.remove("a0")
+    expected = sorted([f"a{i}" for i in range(1, 4)] + [f"b{i}" for i in range(4)])
+    assert sorted(r["id"] for r in a.search(rust, top_k=20)) == expected
+    with open(os.path.join(str(tmp_path), f"log.{b._gen}.jsonl"), "ab") as f:
+        f.write(b'{"op": "add", "id": "torn"')  # writer crashed mid-append
+    b.add(Resume(raw_text="rust engineer late"), "late")
+    fresh = ResumeCorpus(path=str(tmp_path))
+    assert sorted(r["id"] for r in fresh.search(rust, top_k=20)) == sorted(expected + ["late"])
+    assert sorted(f for f in os.listdir(str(tmp_path)) if f.startswith("snapshot")) == ["snapshot.npz"]
@@ -0,0 +1,101 @@
+from fastapi.testclient import TestClient
+from app import main
+from app.main import app
+from app.models import Resume
+from app.services import dedup
+from app.services.alignment import compute_alignment
+from app.services.cache import ParseCache
+from app.services.dedup import AlignmentMemo, JDIndex, signature, PERMUTATIONS
+from app.services.parser import parse_jd
+from bench.corpus import CorpusGenerator
+
+gen = CorpusGenerator(7)
+
+def _repost(text: str) -> str:
+    # same listing on another board: boilerplate block moved up, tracking text appended
+    paras = text.split("\n")
+    return "\n".join(paras[-6:] + paras[:-6]) + "\nApply via JobBoard ref=8812 utm_source=feed"
+
+def _sim(a: str, b: str) -> float:
+    return float((signature(a) == signature(b)).sum()) / PERMUTATIONS
+
+def test_signature_similarity():
+    jd = gen.jd_text(0)
+    assert _sim(jd, jd) == 1.0
+    assert _sim(jd, _repost(jd)) >= 0.8
+    assert _sim(jd, gen.jd_text(1)) < 0.3
+    assert signature("") is None
+
+def test_near_duplicates_link_to_canonical():
+    index = JDIndex(path=None)
+    original = index.link(parse_jd(text_input=gen.jd_text(0)))
+    cid = original.source_meta["canonical_id"]
+
+    raw = _repost(gen.jd_text(0))
+    dup = index.reuse(raw, "board-b")
+    assert dup.entities == original.entities and dup.raw_text == raw
+    assert dup.source_meta["canonical_id"] == cid and dup.source_meta["similarity"] >= 0.8
+
+    other = index.reuse(gen.jd_text(1), "board-c")
+    assert other.source_meta["canonical_id"] != cid and "duplicate_of" not in other.source_meta
+
+    stats = index.summary()
+    assert stats["canonical"] == 2 and stats["duplicates"] == 1 and stats["entities_reused"] == 1
+
+def test_templated_jds_with_different_skills_are_not_linked():
+    boilerplate = ("Acme Corp is an equal opportunity employer. We offer flexible hours, remote work, a learning budget, "
+                   "health insurance and a friendly team that values ownership, curiosity and clear written communication. ")
+    java = f"Backend Engineer. {boilerplate * 3}Requirements: 5+ years of Java and Spring."
+    python = f"Backend Engineer. {boilerplate * 3}Requirements: 5+ years of Python and Django."
+    assert _sim(java, python) >= 0.8
+    index, memo = JDIndex(path=None), AlignmentMemo()
+    first = index.reuse(python, "a")
+    second = index.reuse(java, "b")
+    assert "Java" in second.entities.required_skills and "Python" not in second.entities.required_skills
+    assert second.source_meta["canonical_id"] != first.source_meta["canonical_id"]
+    assert index.summary()["duplicates"] == 0
+
+    uploaded = parse_jd(text_input=java)
+    index.link(uploaded)
+    assert uploaded.entities == second.entities  # link() never replaces extracted entities
+    resume = Resume(raw_text="Python and Django developer")
+    assert memo.align(resume, first) != memo.align(resume, second)
+
+def test_index_is_bounded_and_persisted(tmp_path):
+    index = JDIndex(path=str(tmp_path), max_entries=2)
+    jds = [index.link(parse_jd(text_input=gen.jd_text(i))) for i in range(3)]
+    assert index.summary()["canonical"] == 2 and index.stats["evicted"] == 1
+    assert index.match(signature(jds[0].raw_text))[0] is None  # least recently seen was dropped
+    assert all(jds[0].source_meta["canonical_id"] not in ids for ids in index.buckets.values())
+    index.save()
+
+    reloaded = JDIndex(path=str(tmp_path), max_entries=2)
+    entry, sim = reloaded.match(signature(_repost(jds[2].raw_text)))
+    assert entry is not None and entry.id == jds[2].source_meta["canonical_id"] and sim >= 0.8
+
+def test_alignment_memo_shared_by_duplicates():
+    index, memo = JDIndex(path=None), AlignmentMemo()
+    resume = Resume(raw_text=gen.resume_text(0))
+    canonical = index.link(parse_jd(text_input=gen.jd_text(0)))
+    repost = index.reuse(_repost(gen.jd_text(0)), "board-b")
+    first = memo.align(resume, canonical)
+    assert first == compute_alignment(resume, canonical)
+    assert memo.align(resume, repost) == first
+    assert memo.summary() == {"hits": 1, "misses": 1, "entries": 1}
+
+def test_parse_jd_api_links_reposts(monkeypatch):
+    monkeypatch.setattr(dedup, "_index", JDIndex(path=None))
+    monkeypatch.setattr(main, "parse_cache", ParseCache(path="", version="test"))
+    client = TestClient(app)
+    text = gen.jd_text(3)
+    first = client.post("/parse/jd", data={"text": text}).json()["job_description"]
+    second = client.post("/parse/jd", data={"text": _repost(text)}).json()["job_description"]
+    assert second["source_meta"]["canonical_id"] == first["source_meta"]["canonical_id"]
+    assert second["entities"] == first["entities"]
+    stats = client.get("/stats/dedup").json()
+    assert stats["duplicates"] == 1 and stats["canonical"] == 1
+
+    again = client.post("/parse/jd", data={"text": text}).json()["job_description"]  # exact resubmission: parse cache hit
+    assert again["source_meta"]["canonical_id"] == first["source_meta"]["canonical_id"]
+    assert "duplicate_of" not in again["source_meta"]
+    assert client.get("/stats/dedup").json()["duplicates"] == 1
@@ -0,0 +1,54 @@
+import asyncio, os, time
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.services.executor import WorkerPool, PoolBusy, TaskTimeout
+
+def _square(x):
+    return x * x
+
+def test_pool_runs_task_in_thread_and_process_modes():
+    for mode in ("thread", "process", "inline"):
+        p = WorkerPool(mode=mode, workers=2)
+        assert asyncio.run(p.run(_square, 7)) == 49
+        assert p.pending == 0
+        p.shutdown()
+
+def _crash():
+    os._exit(1)
+
+def test_pool_timeout_and_bounded_queue():
+    p = WorkerPool(mode="thread", workers=1, max_pending=1, timeout=0.1)
+    with pytest.raises(TaskTimeout):
+        asyncio.run(p.run(time.sleep, 0.5))
+    assert p.pending == 1  # the timed-out task still occupies the worker
+    with pytest.raises(PoolBusy):
+        asyncio.run(p.run(_square, 2))
+    time.sleep(0.6)
+    assert p.pending == 0
+
+    async def burst():
+        first = asyncio.ensure_future(p.run(time.sleep, 0.05, timeout=1))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolBusy):
+            await p.run(_square, 2)
+        await first
+    asyncio.run(burst())
+    assert p.pending == 0
+    p.shutdown()
+
+def test_restart_frees_worker_after_timeout():
+    p = WorkerPool(mode="process", workers=1, max_pending=4, timeout=0.2)
+    with pytest.raises(TaskTimeout):
+        asyncio.run(p.run(time.sleep, 30))
+    p.restart()  # the sleeping worker is terminated instead of blocking the next task for 30s
+    t0 = time.monotonic()
+    assert asyncio.run(p.run(_square, 3, timeout=10)) == 9
+    assert time.monotonic() - t0 < 5 and p.restarts == 1
+    p.shutdown()
+
+def test_worker_crash_starts_fresh_processes():
+    p = WorkerPool(mode="process", workers=1, max_pending=4, timeout=10)
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(p.run(_crash))
+    assert asyncio.run(p.run(_square, 4)) == 16 and p.mode == "process" and p.pending == 0
+    p.shutdown()
@@ -0,0 +1,79 @@
+import gzip, json
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import Resume
+from app.schemas import OptimizeResponse
+from app.utils import fastjson
+
+client = TestClient(app)
+
+RESUME = {"pii": {"name": "Test User", "email": "test@example.com"}, "summary": "Data engineer",
+          "raw_text": "I built ETL in Python and SQL for Snowflake."}
+JD = {"entities": {"required_skills": ["Python", "SQL", "Snowflake"]}, "raw_text": "We need Python, SQL, Snowflake."}
+
+def test_align_typed_body():
+    r = client.post("/align", json={"resume": RESUME, "job_description": JD})
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body) == {"alignment", "coverage", "timings_ms"}
+    assert "required" in body["coverage"]
+
+def test_invalid_payloads_are_400():
+    assert client.post("/align", json={"resume": {"raw_text": 5}, "job_description": JD}).status_code == 400
+    assert client.post("/align", json={"resume": RESUME}).status_code == 400
+    assert client.post("/ats/check", json={}).status_code == 400
+    r = client.post("/optimize", content=b"{not json", headers={"content-type": "application/json"})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Invalid payload")
+    for path in ("/export/resume", "/export/resume/pdf", "/report", "/report/html", "/cover-letter"):
+        assert client.post(path, json={}).status_code == 400, path
+        assert client.post(path, json={"resume": {"raw_text": 5}, "job_description": JD}).status_code == 400, path
+    assert client.post("/report", json={"resume": RESUME}).status_code == 400
+    assert client.post("/profile/save", json={"theme": "dark", "resume": {"skills": "python"}}).status_code == 400
+    schemas = client.get("/openapi.json").json()["components"]["schemas"]
+    assert {"ExportRequest", "ReportRequest", "CoverLetterRequest", "ProfileSaveRequest"} <= set(schemas)
+
+def test_optimize_changed_only():
+    full = client.post("/optimize", json={"resume": RESUME, "job_description": JD}).json()
+    r = client.post("/optimize", json={"resume": RESUME, "job_description": JD, "changed_only": True})
+    assert r.status_code == 200
+    body = r.json()
+    assert "tailored_resume" not in body
+    assert body["edits"] == full["edits"]
+    changes = body["tailored_changes"]
+    source = Resume(**RESUME).model_dump(mode="json")
+    for name, value in full["tailored_resume"].items():
+        if value != source[name]:
+            assert changes[name] == value
+        else:
+            assert name not in changes
+
+def test_large_responses_are_gzipped():
+    resume = dict(RESUME, raw_text=RESUME["raw_text"] * 200)
+    r = client.post("/optimize", json={"resume": resume, "job_description": JD}, headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert "tailored_resume" in r.json()
+    small = client.get("/healthz", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+def test_stdlib_fallback_matches(monkeypatch):
+    resume = Resume(**RESUME)
+    model = OptimizeResponse(edits=[], tailored_resume=resume, timings_ms={"validate": 0.1})
+    data = {"resume": resume, "n": 1, "text": "naïve – ok"}
+    fast = (fastjson.dumps(model), fastjson.dumps(data))
+    monkeypatch.setattr(fastjson, "FAST_JSON", False)
+    assert json.loads(fastjson.dumps(model)) == json.loads(fast[0])
+    assert json.loads(fastjson.dumps(data)) == json.loads(fast[1])
+    monkeypatch.setattr(fastjson, "FAST_JSON", True)
+    monkeypatch.setattr(fastjson, "orjson", None)
+    assert json.loads(fastjson.dumps(data)) == json.loads(fast[1])
+    assert "tailored_changes" not in json.loads(fast[0])
+
+def test_openapi_documents_request_models():
+    spec = client.get("/openapi.json").json()
+    schemas = spec["components"]["schemas"]
+    assert {"AlignRequest", "OptimizeRequest", "AtsRequest", "BatchAlignRequest"} <= set(schemas)
+    body = spec["paths"]["/align"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert body == {"$ref": "#/components/schemas/AlignRequest"}
+    assert "Resume" in str(schemas["AlignRequest"])
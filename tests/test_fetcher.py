@@ -0,0 +1,63 @@
+import asyncio, threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from app.services.fetcher import CacheEntry, UrlFetcher
+
+class _Stub(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        _Stub.hits.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304); self.end_headers(); return
+        body = (b"Senior   Python\n\nengineer " * (1000 if self.path == "/big" else 1))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        if self.path == "/etag":
+            self.send_header("ETag", '"v1"'); self.send_header("Cache-Control", "no-cache")
+        elif self.path == "/fresh":
+            self.send_header("Cache-Control", "max-age=600")
+        elif self.path == "/nostore":
+            self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def base_url():
+    srv = HTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+def test_fetch_caches_fresh_and_revalidates_etag(base_url):
+    f = UrlFetcher()
+    async def run():
+        assert await f.fetch(base_url + "/fresh") == "Senior Python engineer"
+        assert await f.fetch(base_url + "/fresh") == "Senior Python engineer"
+        await f.fetch(base_url + "/etag")
+        assert await f.fetch(base_url + "/etag") == "Senior Python engineer"
+        await f.fetch(base_url + "/nostore"); await f.fetch(base_url + "/nostore")
+        await f.aclose()
+    _Stub.hits.clear()
+    asyncio.run(run())
+    assert _Stub.hits == [("/fresh", None), ("/etag", None), ("/etag", '"v1"'), ("/nostore", None), ("/nostore", None)]
+    assert f.stats["hits"] == 1 and f.stats["revalidated"] == 1
+
+def test_fetch_caps_body_and_evicts_lru(base_url):
+    f = UrlFetcher(max_bytes=100, cache_bytes=30)
+    async def run():
+        text = await f.fetch(base_url + "/big")
+        await f.fetch(base_url + "/fresh?a"); await f.fetch(base_url + "/fresh?b")
+        missing = await f.fetch("http://127.0.0.1:1/unreachable")
+        await f.aclose()
+        return text, missing
+    text, missing = asyncio.run(run())
+    assert len(text) <= 100 and f.stats["truncated"] == 1
+    assert list(f.cache) == [base_url + "/fresh?b"] and f.cached_bytes <= 30
+    assert missing == "" and f.stats["errors"] == 1
+
+def test_cache_entry_size_counts_utf8_bytes():
+    assert CacheEntry("Ingénieur 日本", None, None, 0.0).size == len("Ingénieur 日本".encode("utf-8")) == 17
@@ -0,0 +1,92 @@
+import random
+import pytest
+from app.models import Resume, JobDescription
+from app.services.alignment import compute_alignment, coverage_scores
+from app.services.incremental import IncrementalAligner, EditError
+from app.services import incremental
+from app.services.packages import PackageService, DiskPackageStore, MemoryPackageStore, VersionConflict
+
+WORDS = ["python", "pyspark", "sql", "mysql", "c++", "node.js", "aws", "docker", "team", "led", "built", "etl.", "•", "|", "İzmir", "PYTHON", ""]
+JD = JobDescription(entities={"required_skills": ["Python", "SQL", "Spark", "Rust"], "preferred_skills": ["AWS", "py"],
+                              "tools": ["Docker", "Node.js"]})
+
+def _random_edit(rng, text):
+    n = len(text)
+    start = rng.randint(0, n)
+    end = rng.randint(start, min(n, start + 15))
+    snippet = rng.choice([" ", "", ".", "-"]).join(rng.choice(WORDS) for _ in range(rng.randint(0, 4)))
+    op = rng.choice(["insert", "delete", "replace"])
+    if op == "insert":
+        return {"op": op, "at": start, "text": snippet}
+    if op == "delete":
+        return {"op": op, "start": start, "end": end}
+    return {"op": op, "start": start, "end": end, "text": snippet}
+
+def test_incremental_always_equals_full_alignment():
+    rng = random.Random(42)
+    for _ in range(60):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 80)))
+        inc = IncrementalAligner(text, JD)
+        for _ in range(15):
+            inc.apply([_random_edit(rng, inc.text)])
+            full = compute_alignment(Resume(raw_text=inc.text), JD)
+            skills, tools = inc.items()
+            assert [(i.term, i.strength, i.confidence) for i in skills] == [(i.term, i.strength, i.confidence) for i in full.skills]
+            assert [(i.term, i.strength, i.confidence) for i in tools] == [(i.term, i.strength, i.confidence) for i in full.tools]
+            assert inc.gaps() == full.gaps
+            assert inc.coverage() == coverage_scores(full, JD)
+
+def test_package_edit_returns_only_changes_and_checks_version():
+    svc = PackageService(MemoryPackageStore())
+    rec = svc.create(Resume(raw_text="Java and Java"), JobDescription(entities={"required_skills": ["Python", "Java"]}))
+    out = svc.edit_resume(rec, 0, [{"op": "replace", "start": 0, "end": 4, "text": "Python"},
+                                          {"op": "replace", "start": 11, "end": 15, "text": "Python"}])
+    assert out["version"] == 1 and svc.get(rec.id).package.resume.raw_text == "Python and Python"
+    assert [i["term"] for i in out["changes"]["skills"]] == ["Python", "Java"]
+    assert out["changes"]["gaps"] == {"added": ["Java"], "removed": ["Python"]}
+    assert "coverage" not in out["changes"]  # still 1 of 2 required
+    with pytest.raises(VersionConflict):
+        svc.edit_resume(rec, 0, [])
+    with pytest.raises(EditError):
+        svc.edit_resume(rec, 1, [{"op": "insert", "at": 0, "text": "Rust "}, {"op": "delete", "start": 5, "end": 500}])
+    assert rec.version == 1
+    out = svc.edit_resume(rec, 1, [{"op": "insert", "at": 17, "text": " and Java"}])  # the failed batch left no trace
+    assert out["version"] == 2 and svc.get(rec.id).package.resume.raw_text == "Python and Python and Java"
+
+def test_chunked_text_edits_across_chunk_boundaries(monkeypatch):
+    monkeypatch.setattr(incremental, "CHUNK", 8)
+    rng = random.Random(7)
+    for _ in range(20):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 60)))
+        inc, plain = IncrementalAligner(text, JD), text
+        for _ in range(25):
+            edit = _random_edit(rng, plain)
+            inc.apply([edit])
+            start = edit.get("at", edit.get("start"))
+            end = edit.get("end", start)
+            plain = plain[:start] + edit.get("text", "") + plain[end:]
+            assert inc.text == plain and len(inc.buf) == len(plain)
+        full = compute_alignment(Resume(raw_text=inc.text), JD)
+        assert inc.gaps() == full.gaps and inc.coverage() == coverage_scores(full, JD)
+
+def test_disk_store_rejects_concurrent_edits(tmp_path):
+    path = str(tmp_path / "pkg.sqlite3")
+    a, b = PackageService(DiskPackageStore(path)), PackageService(DiskPackageStore(path))  # two app workers
+    rec = a.create(Resume(raw_text="Java"), JobDescription(entities={"required_skills": ["Python"]}))
+    stale = b.get(rec.id)
+    a.edit_resume(a.get(rec.id), 0, [{"op": "insert", "at": 0, "text": "Python "}])
+    with pytest.raises(VersionConflict) as e:
+        b.edit_resume(stale, 0, [{"op": "insert", "at": 0, "text": "Rust "}])
+    assert e.value.current == 1
+    assert a.get(rec.id).package.resume.raw_text == "Python Java"
+
+def test_edits_keep_the_resume_as_written_and_reject_malformed_items():
+    svc = PackageService(MemoryPackageStore())
+    rec = svc.create(Resume(raw_text="İstanbul team, Java"), JobDescription(entities={"required_skills": ["Python"]}))
+    out = svc.edit_resume(rec, 0, [{"op": "replace", "start": 15, "end": 19, "text": "PYTHON"}])
+    assert out["changes"]["skills"][0]["confidence"] > 0  # matched regardless of case
+    assert svc.get(rec.id).package.resume.raw_text == "İstanbul team, PYTHON"
+    for bad in (["insert"], [{"op": "insert", "at": 0, "text": 5}], {"op": "insert"}):
+        with pytest.raises(EditError):
+            svc.edit_resume(rec, 1, bad)
+    assert rec.version == 1
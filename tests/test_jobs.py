@@ -0,0 +1,158 @@
+import asyncio, csv, io, json, time, zipfile
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import JobDescription
+from app.services import artifacts, jobs
+from app.services.cache import ParseCache
+from app.services.jobs import JobError, JobRunner, JobStore, LEASE_SECONDS, stage_inputs, submit
+
+JD = JobDescription(entities={"required_skills": ["Python", "SQL"]}, raw_text="We need Python and SQL.")
+
+def _resume(i: int) -> bytes:
+    return f"Candidate {i}\ncandidate{i}@example.com\nData engineer with Python and SQL, built ETL pipelines #{i}.".encode()
+
+def _zip(entries) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_store", artifacts.ArtifactStore(str(tmp_path / "files"), str(tmp_path / "artifacts.sqlite3")))
+    monkeypatch.setattr(jobs, "parse_cache", ParseCache(path=str(tmp_path / "parse.sqlite3"), version="test"))
+    return JobStore(str(tmp_path / "jobs"), str(tmp_path / "jobs.sqlite3"))
+
+def _upload(tmp_path, name: str, data: bytes):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return name, str(path)
+
+def test_zip_job_isolates_failures_and_builds_archive(store, tmp_path):
+    bundle = _zip([("cvs/a.txt", _resume(1)), ("cvs/b.txt", _resume(2)), ("cvs/broken.pdf", b"not a pdf"),
+                   ("cvs/photo.png", b"\x89PNG"), ("__MACOSX/cvs/._a.txt", b"junk")])
+    job_id = submit(store, JD, [_upload(tmp_path, "batch.zip", bundle), _upload(tmp_path, "c.txt", _resume(3))])
+    assert store.status(job_id)["total"] == 4
+    asyncio.run(JobRunner(store, workers=2, mode="thread").run(until_idle=True))
+
+    status = store.status(job_id, items=True)
+    assert status["status"] == "done"
+    assert (status["done"], status["failed"]) == (3, 1)
+    assert status["skipped"] == ["cvs/photo.png"]
+    failed = [it for it in status["items"] if it["status"] == "failed"]
+    assert failed[0]["filename"] == "broken.pdf" and failed[0]["error"]
+    assert all("required" in it["coverage"] and it["gaps"] is not None for it in status["items"] if it["status"] == "done")
+
+    art = artifacts.get_artifacts().get(status["archive_url"][len("/files/"):])
+    with zipfile.ZipFile(art.path) as zf:
+        names = zf.namelist()
+        rows = list(csv.DictReader(io.StringIO(zf.read("summary.csv").decode())))
+        results = json.loads(zf.read("results.json"))
+    assert len([n for n in names if n.startswith("exports/")]) == 6
+    assert [r["status"] for r in rows] == ["done", "done", "failed", "done"]
+    assert results["job"]["job_id"] == job_id
+    assert not (tmp_path / "jobs" / job_id).exists()  # inputs removed once archived
+
+def test_job_resumes_after_crash(store, tmp_path):
+    job_id = submit(store, JD, [_upload(tmp_path, f"{i}.txt", _resume(i)) for i in range(3)])
+    # a worker claimed two items and died: its lease is already expired
+    lost = store.claim(2, "dead-worker", now=time.time() - LEASE_SECONDS - 1)
+    assert len(lost) == 2
+    assert store.status(job_id)["running"] == 2
+
+    restarted = JobStore(store.root, store.index_path)
+    asyncio.run(JobRunner(restarted, workers=2, mode="inline").run(until_idle=True))
+    status = restarted.status(job_id, items=True)
+    assert status["status"] == "done" and status["done"] == 3
+    assert sorted(it["attempts"] for it in status["items"]) == [1, 2, 2]
+
+def test_graceful_stop_requeues_claimed_items(store, tmp_path):
+    job_id = submit(store, JD, [_upload(tmp_path, "a.txt", _resume(1))])
+    store.claim(1, "worker-a")
+    store.release("worker-a")
+    assert store.status(job_id)["queued"] == 1
+
+def test_input_limits(store, tmp_path, monkeypatch):
+    with pytest.raises(JobError):
+        submit(store, JD, [_upload(tmp_path, "x.png", b"png")])
+    with pytest.raises(JobError):
+        submit(store, JD, [_upload(tmp_path, "bad.zip", b"not a zip")])
+    monkeypatch.setattr(jobs, "JOB_MAX_ITEMS", 1)
+    with pytest.raises(JobError):
+        stage_inputs(store, "limited", [_upload(tmp_path, "two.zip", _zip([("a.txt", b"a"), ("b.txt", b"b")]))])
+    assert not (tmp_path / "jobs" / "limited").exists()
+
+def test_jobs_api(store, monkeypatch):
+    runner = JobRunner(store, workers=2, mode="thread")
+    monkeypatch.setattr(jobs, "_runner", runner)
+    client = TestClient(app)
+    files = [("files", ("batch.zip", _zip([("a.txt", _resume(1)), ("b.txt", _resume(2))]), "application/zip")),
+             ("files", ("c.txt", _resume(3), "text/plain"))]
+    r = client.post("/jobs", files=files, data={"jd_text": "Looking for Python and SQL"})
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+    assert r.json()["total"] == 3
+
+    asyncio.run(runner.run(until_idle=True))
+    status = client.get(f"/jobs/{job_id}").json()
+    assert status["status"] == "done" and status["done"] == 3
+    assert client.get(status["archive_url"]).headers["content-type"] == "application/zip"
+    lines = client.get(f"/jobs/{job_id}/events").text.splitlines()
+    assert json.loads(lines[-1])["status"] == "done"
+    assert client.delete(f"/jobs/{job_id}").status_code == 409
+
+    assert client.post("/jobs", files=files).status_code == 400
+    assert client.get("/jobs/unknown").status_code == 404
+
+def test_cancel_job(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "_runner", JobRunner(store, workers=1, mode="inline"))
+    job_id = submit(store, JD, [_upload(tmp_path, f"{i}.txt", _resume(i)) for i in range(2)])
+    r = TestClient(app).delete(f"/jobs/{job_id}")
+    assert r.status_code == 200
+    assert r.json()["status"] == "cancelled"
+    assert store.claim(5, "w") == []
+    assert not (tmp_path / "jobs" / job_id).exists()
+
+def test_process_mode_job(store, tmp_path, monkeypatch):
+    # the default mode: items run in forked workers, which must not reuse the parent's parse cache connection
+    cache = ParseCache(path=str(tmp_path / "parse.sqlite3"), version="test")
+    cache.get("warm")  # the parent has an open connection when the pool forks
+    monkeypatch.setattr(jobs, "parse_cache", cache)
+    job_id = submit(store, JD, [_upload(tmp_path, f"{i}.txt", _resume(i)) for i in range(3)])
+    runner = JobRunner(store, workers=2, mode="process")
+    asyncio.run(runner.run(until_idle=True))
+    runner.pool.shutdown()
+    status = store.status(job_id)
+    assert status["status"] == "done" and status["done"] == 3
+    assert cache._conn().execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0] == 3  # written by the workers
+
+def test_events_stream_is_not_buffered_by_gzip(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "_runner", JobRunner(store, workers=1, mode="inline"))
+    job_id = submit(store, JD, [_upload(tmp_path, "a.txt", _resume(1))])  # queued, nobody runs it: the stream stays open
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": f"/jobs/{job_id}/events",
+             "raw_path": f"/jobs/{job_id}/events".encode(), "root_path": "", "query_string": b"", "server": ("test", 80),
+             "client": ("test", 1), "headers": [(b"host", b"test"), (b"accept-encoding", b"gzip, deflate")]}
+    sent = []
+
+    async def run():
+        first_line = asyncio.Event()
+
+        async def receive():
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body"):
+                first_line.set()
+        task = asyncio.create_task(app(scope, receive, send))
+        try:
+            await asyncio.wait_for(first_line.wait(), 5)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+    headers = dict(sent[0]["headers"])
+    assert headers.get(b"content-encoding") != b"gzip"
+    assert json.loads(sent[1]["body"].decode().splitlines()[0])["status"] == "queued"
@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils import profiler
+from app.utils.metrics import Histogram
+
+client = TestClient(app)
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    h = Histogram("lat_seconds", "latency", ("route",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, "/a")
+    lines = h.render()
+    assert 'lat_seconds_bucket{route="/a",le="0.1"} 2' in lines and 'lat_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'lat_seconds_bucket{route="/a",le="+Inf"} 4' in lines and 'lat_seconds_count{route="/a"} 4' in lines
+
+def test_server_timing_header_and_metrics_endpoint(tmp_path, monkeypatch):
+    from app import main
+    from app.services import uploads
+    from app.services.cache import ParseCache
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(main, "parse_cache", ParseCache(path=str(tmp_path / "parse.sqlite3"), version="test"))
+    payload = {"resume": {"raw_text": "Led Python APIs"}, "job_description": {"entities": {"required_skills": ["Python"]}}}
+    r = client.post("/optimize", json=payload)
+    timing = r.headers["server-timing"]
+    assert "validate;dur=" in timing and "analyze;dur=" in timing and timing.split(", ")[-1].startswith("total;dur=")
+    r = client.post("/parse/resume", files={"file": ("cv.txt", b"Python engineer " * 50, "text/plain")})
+    stages = r.headers["server-timing"]
+    assert "spool;dur=" in stages
+    text = client.get("/metrics").text
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/optimize",le="+Inf"}' in text
+    assert 'http_requests_total{method="POST",route="/parse/resume",status="200"}' in text
+    assert 'stage_duration_seconds_count{stage="analyze"}' in text
+    assert 'parsed_bytes_total{kind="resume"}' in text and 'cache_hit_ratio{cache="parse"}' in text
+    assert "# TYPE cache_events_total counter" in text and 'cache_events_total{cache="parse",event="misses"}' in text
+    assert 'http_requests_in_flight{method="GET"} 1' in text  # the scrape itself
+
+def test_worker_stage_timings_are_merged_into_the_request():
+    from app.services.parser import parse_resume
+    from app.utils.timing import collect_timings, traced_call, merge_timings
+    resume, timings = traced_call(parse_resume, "cv.txt", b"Python engineer")
+    assert resume.raw_text == "Python engineer" and {"extract", "normalize"} <= set(timings)
+    with collect_timings() as outer:
+        merge_timings(timings)
+    assert outer == timings
+
+def test_profiler_is_opt_in(monkeypatch):
+    r = client.get("/healthz", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in r.headers and client.get("/debug/profiles").status_code == 404
+    monkeypatch.setattr(profiler, "PROFILE_ENABLED", True)
+    r = client.get("/healthz", headers={"X-Profile": "1"})
+    folded = client.get(f"/debug/profiles/{r.headers['x-profile-id']}")
+    assert folded.status_code == 200 and folded.text.startswith("# duration_ms=")
+
+def test_profiler_samples_only_request_threads():
+    import threading, time
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+    threads = [threading.Thread(target=spin, name=name, daemon=True) for name in ("artifact-sweep", "worker_0")]
+    for t in threads:
+        t.start()
+    prof = profiler.SamplingProfiler(interval=0.001).start()
+    time.sleep(0.2)
+    stop.set()
+    folded = prof.stop()
+    assert "worker_0;" in folded and "artifact-sweep" not in folded
@@ -0,0 +1,37 @@
+import time
+from app.models import Resume, JobDescription, Settings
+from app.services.packages import PackageService, MemoryPackageStore, DiskPackageStore
+
+RESUME = Resume(summary="Engineer", raw_text="Python SQL Python SQL Docker")
+JD = JobDescription(entities={"required_skills": ["Python", "Rust"]})
+
+def test_memoized_until_inputs_change():
+    svc = PackageService(MemoryPackageStore())
+    rec = svc.create(RESUME, JD)
+    first = svc.alignment(rec)
+    assert svc.alignment(rec) is first and svc.coverage(rec) == svc.coverage(rec)
+    edits, tailored = svc.optimize(rec)
+    assert rec.package.resume.summary == "Engineer" and tailored.summary.startswith("Engineer —")
+    assert svc.stats["memo_hits"] >= 2
+
+    svc.update(rec, settings=Settings())  # unchanged settings keep the memo
+    assert rec.package.alignment is first
+    svc.update(rec, settings=Settings(tone="formal"))
+    assert rec.package.alignment is None and rec.memo == {}
+    svc.update(rec, jd=JobDescription(entities={"required_skills": ["Python"]}))
+    assert svc.coverage(rec)["required"] == 1.0
+
+def test_stores_expire_and_share_across_instances(tmp_path):
+    mem = MemoryPackageStore(ttl=0.05)
+    rec = PackageService(mem).create(RESUME, JD)
+    assert mem.get(rec.id) is rec
+    time.sleep(0.06)
+    assert mem.get(rec.id) is None
+
+    path = str(tmp_path / "pkg.sqlite3")
+    a, b = PackageService(DiskPackageStore(path)), PackageService(DiskPackageStore(path))
+    rec = a.create(RESUME, JD)
+    a.coverage(rec)
+    other = b.get(rec.id)  # another worker sees the memoized results
+    assert other.memo["coverage"] == rec.memo["coverage"] and other.package.alignment is not None
+    assert b.delete(rec.id) and a.get(rec.id) is None
@@ -0,0 +1,71 @@
+from app.services.parser import parse_jd
+from app.services.taxonomy import AhoCorasick, Taxonomy
+
+def test_aho_corasick_finds_overlapping_patterns():
+    ac = AhoCorasick({"he": 1, "she": 2, "his": 3, "hers": 4})
+    assert sorted(ac.finditer("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+def test_taxonomy_whole_word_longest_match_and_aliases():
+    tax = Taxonomy({"ambiguous": ["go"], "skills": {"Machine Learning": ["ml"], "Go": ["golang"], "Java": []},
+                    "tools": {"GCP": ["google cloud", "google cloud platform"]}, "certifications": {"CKA": []}})
+    found = tax.extract("ML on Google Cloud Platform; JavaScript, Golang, go-to-market, CKA.")
+    assert found == {"skills": ["Machine Learning", "Go"], "tools": ["GCP"], "certifications": ["CKA"]}
+
+def test_short_aliases_match_only_as_acronyms():
+    tax = Taxonomy({"skills": {"TypeScript": ["ts"], "Quality Assurance": ["qa"], "iOS Development": ["iOS"]},
+                    "tools": {"Kubernetes": ["k8s"]}})
+    assert tax.extract("lots of ts and qa, ios apps") == {"skills": [], "tools": [], "certifications": []}
+    found = tax.extract("TS and QA for iOS / IOS apps on k8s")
+    assert found["skills"] == ["TypeScript", "Quality Assurance", "iOS Development"] and found["tools"] == ["Kubernetes"]
+
+def test_everyday_word_names_match_only_capitalized():
+    tax = Taxonomy({"cased": ["React", "Spring"], "tools": {"React": ["reactjs"], "Spring": ["spring boot"]}, "skills": {"Swift": []}})
+    assert tax.extract("we react quickly to spring hiring with reactjs in swift") == {"skills": ["Swift"], "tools": ["React"], "certifications": []}
+    assert tax.extract("React and Spring Boot on SPRING, swift delivery")["tools"] == ["React", "Spring"]
+    ents = parse_jd(text_input="We react quickly; spring hiring for a chef who is swift. Needs Rust.").entities
+    assert ents.tools == [] and ents.required_skills == ["Rust"]
+
+def test_parse_jd_scans_full_text_with_multiword_terms():
+    filler = " ".join(["responsibilities"] * 2000)
+    jd = parse_jd(text_input=f"{filler} Experience with machine learning, CI/CD and Kubernetes. ISO 27001 a plus.")
+    ents = jd.entities
+    assert "Machine Learning" in ents.required_skills and "CI/CD" in ents.required_skills
+    assert ents.tools == ["Kubernetes"] and "Kubernetes" in ents.required_skills  # tools count toward coverage
+    assert ents.certifications == ["ISO 27001"]
+    assert "Kubernetes" in ents.keywords and "27001" in ents.keywords
+
+def _pdf(pages):
+    from io import BytesIO
+    from reportlab.pdfgen import canvas
+    buf = BytesIO()
+    c = canvas.Canvas(buf)
+    for i in range(pages):
+        c.drawString(72, 720, f"Page {i} Python Kubernetes")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+def test_stream_normalizer_matches_normalize_text():
+    from app.utils.text import StreamNormalizer, normalize_text
+    pieces = ["  Led\n", "• team ", "", "   ", "of*5", "\tengineers  ", "done"]
+    norm = StreamNormalizer()
+    assert "".join(norm.feed(p) for p in pieces) == normalize_text("".join(pieces))
+
+def test_pdf_extraction_stops_at_page_limit(tmp_path):
+    from app.services.extract import ExtractionLimits, extract_file
+    from app.services.parser import parse_resume_file
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(_pdf(5))
+    text, meta = extract_file("cv.pdf", str(path), ExtractionLimits(max_pages=2))
+    assert "Page 1" in text and "Page 2" not in text
+    assert meta == {"truncated": True, "truncated_reason": "max_pages", "pages": 2}
+    resume = parse_resume_file("cv.pdf", str(path))
+    assert resume.source_meta["pages"] == 5 and resume.source_meta["truncated"] is False
+    assert resume.raw_text.startswith("Page 0 Python Kubernetes Page 1")
+
+def test_text_extraction_stops_at_char_limit():
+    from io import BytesIO
+    from app.services.extract import ExtractionLimits, extract_text
+    text, meta = extract_text("jd.txt", BytesIO(("kubernetes   python\n" * 10000).encode()), ExtractionLimits(max_chars=100))
+    assert len(text) <= 100 and text.startswith("kubernetes python kubernetes")
+    assert meta == {"truncated": True, "truncated_reason": "max_chars"}
@@ -0,0 +1,17 @@
+from app.services.rendering import encode_chunks, get_template, stream, warm_templates
+
+def test_templates_compile_once_and_stream_in_chunks():
+    assert warm_templates() == ["report.html.j2", "cover_letter.txt.j2"]
+    assert get_template("report.html.j2") is get_template("report.html.j2")
+    chunks = list(encode_chunks(["ab", "cd", "é", "f"], size=4))
+    assert chunks == [b"abcd", "éf".encode()]
+    ctx = {"generated": "now", "coverage": {"required": 0.5}, "gaps": [{"term": f"t{i}", "reason": "not found"} for i in range(2000)]}
+    parts = list(stream("report.html.j2", **ctx))
+    assert len(parts) > 1 and b"".join(parts).count(b"<li>") == 2000
+
+def test_cover_letter_template_matches_previous_text():
+    from app.models import JobDescription, Resume
+    jd = JobDescription(title="Data Engineer", entities={"required_skills": ["Python", "SQL", "Spark", "Go"]})
+    text = b"".join(stream("cover_letter.txt.j2", resume=Resume(pii={"name": "Ann"}), jd=jd)).decode()
+    assert text == ("Dear Hiring Manager,\n\nI am excited to apply for the Data Engineer role. My background aligns with "
+                    "your needs, including: Python, SQL, Spark.\n\nBest regards,\nAnn\n")
@@ -0,0 +1,31 @@
+from app.models import Resume, JobDescription
+from app.services.alignment import compute_alignment
+from app.services.responsibility import _stem, match_responsibilities, resume_units
+
+RAW = ("Data engineer. • Designed and built streaming ETL pipelines in Spark for billing data. "
+       "• Mentored four junior engineers on code review. • Reduced warehouse costs by 30% on Snowflake.")
+
+def test_units_split_bullets_and_sentences():
+    ids = [uid for uid, _ in resume_units(Resume(raw_text=RAW))]
+    assert ids == ["s1", "s2", "s3", "s4"]
+
+def test_responsibilities_point_at_best_bullets():
+    resume = Resume(raw_text=RAW)
+    cov = match_responsibilities(resume, ["Design and build ETL pipelines", "Mentor junior engineers",
+                                          "Manage the office kitchen"])
+    assert cov[0].evidence_ids[0] == "s2" and cov[0].coverage > 0.5
+    assert cov[1].evidence_ids[0] == "s3" and cov[1].coverage > 0.5
+    assert cov[2].evidence_ids == [] and cov[2].coverage == 0.0
+
+def test_alignment_scores_every_responsibility_and_uses_bullet_ids():
+    resume = Resume(experience=[{"id": "exp.1", "bullets": [{"id": "exp.1.b1", "text": "Built Kafka ingestion"},
+                                                            {"id": "exp.1.b2", "text": "Led hiring for the data team"}]}])
+    jd = JobDescription(entities={"responsibilities": [f"Own Kafka ingestion {i}" for i in range(12)]})
+    al = compute_alignment(resume, jd)
+    assert len(al.responsibilities) == 12
+    assert al.responsibilities[0].evidence_ids == ["exp.1.b1"]
+
+def test_stemmer_conflates_inflections_consistently():
+    for group in ("use uses using used", "manage manages managed managing", "run runs running", "study studies studied"):
+        assert len({_stem(w) for w in group.split()}) == 1, group
+    assert _stem("manager") != _stem("manage") and _stem("string") == "string" and _stem("process") == "process"
@@ -0,0 +1,48 @@
+import json, os, subprocess, sys, time
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services import backends
+
+HEAVY = ("pdfminer", "docx", "reportlab", "requests", "httpx", "jinja2")
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "500"))  # app.main on top of fastapi/pydantic
+
+PROBE = """
+import json, sys, time
+import fastapi, pydantic, starlette
+t0 = time.perf_counter()
+import app.main
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({"ms": ms, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY,)
+
+def _probe():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def test_import_defers_heavy_backends_within_budget():
+    runs = [_probe() for _ in range(2)]
+    assert runs[0]["loaded"] == []
+    best = min(r["ms"] for r in runs)
+    assert best < IMPORT_BUDGET_MS, f"import app.main took {best:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+
+def test_readyz_turns_ready_after_background_warmup():
+    from app.main import app
+    with TestClient(app) as client:
+        deadline = time.time() + 30
+        while (r := client.get("/readyz")).status_code != 200 and time.time() < deadline:
+            time.sleep(0.05)
+        body = r.json()
+    assert r.status_code == 200 and body["ready"] and body["warmup"]["done"]
+    assert all(b["loaded"] for b in body["backends"].values()) and "exporter:pdf" in body["backends"]
+
+def test_failed_backend_is_reported_not_ready(monkeypatch):
+    monkeypatch.setattr(backends, "BACKENDS", dict(backends.BACKENDS))
+    backends.register("parser", "odt", ("no_such_odt_module",))
+    with pytest.raises(ImportError):
+        backends.require("parser", "odt")
+    state = backends.readiness()
+    assert not state["ready"] and state["backends"]["parser:odt"]["error"].startswith("ModuleNotFoundError")
+    with pytest.raises(KeyError):
+        backends.require("parser", "rtf")